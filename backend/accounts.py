@@ -0,0 +1,240 @@
+"""
+Multi-account Google Ads access.
+Keeps one GoogleAdsService per client account, all sharing a single
+GoogleAdsClient authenticated against the manager (MCC) account, and fans
+batch work out across accounts on a bounded thread pool with per-account
+concurrency and daily operation limits.
+
+Daily usage is counted in the account_quota_usage table, so every worker
+and replica draws on the same allowance and restarts do not reset it. Each
+call is charged the Google Ads operations it makes (a publish is 3-4
+mutates), not 1.
+"""
+
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextvars import copy_context
+from datetime import date
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from google_ads_service import GoogleAdsService
+from models import db, AccountQuotaUsage
+from config import Config
+import math
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# operation is called with the account's GoogleAdsService; operations is
+# the number of Google Ads operations it makes, charged against the quota
+FanOutJob = namedtuple('FanOutJob', ['customer_id', 'key', 'operation', 'operations'], defaults=(1,))
+
+
+def publish_operation_count(campaign_data):
+    """Mutates a publish makes: budget (unless a shared one is known), campaign, ad group and ad."""
+    return 3 if campaign_data.get('budget_resource_name') else 4
+
+
+def status_query_count(campaign_ids, chunk_size):
+    """GAQL requests a status refresh of `campaign_ids` makes."""
+    return max(1, math.ceil(len(campaign_ids) / chunk_size))
+
+
+def quota_statement(dialect_name, customer_id, operations, limit, today):
+    """
+    Add `operations` to an account's usage for `today` in one statement.
+
+    With a limit, the row is only updated while it stays within it; the
+    statement then returns no row. Concurrent workers cannot overshoot,
+    since the check and the increment are one atomic upsert.
+    """
+    dialect = postgresql if dialect_name == 'postgresql' else sqlite
+    table = AccountQuotaUsage.__table__
+    statement = dialect.insert(table).values(customer_id=customer_id, usage_date=today, operations=operations)
+    total = table.c.operations + statement.excluded.operations
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.customer_id, table.c.usage_date],
+        set_={'operations': total},
+        where=(total <= limit) if limit else None
+    ).returning(table.c.operations)
+
+
+def refund_statement(customer_id, operations, usage_date):
+    """Take back `operations` charged on `usage_date` (never below zero)."""
+    table = AccountQuotaUsage.__table__
+    return update(table).where(
+        table.c.customer_id == customer_id,
+        table.c.usage_date == usage_date
+    ).values(operations=case(
+        (table.c.operations > operations, table.c.operations - operations),
+        else_=0
+    ))
+
+
+def usage_query(today):
+    """Operations used on `today`, per account."""
+    return select(AccountQuotaUsage.customer_id, AccountQuotaUsage.operations).where(
+        AccountQuotaUsage.usage_date == today
+    )
+
+
+class AccountQuotaExceeded(Exception):
+    """Raised when an account has used its daily operation allowance."""
+
+
+class AccountPool:
+    """Per-account GoogleAdsService instances with quota accounting."""
+
+    def __init__(self, max_per_account=None, daily_operation_limit=None):
+        """
+        Args:
+            max_per_account (int): Concurrent operations allowed per account
+                                   during fan-out
+            daily_operation_limit (int): Operations per account per day
+                                         (0 = unlimited)
+        """
+        self.max_per_account = max_per_account or Config.ACCOUNT_MAX_CONCURRENCY
+        self.daily_operation_limit = (
+            Config.ACCOUNT_DAILY_OPERATION_LIMIT if daily_operation_limit is None else daily_operation_limit
+        )
+        self._client = None
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def get_service(self, customer_id=None):
+        """
+        Get the GoogleAdsService bound to a client account.
+
+        Args:
+            customer_id (str): Client account; None for GOOGLE_ADS_CUSTOMER_ID
+        """
+        customer_id = customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', '')
+        with self._lock:
+            if customer_id not in self._services:
+                if self._client is None:
+                    bootstrap = GoogleAdsService(Config.get_google_ads_config())
+                    bootstrap.initialize_client()
+                    self._client = bootstrap.client
+                self._services[customer_id] = GoogleAdsService(
+                    Config.get_google_ads_config(customer_id), client=self._client
+                )
+            return self._services[customer_id]
+
+    def run(self, customer_id, operation, operations=1):
+        """
+        Run `operation(service)` against an account, charging `operations`
+        against the account's daily operation limit. The charge is refunded
+        if the operation fails.
+        """
+        usage_date = self._consume_quota(customer_id, operations)
+        try:
+            return operation(self.get_service(customer_id))
+        except Exception:
+            self._refund_quota(customer_id, operations, usage_date)
+            raise
+
+    def usage(self):
+        """Operations used today, per account."""
+        with db.engine.connect() as connection:
+            return dict(connection.execute(usage_query(date.today())).all())
+
+    def fan_out(self, jobs, max_workers):
+        """
+        Run jobs across accounts on a bounded thread pool.
+
+        Jobs are dispatched round-robin between accounts and no account ever
+        has more than `max_per_account` jobs in flight, so one account with
+        thousands of jobs cannot occupy every worker.
+
+        Args:
+            jobs (list): FanOutJob items
+            max_workers (int): Total worker threads
+
+        Returns:
+            list: (key, result, error) tuples in completion order; error is
+                  None on success
+        """
+        queues = OrderedDict()
+        for job in jobs:
+            queues.setdefault(job.customer_id, deque()).append(job)
+        in_flight = {customer_id: 0 for customer_id in queues}
+        results = []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            while queues or pending:
+                submitted = True
+                while submitted and len(pending) < max_workers:
+                    submitted = False
+                    for customer_id in list(queues):
+                        if len(pending) >= max_workers:
+                            break
+                        if in_flight[customer_id] >= self.max_per_account:
+                            continue
+                        job = queues[customer_id].popleft()
+                        if not queues[customer_id]:
+                            del queues[customer_id]
+                        # Worker threads log under the caller's request id
+                        future = executor.submit(
+                            copy_context().run, self.run, job.customer_id, job.operation, job.operations
+                        )
+                        pending[future] = job
+                        in_flight[customer_id] += 1
+                        submitted = True
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    in_flight[job.customer_id] -= 1
+                    try:
+                        results.append((job.key, future.result(), None))
+                    except Exception as e:
+                        results.append((job.key, None, e))
+
+        return results
+
+    def _quota_statement(self, customer_id, operations, dialect_name, today):
+        """Charge statement for an account, or raise if it can never fit."""
+        if self.daily_operation_limit and operations > self.daily_operation_limit:
+            raise AccountQuotaExceeded(
+                f"{operations} operations exceed the daily limit of {self.daily_operation_limit}"
+            )
+        return quota_statement(dialect_name, customer_id, operations, self.daily_operation_limit, today)
+
+    def _quota_exceeded(self, customer_id):
+        return AccountQuotaExceeded(
+            f"Account {customer_id} has used its {self.daily_operation_limit} operations for today"
+        )
+
+    def _consume_quota(self, customer_id, operations=1):
+        """Charge an account, or raise AccountQuotaExceeded. Returns the usage date charged."""
+        customer_id = customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', '')
+        today = date.today()
+        with db.engine.begin() as connection:
+            statement = self._quota_statement(customer_id, operations, connection.dialect.name, today)
+            if connection.execute(statement).first() is None:
+                raise self._quota_exceeded(customer_id)
+        return today
+
+    def _refund_quota(self, customer_id, operations, usage_date):
+        """Undo a _consume_quota charge. Never raises, so the operation's own error propagates."""
+        customer_id = customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', '')
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(refund_statement(customer_id, operations, usage_date))
+        except Exception as e:
+            logger.warning("Could not refund %s operations to account %s: %s", operations, customer_id, e)
+
+
+_account_pool = None
+_account_pool_lock = threading.Lock()
+
+
+def get_account_pool():
+    """Process-wide AccountPool."""
+    global _account_pool
+    with _account_pool_lock:
+        if _account_pool is None:
+            _account_pool = AccountPool()
+        return _account_pool
@@ -8,13 +8,17 @@ from flask_cors import CORS
 from models import db
 from routes import api
 from config import Config
+from scheduler import CampaignScheduler
+from search import ensure_search_index
+from summary import ensure_campaign_summary
+from changes import ChangeFeed
+from health import HealthProber
+from compression import init_compression
+from logging_setup import configure_logging, init_request_logging
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (non-blocking; see logging_setup.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -37,14 +41,38 @@ def create_app():
         }
     })
     
+    # Request ids and access log (registered first so its after_request runs last)
+    init_request_logging(app)
+    
     # Register blueprints
     app.register_blueprint(api)
     
+    # Compress large responses
+    init_compression(app)
+    
     # Create tables if they don't exist
     with app.app_context():
         db.create_all()
+        ensure_search_index()
+        ensure_campaign_summary()
         logger.info("Database tables created successfully")
     
+    # One change-log poller per process, shared by all SSE subscribers
+    app.extensions['change_feed'] = ChangeFeed(app)
+    
+    # Dependency checks for /api/health/ready run on this prober's thread,
+    # started by the server entrypoints (so scripts using create_app don't probe)
+    health_prober = HealthProber(app)
+    with app.app_context():
+        health_prober.watch_pool('database', db.engine.pool)
+    app.extensions['health_prober'] = health_prober
+    
+    # Start the in-process scheduler (leave disabled when running scheduler.py)
+    if Config.SCHEDULER_ENABLED:
+        scheduler = CampaignScheduler(app)
+        scheduler.start()
+        app.extensions['campaign_scheduler'] = scheduler
+    
     # Root endpoint
     @app.route('/')
     def index():
@@ -53,7 +81,12 @@ def create_app():
             'version': '1.0.0',
             'endpoints': {
                 'health': '/api/health',
+                'liveness': '/api/health/live',
+                'readiness': '/api/health/ready',
                 'campaigns': '/api/campaigns',
+                'search_campaigns': '/api/campaigns/search?q={query}',
+                'campaign_summary': '/api/campaigns/summary',
+                'campaign_changes': '/api/campaigns/changes?since={cursor}',
                 'create_campaign': 'POST /api/campaigns',
                 'get_campaign': '/api/campaigns/{id}',
                 'update_campaign': 'PUT /api/campaigns/{id}',
@@ -68,11 +101,12 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    app.extensions['health_prober'].start()
     
     # Log configuration status
     is_valid, missing = Config.validate_google_ads_config()
     if not is_valid:
-        logger.warning(f"Google Ads configuration incomplete. Missing: {missing}")
+        logger.warning("Google Ads configuration incomplete. Missing: %s", missing)
         logger.warning("Publishing to Google Ads will not work until configuration is complete.")
     else:
         logger.info("Google Ads configuration is valid")
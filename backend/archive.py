@@ -0,0 +1,212 @@
+"""
+Campaign archive tier.
+Campaigns archived by hand, and campaigns whose end_date is older than the
+retention window, are moved out of the hot campaigns table into
+campaigns_archive in batches. List endpoints only read the hot table unless
+archived campaigns are asked for explicitly.
+
+On PostgreSQL the archive is range-partitioned by archived_at with one
+partition per year, so old years can be detached or dropped without touching
+live data.
+
+Runs on every scheduler tick, or on demand:
+
+    python archive.py
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, literal, or_, select, text, union_all
+from models import db, Campaign, ArchivedCampaign
+from config import Config
+import base64
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns copied between the hot and archive tables
+ARCHIVED_COLUMNS = [column.name for column in ArchivedCampaign.__table__.columns]
+
+# Years whose archive partition is known to exist in this process
+_partitions = set()
+
+# Sort key for campaigns without created_at, which list last
+NO_CREATED_AT = datetime(1970, 1, 1)
+
+
+def ensure_archive_partition(connection, year):
+    """Create the archive partition for `year` on PostgreSQL if missing."""
+    if connection.dialect.name != 'postgresql' or year in _partitions:
+        return
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS campaigns_archive_{year} PARTITION OF campaigns_archive "
+        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    ))
+    _partitions.add(year)
+
+
+def archive_campaigns(today=None, retention_days=None, batch_size=None, stop_event=None):
+    """
+    Move archivable campaigns to the archive table.
+
+    A campaign is archivable once it has been archived by hand, or when it is
+    not PUBLISHED and its end_date is more than `retention_days` ago
+    (published campaigns are paused by the scheduler first). Restored
+    campaigns are only archived by hand until their end_date is changed. Each batch is
+    copied and deleted in one transaction; the deletes go through the ORM so
+    the summary rollup and change log stay in step.
+
+    Args:
+        today (date): Reference date (defaults to today)
+        retention_days (int): Days after end_date before a campaign moves
+        batch_size (int): Campaigns moved per transaction
+        stop_event (threading.Event): Stops between batches when set
+
+    Returns:
+        int: Number of campaigns moved
+    """
+    today = today or date.today()
+    retention_days = Config.ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    cutoff = today - timedelta(days=retention_days)
+
+    # Two queries, each served by its own index (ix_campaigns_archived_at,
+    # ix_campaigns_end_date), instead of one OR that scans the hot table
+    archived_by_hand = Campaign.query.filter(
+        Campaign.archived_at.isnot(None)
+    ).order_by(Campaign.archived_at, Campaign.id)
+    expired = Campaign.query.filter(
+        Campaign.end_date < cutoff,
+        Campaign.restored_at.is_(None),
+        or_(Campaign.status.is_(None), Campaign.status != 'PUBLISHED')
+    ).order_by(Campaign.end_date, Campaign.id)
+
+    moved = 0
+    for query in (archived_by_hand, expired):
+        while stop_event is None or not stop_event.is_set():
+            batch = query.limit(batch_size).all()
+            if not batch:
+                break
+            _move_to_archive(batch)
+            moved += len(batch)
+            logger.info("Archived %s campaigns", len(batch))
+
+    return moved
+
+
+def _move_to_archive(batch):
+    """Copy campaigns to the archive table and delete them, in one transaction."""
+    now = datetime.utcnow()
+    rows = []
+    for campaign in batch:
+        row = {name: getattr(campaign, name) for name in ARCHIVED_COLUMNS}
+        row['archived_at'] = campaign.archived_at or now
+        rows.append(row)
+
+    try:
+        connection = db.session.connection()
+        for year in {row['archived_at'].year for row in rows}:
+            ensure_archive_partition(connection, year)
+        connection.execute(ArchivedCampaign.__table__.insert(), rows)
+        for campaign in batch:
+            db.session.delete(campaign)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def encode_page_token(row):
+    """Opaque token for the page after `row` of all_campaigns_query."""
+    created_at = row.created_at or NO_CREATED_AT
+    raw = json.dumps([created_at.isoformat(), row.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_page_token(token):
+    """Decode a token from encode_page_token. Raises ValueError if malformed."""
+    try:
+        created_at, campaign_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(campaign_id)
+    except Exception:
+        raise ValueError('Invalid page token')
+
+
+def all_campaigns_query(limit, page_token=None):
+    """
+    One page of live and archived campaigns together, newest first.
+
+    The two tables are combined with UNION ALL and paged with a
+    (created_at, id) keyset, so only one page is read and sorted per
+    request whatever the size of the archive.
+
+    Args:
+        limit (int): Page size
+        page_token (str): Token returned with the previous page
+
+    Returns:
+        Select: Rows with the ARCHIVED_COLUMNS (archived_at is NULL for
+                live campaigns)
+    """
+    hot = select(*[Campaign.__table__.c[name] for name in ARCHIVED_COLUMNS])
+    archived = select(*[ArchivedCampaign.__table__.c[name] for name in ARCHIVED_COLUMNS])
+    campaigns = union_all(hot, archived).subquery()
+    created_at = func.coalesce(campaigns.c.created_at, literal(NO_CREATED_AT))
+
+    statement = select(campaigns)
+    if page_token:
+        after_created_at, after_id = decode_page_token(page_token)
+        statement = statement.where(or_(
+            created_at < after_created_at,
+            and_(created_at == after_created_at, campaigns.c.id < after_id)
+        ))
+    return statement.order_by(created_at.desc(), campaigns.c.id.desc()).limit(limit)
+
+
+def campaign_page(rows, limit):
+    """
+    Campaign dicts and next-page token for rows of all_campaigns_query.
+
+    Returns:
+        tuple: (list of campaign dicts, next page token or None)
+    """
+    campaigns = [ArchivedCampaign(**row._mapping).to_dict() for row in rows]
+    next_page = encode_page_token(rows[-1]) if len(rows) == limit else None
+    return campaigns, next_page
+
+
+def restore_campaign(campaign_id, session=None):
+    """
+    Bring an archived campaign back to the campaign list, moving it back into
+    the hot table if the archiver has already moved it. The caller commits.
+
+    The campaign is marked restored so the archiver does not move it again
+    on its next run just because its end_date is past the retention window.
+
+    Args:
+        campaign_id (str): Campaign to restore
+        session (Session): Session to use (defaults to db.session)
+
+    Returns:
+        Campaign: The restored campaign, or None if there is no such campaign
+    """
+    session = session or db.session
+    campaign = session.get(Campaign, campaign_id)
+    if campaign is None:
+        archived = session.scalars(select(ArchivedCampaign).filter_by(id=campaign_id)).first()
+        if archived is None:
+            return None
+        campaign = Campaign(**{name: getattr(archived, name) for name in ARCHIVED_COLUMNS})
+        session.delete(archived)
+        session.add(campaign)
+
+    campaign.archived_at = None
+    campaign.restored_at = datetime.utcnow()
+    return campaign
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    with create_app().app_context():
+        logger.info("Archived %s campaigns", archive_campaigns())
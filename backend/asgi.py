@@ -0,0 +1,100 @@
+"""
+ASGI application entry point.
+Serves the same /api endpoints as app.py with async handlers, async
+SQLAlchemy sessions and Google Ads calls on the gRPC asyncio stack, so one
+process can keep thousands of publishes and list requests in flight.
+
+    hypercorn "asgi:create_app()" --bind 0.0.0.0:5000
+
+Schema setup and the optional in-process scheduler are shared with the
+Flask app (app.create_app); the scheduler keeps running on its own thread.
+"""
+
+from quart import Quart, request
+from quart_cors import cors
+from app import create_app as create_flask_app
+import async_db
+from async_db import init_async_db, dispose_async_db, get_session
+from async_routes import api
+from google_ads_async import get_async_account_pool
+from changes import AsyncChangeFeed
+from compression import available_encodings, compress, compressible, negotiate_encoding
+from logging_setup import init_async_request_logging
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def compress_response(response):
+    """after_request hook: compress large, uncompressed API responses."""
+    response.vary.add('Accept-Encoding')
+
+    # Streamed bodies (SSE) have no content length and are left alone
+    if not compressible(response):
+        return response
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(await response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def create_app():
+    """Application factory for the ASGI app."""
+    # Creates tables, search index and rollup, and starts the scheduler if enabled
+    flask_app = create_flask_app()
+
+    app = Quart(__name__)
+    app.config.from_object(Config)
+    app.extensions['flask_app'] = flask_app
+
+    init_async_db()
+
+    # The Flask app's prober also watches the async connection pool
+    health_prober = flask_app.extensions['health_prober']
+    health_prober.watch_pool('async_database', async_db.engine.sync_engine.pool)
+    app.extensions['health_prober'] = health_prober
+
+    app = cors(
+        app,
+        allow_origin=Config.CORS_ORIGINS,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization"]
+    )
+
+    # Request ids and access log (registered first so its after_request runs last)
+    init_async_request_logging(app)
+
+    app.register_blueprint(api)
+
+    if Config.COMPRESSION_ENABLED:
+        app.after_request(compress_response)
+        logger.info("Response compression enabled (%s)", ', '.join(available_encodings()))
+
+    # One change-log polling task per process, shared by all SSE subscribers
+    app.extensions['change_feed'] = AsyncChangeFeed(get_session)
+
+    @app.before_serving
+    async def startup():
+        health_prober.start()
+
+    @app.after_serving
+    async def shutdown():
+        await get_async_account_pool().close()
+        await dispose_async_db()
+
+    # Root endpoint
+    @app.route('/')
+    async def index():
+        return flask_app.view_functions['index']()
+
+    return app
+
+
+if __name__ == '__main__':
+    logger.info("Starting ASGI application on http://localhost:5000")
+    create_app().run(host='0.0.0.0', port=5000, debug=Config.DEBUG)
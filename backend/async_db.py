@@ -0,0 +1,67 @@
+"""
+Async database access for the ASGI app.
+Uses the same models and tables as the Flask app through SQLAlchemy's asyncio
+extension (asyncpg on PostgreSQL, aiosqlite on SQLite). Sessions run the same
+after_flush hooks as db.session, so the summary rollup and change log stay in
+step whichever app does the writing.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from summary import _track_campaign_changes
+from changes import _log_campaign_changes
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+engine = None
+async_session = None
+
+
+class AsyncBridgeSession(Session):
+    """Sync session behind each AsyncSession; carries the campaign flush hooks."""
+
+
+event.listen(AsyncBridgeSession, 'after_flush', _track_campaign_changes)
+event.listen(AsyncBridgeSession, 'after_flush', _log_campaign_changes)
+
+
+def async_database_url(url):
+    """Swap the driver in a database URL for its asyncio counterpart."""
+    scheme, rest = url.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def init_async_db(url=None):
+    """Create the async engine and session factory."""
+    global engine, async_session
+
+    url = url or Config.ASYNC_DATABASE_URL or async_database_url(Config.DATABASE_URL)
+    options = {'pool_pre_ping': True}
+    if not url.startswith('sqlite'):
+        options['pool_size'] = Config.ASYNC_DB_POOL_SIZE
+        options['max_overflow'] = Config.ASYNC_DB_MAX_OVERFLOW
+
+    engine = create_async_engine(url, echo=Config.SQLALCHEMY_ECHO, **options)
+    # Objects stay usable after commit, since lazy refreshes cannot run in async code
+    async_session = async_sessionmaker(engine, sync_session_class=AsyncBridgeSession, expire_on_commit=False)
+    logger.info("Async database engine created (%s)", engine.dialect.name)
+
+
+def get_session():
+    """New AsyncSession; use as `async with get_session() as session`."""
+    return async_session()
+
+
+async def dispose_async_db():
+    """Close all pooled connections."""
+    if engine is not None:
+        await engine.dispose()
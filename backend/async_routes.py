@@ -0,0 +1,482 @@
+"""
+API routes for the ASGI app.
+Same endpoints, request validation and responses as routes.py, with async
+handlers: database work goes through AsyncSession and Google Ads calls through
+AsyncGoogleAdsService. No connection is held while waiting on Google Ads.
+The database side of each endpoint is shared with routes.py (see
+campaign_actions.py) and run with AsyncSession.run_sync.
+"""
+
+from quart import Blueprint, Response, current_app, request, jsonify
+from async_db import get_session
+from google_ads_async import get_async_account_pool
+from accounts import publish_operation_count
+from search import search_campaigns
+from summary import get_campaign_summary
+from changes import latest_cursor_async, stream_changes_async
+from compression import CompressedResponseCache, negotiate_encoding
+from archive import all_campaigns_query, campaign_page, restore_campaign
+from validation import apply_outcomes, load_drafts, summarize_results, validation_jobs
+from health import legacy_health, liveness
+from status_refresh import campaign_statuses, load_stale, save_statuses, status_jobs
+import campaign_actions
+from campaign_actions import CampaignActionError
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+api = Blueprint('api', __name__, url_prefix='/api')
+
+# Serialized (and compressed) campaign lists, keyed by change-log cursor
+campaign_list_cache = CompressedResponseCache()
+
+
+async def _run(action, *args):
+    """Run a campaign_actions helper (or any `session=` function) in a new session and commit."""
+    async with get_session() as session:
+        result = await session.run_sync(lambda sync_session: action(*args, session=sync_session))
+        await session.commit()
+    return result
+
+
+@api.route('/accounts', methods=['GET'])
+async def get_accounts():
+    """Get managed Google Ads client accounts with today's operation usage."""
+    try:
+        usage = await get_async_account_pool().usage_async()
+        accounts = await _run(campaign_actions.list_accounts)
+        return jsonify({
+            'accounts': [
+                dict(account.to_dict(), operations_today=usage.get(account.customer_id, 0))
+                for account in accounts
+            ]
+        }), 200
+    except Exception as e:
+        logger.error("Error fetching accounts: %s", e)
+        return jsonify({'error': 'Failed to fetch accounts'}), 500
+
+
+@api.route('/accounts', methods=['POST'])
+async def create_account():
+    """Register (or update) a client account under the manager account."""
+    try:
+        account, created = await _run(campaign_actions.save_account, await request.get_json() or {})
+
+        logger.info("%s customer account: %s", 'Created' if created else 'Updated', account.customer_id)
+        return jsonify({
+            'message': 'Account saved successfully',
+            'account': account.to_dict()
+        }), 201 if created else 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error saving account: %s", e)
+        return jsonify({'error': f'Failed to save account: {str(e)}'}), 500
+
+
+@api.route('/campaigns', methods=['GET'])
+async def get_campaigns():
+    """
+    Get campaigns from the database.
+    Only live campaigns are returned unless include_archived=true is passed;
+    that list is paged (limit, page) since the archive grows without bound.
+    """
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    page_token = request.args.get('page')
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+
+    try:
+        async with get_session() as session:
+            # Read the cursor first so no change between the two queries is missed
+            cursor = await latest_cursor_async(session)
+            # Weak: one tag covers the identity and every compressed body
+            etag = f"campaigns-all-{cursor}-{limit}-{page_token or ''}" if include_archived else f"campaigns-{cursor}"
+            if request.if_none_match.contains_weak(etag):
+                response = Response('', status=304)
+                response.set_etag(etag, weak=True)
+                response.vary.add('Accept-Encoding')
+                return response
+
+            if include_archived:
+                try:
+                    statement = all_campaigns_query(limit, page_token)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                campaigns, next_page = campaign_page((await session.execute(statement)).all(), limit)
+                response = jsonify({'campaigns': campaigns, 'cursor': cursor, 'next_page': next_page})
+                response.set_etag(etag, weak=True)
+                response.vary.add('Accept-Encoding')
+                return response
+
+            encoding = negotiate_encoding(request.accept_encodings)
+            cached = campaign_list_cache.peek(cursor, encoding)
+            if cached is None:
+                campaigns = await session.run_sync(
+                    lambda sync_session: campaign_actions.live_campaigns(session=sync_session)
+                )
+                body = current_app.json.dumps({
+                    'campaigns': [campaign.to_dict() for campaign in campaigns],
+                    'cursor': cursor
+                }).encode('utf-8')
+                cached = campaign_list_cache.get(cursor, encoding, lambda: body)
+
+        body, encoding = cached
+        response = Response(body, status=200, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    except Exception as e:
+        logger.error("Error fetching campaigns: %s", e)
+        return jsonify({'error': 'Failed to fetch campaigns'}), 500
+
+
+@api.route('/campaigns/search', methods=['GET'])
+async def search():
+    """Full-text search over campaign names and creatives, ranked by relevance."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+
+    try:
+        campaigns, next_cursor = await _run(search_campaigns, query, limit, request.args.get('cursor'))
+        return jsonify({
+            'campaigns': [campaign.to_dict() for campaign in campaigns],
+            'next_cursor': next_cursor
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Error searching campaigns: %s", e)
+        return jsonify({'error': 'Failed to search campaigns'}), 500
+
+
+@api.route('/campaigns/summary', methods=['GET'])
+async def campaign_summary():
+    """Get campaign counts by status, objective and type from the rollup table."""
+    try:
+        summary = await _run(get_campaign_summary)
+        return jsonify(summary), 200
+    except Exception as e:
+        logger.error("Error fetching campaign summary: %s", e)
+        return jsonify({'error': 'Failed to fetch campaign summary'}), 500
+
+
+@api.route('/campaigns/changes', methods=['GET'])
+async def campaign_changes():
+    """
+    Server-Sent Events stream of campaign create/update/delete deltas.
+    Pass since=<cursor> (or Last-Event-ID on reconnect) to replay missed changes.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'since must be a change cursor'}), 400
+
+    feed = current_app.extensions['change_feed']
+    response = Response(
+        stream_changes_async(feed, since),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.timeout = None  # Streams stay open indefinitely
+    return response
+
+
+@api.route('/campaigns/<campaign_id>', methods=['GET'])
+async def get_campaign(campaign_id):
+    """Get a specific campaign by ID."""
+    try:
+        campaign = await _run(campaign_actions.find_campaign, campaign_id)
+        return jsonify(campaign.to_dict()), 200
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error fetching campaign: %s", e)
+        return jsonify({'error': 'Failed to fetch campaign'}), 500
+
+
+@api.route('/campaigns', methods=['POST'])
+async def create_campaign():
+    """Create a new campaign in the local database."""
+    try:
+        campaign = await _run(campaign_actions.create_campaign, await request.get_json())
+
+        logger.info("Created campaign: %s", campaign.id)
+        return jsonify({
+            'message': 'Campaign created successfully',
+            'campaign': campaign.to_dict()
+        }), 201
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error creating campaign: %s", e)
+        return jsonify({'error': f'Failed to create campaign: {str(e)}'}), 500
+
+
+@api.route('/campaigns/<campaign_id>', methods=['PUT'])
+async def update_campaign(campaign_id):
+    """Update an existing campaign."""
+    try:
+        campaign = await _run(campaign_actions.update_campaign, campaign_id, await request.get_json())
+
+        logger.info("Updated campaign: %s", campaign.id)
+        return jsonify({
+            'message': 'Campaign updated successfully',
+            'campaign': campaign.to_dict()
+        }), 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error updating campaign: %s", e)
+        return jsonify({'error': f'Failed to update campaign: {str(e)}'}), 500
+
+
+@api.route('/campaigns/<campaign_id>', methods=['DELETE'])
+async def delete_campaign(campaign_id):
+    """Delete a campaign from the database."""
+    try:
+        await _run(campaign_actions.delete_campaign, campaign_id)
+
+        logger.info("Deleted campaign: %s", campaign_id)
+        return jsonify({'message': 'Campaign deleted successfully'}), 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error deleting campaign: %s", e)
+        return jsonify({'error': 'Failed to delete campaign'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/archive', methods=['POST'])
+async def archive_campaign(campaign_id):
+    """
+    Archive a campaign. It disappears from the campaign list at once and is
+    moved to the archive table on the next archiver run.
+    """
+    try:
+        campaign = await _run(campaign_actions.archive_campaign, campaign_id)
+
+        logger.info("Archived campaign: %s", campaign_id)
+        return jsonify({
+            'message': 'Campaign archived successfully',
+            'campaign': campaign.to_dict()
+        }), 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error archiving campaign: %s", e)
+        return jsonify({'error': 'Failed to archive campaign'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/restore', methods=['POST'])
+async def restore_archived_campaign(campaign_id):
+    """Bring an archived campaign back to the campaign list."""
+    try:
+        campaign = await _run(restore_campaign, campaign_id)
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
+
+        logger.info("Restored campaign: %s", campaign_id)
+        return jsonify({
+            'message': 'Campaign restored successfully',
+            'campaign': campaign.to_dict()
+        }), 200
+
+    except Exception as e:
+        logger.error("Error restoring campaign: %s", e)
+        return jsonify({'error': 'Failed to restore campaign'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/clone', methods=['POST'])
+async def clone_campaign(campaign_id):
+    """
+    Create draft variants of a campaign in one INSERT.
+
+    Body: {"variants": [{field: value}, ...], "matrix": {field: [value, ...]},
+    "publish": false}. With "publish": true the clones are queued for the
+    scheduler's next publish batch.
+    """
+    try:
+        data = await request.get_json(silent=True) or {}
+        clones, publish = await _run(campaign_actions.clone_campaign, campaign_id, data)
+
+        logger.info("Cloned campaign %s into %s variants", campaign_id, len(clones))
+        return jsonify({
+            'message': f'Created {len(clones)} campaign variants',
+            'queued_for_publish': publish,
+            'campaigns': [clone.to_dict() for clone in clones]
+        }), 201
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error cloning campaign: %s", e)
+        return jsonify({'error': f'Failed to clone campaign: {str(e)}'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/publish', methods=['POST'])
+async def publish_campaign(campaign_id):
+    """Publish a campaign to Google Ads."""
+    try:
+        customer_id, campaign_data = await _run(campaign_actions.prepare_publish, campaign_id)
+
+        # Publish to Google Ads in the campaign's account (no connection held)
+        result = await get_async_account_pool().run_async(
+            customer_id,
+            lambda ads_service: ads_service.publish_campaign(campaign_data),
+            publish_operation_count(campaign_data)
+        )
+
+        await _run(campaign_actions.record_publish, campaign_id, customer_id, campaign_data, result)
+
+        logger.info("Published campaign %s to Google Ads: %s", campaign_id, result['campaign_id'])
+
+        return jsonify({
+            'message': 'Campaign published successfully',
+            'google_campaign_id': result['campaign_id'],
+            'ad_group_id': result['ad_group_id'],
+            'ad_id': result['ad_id'],
+            'status': 'PUBLISHED'
+        }), 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error publishing campaign: %s", e)
+        return jsonify({
+            'error': f'Failed to publish campaign: {str(e)}'
+        }), 500
+
+
+@api.route('/campaigns/<campaign_id>/disable', methods=['POST'])
+async def disable_campaign(campaign_id):
+    """Disable (pause) a campaign in Google Ads."""
+    try:
+        customer_id, google_campaign_id = await _run(campaign_actions.prepare_disable, campaign_id)
+
+        # Disable in Google Ads in the campaign's account (no connection held)
+        await get_async_account_pool().run_async(
+            customer_id,
+            lambda ads_service: ads_service.disable_campaign(google_campaign_id)
+        )
+
+        await _run(campaign_actions.record_disable, campaign_id)
+
+        logger.info("Disabled campaign %s in Google Ads", campaign_id)
+
+        return jsonify({
+            'message': 'Campaign disabled successfully',
+            'status': 'PAUSED'
+        }), 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error disabling campaign: %s", e)
+        return jsonify({
+            'error': f'Failed to disable campaign: {str(e)}'
+        }), 500
+
+
+@api.route('/campaigns/validate', methods=['POST'])
+async def validate_campaigns():
+    """
+    Dry-run publishing: check drafts locally and with Google Ads
+    (validate_only) without creating anything.
+
+    Body (optional): {"ids": [...]}; defaults to every draft.
+    """
+    try:
+        data = await request.get_json(silent=True) or {}
+        campaign_ids = data.get('ids')
+        if campaign_ids is not None and not isinstance(campaign_ids, list):
+            return jsonify({'error': 'ids must be a list'}), 400
+
+        results, batches = await _run(load_drafts, campaign_ids)
+        remote_checked, jobs = validation_jobs(batches)
+        if jobs:
+            # One validate_only request per batch, all batches concurrently
+            apply_outcomes(batches, await get_async_account_pool().fan_out_async(jobs))
+
+        return jsonify(summarize_results(results, remote_checked)), 200
+
+    except Exception as e:
+        logger.error("Error validating campaigns: %s", e)
+        return jsonify({
+            'error': f'Failed to validate campaigns: {str(e)}'
+        }), 500
+
+
+@api.route('/campaigns/refresh-status', methods=['POST'])
+async def refresh_campaign_status():
+    """
+    Read serving status back from Google Ads for published campaigns.
+
+    Body (optional): {"ids": [...], "force": false}. Campaigns checked within
+    STATUS_REFRESH_TTL_SECONDS are served from the cached columns.
+    """
+    try:
+        data = await request.get_json(silent=True) or {}
+        campaign_ids = data.get('ids')
+        if campaign_ids is not None and not isinstance(campaign_ids, list):
+            return jsonify({'error': 'ids must be a list'}), 400
+
+        campaign_actions.check_google_ads_config()
+
+        now = datetime.utcnow()
+        cached, stale = await _run(load_stale, campaign_ids, now, bool(data.get('force')))
+
+        # One streamed query per account, all accounts concurrently (no connection held)
+        outcomes = await get_async_account_pool().fan_out_async(status_jobs(stale))
+
+        result = await _run(save_statuses, stale, outcomes, now)
+        result['cached'] = cached
+        result['campaigns'] = await _run(campaign_statuses, campaign_ids)
+
+        return jsonify(result), 200
+
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
+    except Exception as e:
+        logger.error("Error refreshing campaign status: %s", e)
+        return jsonify({
+            'error': f'Failed to refresh campaign status: {str(e)}'
+        }), 500
+
+
+@api.route('/health/live', methods=['GET'])
+async def liveness_check():
+    """Liveness: the process is up and serving. Touches no dependency."""
+    return jsonify(liveness()), 200
+
+
+@api.route('/health/ready', methods=['GET'])
+async def readiness_check():
+    """Readiness from the background prober's last results (see health.py)."""
+    ready, body = current_app.extensions['health_prober'].readiness()
+    return jsonify(body), 200 if ready else 503
+
+
+@api.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint (readiness in the original response shape)."""
+    ready, body = current_app.extensions['health_prober'].readiness()
+    return jsonify(legacy_health(ready, body)), 200 if ready else 503
@@ -0,0 +1,144 @@
+"""
+Logging overhead benchmark.
+Compares the time log calls add to the request path with the old setup
+(basicConfig: format and write in the calling thread) and with the queue
+setup from logging_setup.py, against a sink that can be made slow to mimic
+a busy stderr pipe or log collector.
+
+    python bench_logging.py                      # 4 threads, 5000 calls each
+    python bench_logging.py --sink-delay-us 200  # slow sink
+"""
+
+from logging.handlers import QueueListener
+from flask import Flask, jsonify
+from logging_setup import (
+    TEXT_FORMAT, DeferredQueueHandler, JsonFormatter, RequestContextFilter, init_request_logging
+)
+import argparse
+import logging
+import os
+import queue
+import statistics
+import threading
+import time
+
+logger = logging.getLogger('bench')
+
+
+class SlowSink:
+    """File-like sink whose writes take at least `delay_us` microseconds."""
+
+    def __init__(self, delay_us):
+        self.delay = delay_us / 1_000_000
+        self.file = open(os.devnull, 'w')
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+
+def install_blocking(sink):
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler, None
+
+
+def install_queue(sink):
+    output = logging.StreamHandler(sink)
+    output.setFormatter(JsonFormatter())
+    handler = DeferredQueueHandler(queue.Queue(1_000_000))
+    handler.addFilter(RequestContextFilter())
+    listener = QueueListener(handler.queue, output)
+    listener.start()
+    return handler, listener
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        'mean': statistics.fmean(samples),
+        'p50': samples[len(samples) // 2],
+        'p99': samples[int(len(samples) * 0.99)],
+        'max': samples[-1],
+    }
+
+
+def bench_log_calls(threads, calls):
+    """Caller-side latency of single logger.info calls, in microseconds."""
+    samples = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for i in range(calls):
+            started = time.perf_counter()
+            logger.info("Published campaign %s to Google Ads: %s", i, 'customers/1/campaigns/2')
+            local.append((time.perf_counter() - started) * 1_000_000)
+        with lock:
+            samples.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return percentiles(samples)
+
+
+def bench_requests(requests, with_hooks):
+    """Latency of a Flask request that logs five lines, in microseconds."""
+    app = Flask(__name__)
+    if with_hooks:
+        init_request_logging(app)
+
+    @app.route('/campaigns')
+    def campaigns():
+        for step in range(5):
+            logger.info("Step %s of request", step)
+        return jsonify({'campaigns': []})
+
+    client = app.test_client()
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get('/campaigns')
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--calls', type=int, default=5000, help='Log calls per thread')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sink-delay-us', type=int, default=50, help='Extra time per write in the sink')
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+
+    print(f"sink delay {args.sink_delay_us}us, {args.threads} threads x {args.calls} calls, "
+          f"{args.requests} requests (times in us)")
+    for name, install in (('blocking', install_blocking), ('queue', install_queue)):
+        handler, listener = install(SlowSink(args.sink_delay_us))
+        root.addHandler(handler)
+        try:
+            calls = bench_log_calls(args.threads, args.calls)
+            requests = bench_requests(args.requests, with_hooks=name == 'queue')
+        finally:
+            root.removeHandler(handler)
+            if listener:
+                listener.stop()
+
+        for label, result in (('log call', calls), ('request', requests)):
+            print(f"{name:>8} {label:<9} " + '  '.join(f"{key} {value:9.1f}" for key, value in result.items()))
+
+
+if __name__ == '__main__':
+    main()
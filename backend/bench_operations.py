@@ -0,0 +1,90 @@
+"""
+Operation building benchmark.
+Measures how many Google Ads operations per second GoogleAdsService builds
+from the cached templates in operation_templates.py, per operation type and
+for a full validate_only batch (budget, campaign, ad group and ad per
+campaign). Nothing is sent: the client only needs to exist.
+
+    python bench_operations.py                 # 1000-campaign batches, 10k ops/s target
+    python bench_operations.py --target 20000  # exits 1 below the target
+"""
+
+from datetime import date, timedelta
+from google.ads.googleads.client import GoogleAdsClient
+from google.oauth2.credentials import Credentials
+from google_ads_service import GoogleAdsService
+import argparse
+import sys
+import time
+
+
+def make_service():
+    client = GoogleAdsClient(Credentials('bench-token'), 'bench-developer-token', use_proto_plus=True)
+    return GoogleAdsService({'customer_id': '1234567890'}, client=client)
+
+
+def campaign_data(index):
+    return {
+        'name': f'Campaign {index}',
+        'daily_budget': 1_000_000,
+        'budget_group': 'bench' if index % 4 == 0 else None,
+        'budget_resource_name': None,
+        'start_date': date.today() + timedelta(days=7),
+        'end_date': date.today() + timedelta(days=37),
+        'ad_group_name': 'Main Ad Group',
+        'ad_headline': 'Summer Deals',
+        'ad_description': 'Save up to 50% on all products',
+        'asset_url': 'https://example.com/summer',
+    }
+
+
+def ops_per_second(build, operations_per_call, seconds):
+    """Call `build` repeatedly for `seconds`; returns operations built per second."""
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        build()
+        calls += 1
+    return calls * operations_per_call / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch', type=int, default=1000, help='Campaigns per validation batch')
+    parser.add_argument('--seconds', type=float, default=2.0, help='Time per measurement')
+    parser.add_argument('--target', type=float, default=10_000, help='Required ops/s for the batch build')
+    args = parser.parse_args()
+
+    service = make_service()
+    data = campaign_data(1)
+    ad_data = {'name': data['name'], 'headline': data['ad_headline'],
+               'description': data['ad_description'], 'asset_url': data['asset_url']}
+    batch = [campaign_data(index) for index in range(args.batch)]
+    batch_operations = len(service._build_validation_operations(batch)[0])  # Also warms the caches
+
+    results = [
+        ('campaign budget', ops_per_second(
+            lambda: service._build_campaign_budget_operation('Budget', 1_000_000), 1, args.seconds)),
+        ('campaign', ops_per_second(
+            lambda: service._build_campaign_operation(data, 'customers/1234567890/campaignBudgets/1'), 1, args.seconds)),
+        ('ad group', ops_per_second(
+            lambda: service._build_ad_group_operation('1', {'name': 'Main Ad Group'}), 1, args.seconds)),
+        ('ad', ops_per_second(
+            lambda: service._build_ad_group_ad_operation('1', ad_data), 1, args.seconds)),
+        ('pause', ops_per_second(
+            lambda: service._build_pause_operation('1'), 1, args.seconds)),
+        (f'batch of {args.batch}', ops_per_second(
+            lambda: service._build_validation_operations(batch), batch_operations, args.seconds)),
+    ]
+
+    for label, rate in results:
+        print(f"{label:<17} {rate:10.0f} ops/s")
+
+    batch_rate = results[-1][1]
+    passed = batch_rate >= args.target
+    print(f"{'PASS' if passed else 'FAIL'}: batch build {batch_rate:.0f} ops/s (target {args.target:.0f})")
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Campaign actions shared by the Flask and ASGI apps.
+Each helper does the database side of one endpoint on a synchronous Session:
+routes.py passes db.session (the default) and async_routes.py runs them
+through AsyncSession.run_sync. Google Ads calls stay in the routes, between a
+prepare_* and a record_* step, so no transaction is held while waiting on
+them. Callers commit.
+
+Requests that cannot be served raise CampaignActionError with the response
+body and status code.
+"""
+
+from datetime import date, datetime
+from sqlalchemy import select
+from models import db, Campaign, ArchivedCampaign, CustomerAccount, SharedBudget
+from cloning import build_clones, clone_customer_ids, clone_insert, expand_variants, record_clones
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields copied as-is from a create/update request
+CAMPAIGN_FIELDS = (
+    'name', 'objective', 'daily_budget', 'ad_group_name', 'ad_headline', 'ad_description', 'asset_url'
+)
+
+
+class CampaignActionError(Exception):
+    """A request that cannot be served; the routes return `body` with `status`."""
+
+    def __init__(self, body, status=400):
+        super().__init__(body['error'])
+        self.body = body
+        self.status = status
+
+
+def _validation_error(errors):
+    return CampaignActionError({'error': 'Validation failed', 'details': errors})
+
+
+def _live_campaign(campaign_id, session):
+    campaign = session.get(Campaign, campaign_id)
+    if not campaign:
+        raise CampaignActionError({'error': 'Campaign not found'}, 404)
+    return campaign
+
+
+def _check_customer_account(customer_id, session):
+    """Raise unless `customer_id` is an active managed account."""
+    account = session.get(CustomerAccount, customer_id)
+    if not account or not account.is_active:
+        raise _validation_error([f'Unknown or inactive customer account: {customer_id}'])
+
+
+def check_google_ads_config():
+    """Raise (500) if the Google Ads configuration is incomplete."""
+    is_valid, missing_fields = Config.validate_google_ads_config()
+    if not is_valid:
+        raise CampaignActionError({
+            'error': 'Google Ads configuration incomplete',
+            'missing_fields': missing_fields
+        }, 500)
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def list_accounts(session=None):
+    """Managed client accounts, by name."""
+    session = session or db.session
+    return session.scalars(select(CustomerAccount).order_by(CustomerAccount.name)).all()
+
+
+def save_account(data, session=None):
+    """
+    Register or update a client account.
+
+    Returns:
+        tuple: (CustomerAccount, True if it was created)
+    """
+    session = session or db.session
+    customer_id = CustomerAccount.normalize_id(data.get('customer_id'))
+
+    errors = []
+    if not customer_id or not customer_id.isdigit():
+        errors.append('customer_id must be a Google Ads customer ID (digits)')
+    if not data.get('name'):
+        errors.append('Account name is required')
+    if errors:
+        raise _validation_error(errors)
+
+    account = session.get(CustomerAccount, customer_id)
+    created = account is None
+    if created:
+        account = CustomerAccount(customer_id=customer_id)
+        session.add(account)
+    account.name = data['name']
+    account.is_active = bool(data.get('is_active', True))
+    return account, created
+
+
+def live_campaigns(session=None):
+    """Campaigns that are not archived, newest first."""
+    session = session or db.session
+    return session.scalars(
+        select(Campaign).where(Campaign.archived_at.is_(None)).order_by(Campaign.created_at.desc())
+    ).all()
+
+
+def find_campaign(campaign_id, session=None):
+    """A live campaign, or an archived one; raises if there is neither."""
+    session = session or db.session
+    campaign = session.get(Campaign, campaign_id)
+    if not campaign:
+        campaign = session.scalars(select(ArchivedCampaign).filter_by(id=campaign_id)).first()
+    if not campaign:
+        raise CampaignActionError({'error': 'Campaign not found'}, 404)
+    return campaign
+
+
+def create_campaign(data, session=None):
+    """Add a draft campaign from a create request."""
+    session = session or db.session
+    validation_errors = Campaign.validate_campaign_data(data)
+    if validation_errors:
+        raise _validation_error(validation_errors)
+
+    customer_id = CustomerAccount.normalize_id(data.get('customer_id'))
+    if customer_id:
+        _check_customer_account(customer_id, session)
+
+    campaign = Campaign(
+        customer_id=customer_id,
+        campaign_type=data.get('campaign_type', 'DEMAND_GEN'),
+        budget_group=data.get('budget_group') or None,
+        start_date=_parse_date(data.get('start_date')),
+        end_date=_parse_date(data.get('end_date')),
+        status='DRAFT',
+        **{field: data.get(field) for field in CAMPAIGN_FIELDS}
+    )
+    session.add(campaign)
+    return campaign
+
+
+def update_campaign(campaign_id, data, session=None):
+    """Apply an update request to a live draft."""
+    session = session or db.session
+    campaign = _live_campaign(campaign_id, session)
+
+    if campaign.archived_at:
+        raise CampaignActionError({'error': 'Cannot update an archived campaign. Restore it first.'})
+
+    # Don't allow updating published campaigns
+    if campaign.status == 'PUBLISHED':
+        raise CampaignActionError({'error': 'Cannot update published campaign. Create a new one instead.'})
+
+    validation_errors = Campaign.validate_campaign_data(data)
+    if validation_errors:
+        raise _validation_error(validation_errors)
+
+    if 'customer_id' in data:
+        customer_id = CustomerAccount.normalize_id(data['customer_id'])
+        if customer_id:
+            _check_customer_account(customer_id, session)
+        campaign.customer_id = customer_id
+    for field in CAMPAIGN_FIELDS + ('campaign_type',):
+        if field in data:
+            setattr(campaign, field, data[field])
+    if 'budget_group' in data:
+        campaign.budget_group = data['budget_group'] or None
+    if 'start_date' in data:
+        campaign.start_date = _parse_date(data['start_date'])
+    if 'end_date' in data:
+        campaign.end_date = _parse_date(data['end_date'])
+        campaign.restored_at = None  # A new end date is auto-archived again
+
+    campaign.updated_at = datetime.utcnow()
+    return campaign
+
+
+def delete_campaign(campaign_id, session=None):
+    """Delete a live campaign."""
+    session = session or db.session
+    campaign = _live_campaign(campaign_id, session)
+
+    # Warn if deleting published campaign
+    if campaign.status == 'PUBLISHED':
+        logger.warning("Deleting published campaign: %s", campaign.id)
+
+    session.delete(campaign)
+
+
+def archive_campaign(campaign_id, session=None):
+    """Hide a campaign from lists until the archiver moves it."""
+    session = session or db.session
+    campaign = _live_campaign(campaign_id, session)
+
+    if campaign.status == 'PUBLISHED':
+        raise CampaignActionError({'error': 'Cannot archive a published campaign. Disable it first.'})
+
+    if not campaign.archived_at:
+        campaign.archived_at = datetime.utcnow()
+    return campaign
+
+
+def clone_campaign(campaign_id, data, session=None):
+    """
+    Insert draft variants of a campaign (see cloning.py).
+
+    Returns:
+        tuple: (list of clones, True if they are queued for publishing)
+    """
+    session = session or db.session
+    campaign = _live_campaign(campaign_id, session)
+
+    if campaign.archived_at:
+        raise CampaignActionError({'error': 'Cannot clone an archived campaign. Restore it first.'})
+
+    publish = bool(data.get('publish'))
+    overrides, validation_errors = expand_variants(data)
+    if not validation_errors:
+        clones, validation_errors = build_clones(campaign, overrides, date.today(), publish)
+    if validation_errors:
+        raise _validation_error(validation_errors)
+
+    for customer_id in clone_customer_ids(clones):
+        _check_customer_account(customer_id, session)
+
+    session.execute(clone_insert(clones))
+    record_clones(clones, session.connection())
+    return clones, publish
+
+
+def prepare_publish(campaign_id, session=None):
+    """
+    Check a campaign can be published and build its Google Ads data.
+
+    Returns:
+        tuple: (customer_id, campaign data for publish_campaign)
+    """
+    session = session or db.session
+    campaign = _live_campaign(campaign_id, session)
+
+    if campaign.archived_at:
+        raise CampaignActionError({'error': 'Cannot publish an archived campaign'})
+
+    if campaign.status == 'PUBLISHED':
+        raise CampaignActionError({
+            'error': 'Campaign is already published',
+            'google_campaign_id': campaign.google_campaign_id
+        })
+
+    check_google_ads_config()
+
+    campaign_data = campaign.to_google_ads_data(session=session)
+
+    # Catch drafts Google Ads would reject before making any remote call
+    validation_errors = Campaign.validate_publish_data(campaign_data, date.today())
+    if validation_errors:
+        raise _validation_error(validation_errors)
+
+    return campaign.customer_id, campaign_data
+
+
+def record_publish(campaign_id, customer_id, campaign_data, result, session=None):
+    """Store the outcome of a successful publish_campaign call."""
+    session = session or db.session
+    campaign = session.get(Campaign, campaign_id)
+    if campaign:
+        campaign.google_campaign_id = result['campaign_id']
+        campaign.status = 'PUBLISHED'
+        campaign.updated_at = datetime.utcnow()
+    SharedBudget.remember(
+        customer_id,
+        campaign_data['budget_group'],
+        campaign_data['daily_budget'],
+        result.get('budget_resource_name'),
+        session=session
+    )
+
+
+def prepare_disable(campaign_id, session=None):
+    """
+    Check a campaign can be paused in Google Ads.
+
+    Returns:
+        tuple: (customer_id, google_campaign_id)
+    """
+    session = session or db.session
+    campaign = _live_campaign(campaign_id, session)
+
+    if campaign.status != 'PUBLISHED' or not campaign.google_campaign_id:
+        raise CampaignActionError({'error': 'Campaign is not published to Google Ads'})
+
+    check_google_ads_config()
+    return campaign.customer_id, campaign.google_campaign_id
+
+
+def record_disable(campaign_id, session=None):
+    """Mark a campaign paused after disable_campaign succeeded."""
+    session = session or db.session
+    campaign = session.get(Campaign, campaign_id)
+    if campaign:
+        campaign.status = 'PAUSED'
+        campaign.updated_at = datetime.utcnow()
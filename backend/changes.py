@@ -0,0 +1,442 @@
+"""
+Campaign change feed.
+Every campaign insert, update and delete appends a compact delta to the
+campaign_changes log in the same transaction. A single poller thread per
+process reads new log rows and fans them out to Server-Sent Events
+subscribers, so open browser tabs apply deltas instead of refetching the list.
+
+Old log rows are pruned by the scheduler tick (prune_changes), whether or
+not anyone is subscribed.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, func, inspect, select, text
+from models import db, Campaign, CampaignChange
+from config import Config
+import asyncio
+import json
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Serializes change-log writers on PostgreSQL so cursors commit in order
+CHANGE_LOG_LOCK_ID = 726030
+
+# Deltas buffered for one subscriber before it is told to resync
+MAX_PENDING_DELTAS = 1000
+
+# Columns whose changes are not worth a delta on their own
+IGNORED_FIELDS = {'updated_at'}
+
+
+def _lock_change_log(connection):
+    """
+    Make change-log ids commit in increasing order.
+
+    Without this, a transaction that takes id 11 could commit before one
+    holding id 10, and a reader at cursor 11 would never see 10.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': CHANGE_LOG_LOCK_ID})
+
+
+def _append_changes(connection, changes):
+    """Insert change rows on `connection`."""
+    if not changes:
+        return
+    _lock_change_log(connection)
+    now = datetime.utcnow()
+    for change in changes:
+        change['created_at'] = now
+    connection.execute(CampaignChange.__table__.insert(), changes)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _log_campaign_changes(session, flush_context):
+    """Record ORM inserts, updates and deletes of campaigns."""
+    changes = []
+
+    for campaign in session.new:
+        if isinstance(campaign, Campaign):
+            changes.append({
+                'campaign_id': campaign.id,
+                'action': 'create',
+                'payload': campaign.to_dict(),
+            })
+
+    for campaign in session.dirty:
+        if not isinstance(campaign, Campaign):
+            continue
+        state = inspect(campaign)
+        changed = [
+            attr.key for attr in state.attrs
+            if attr.key not in IGNORED_FIELDS and attr.history.has_changes()
+        ]
+        if not changed:
+            continue
+        full = campaign.to_dict()
+        if 'archived_at' not in changed:
+            full = {key: full[key] for key in changed + ['updated_at'] if key in full}
+        # Archive/restore sends the whole row: restored campaigns re-enter lists
+        changes.append({
+            'campaign_id': campaign.id,
+            'action': 'update',
+            'payload': full,
+        })
+
+    for campaign in session.deleted:
+        if isinstance(campaign, Campaign):
+            changes.append({
+                'campaign_id': campaign.id,
+                'action': 'delete',
+                'payload': None,
+            })
+
+    _append_changes(session.connection(), changes)
+
+
+def record_bulk_changes(campaign_ids, values):
+    """
+    Log an 'update' delta for a bulk UPDATE, which bypasses the ORM flush
+    events. Call in the same transaction as the UPDATE.
+
+    Args:
+        campaign_ids (list): Campaigns that were updated
+        values (dict): Column values that were set
+    """
+    payload = {
+        key: value.isoformat() if hasattr(value, 'isoformat') else value
+        for key, value in values.items()
+    }
+    _append_changes(db.session.connection(), [
+        {'campaign_id': campaign_id, 'action': 'update', 'payload': payload}
+        for campaign_id in campaign_ids
+    ])
+
+
+def record_row_changes(values_by_id, connection=None):
+    """
+    Log an 'update' delta per campaign for a bulk UPDATE that set different
+    values on each row. Call in the same transaction as the UPDATE.
+
+    Args:
+        values_by_id (dict): Campaign id -> column values set on that row
+        connection: Connection of the transaction (defaults to db.session's)
+    """
+    _append_changes(connection or db.session.connection(), [
+        {
+            'campaign_id': campaign_id,
+            'action': 'update',
+            'payload': {
+                key: value.isoformat() if hasattr(value, 'isoformat') else value
+                for key, value in values.items()
+            },
+        }
+        for campaign_id, values in values_by_id.items()
+    ])
+
+
+def record_creates(campaigns, connection=None):
+    """
+    Log a 'create' delta per campaign for a bulk INSERT. Call in the same
+    transaction as the INSERT.
+
+    Args:
+        campaigns (list): Inserted campaigns (unsaved Campaign objects)
+        connection: Connection of the transaction (defaults to db.session's)
+    """
+    _append_changes(connection or db.session.connection(), [
+        {'campaign_id': campaign.id, 'action': 'create', 'payload': campaign.to_dict()}
+        for campaign in campaigns
+    ])
+
+
+LATEST_CURSOR_QUERY = select(func.coalesce(func.max(CampaignChange.id), 0))
+OLDEST_CURSOR_QUERY = select(func.min(CampaignChange.id))
+
+
+def _changes_since_query(cursor, limit):
+    return select(CampaignChange).where(
+        CampaignChange.id > cursor
+    ).order_by(CampaignChange.id).limit(limit)
+
+
+def prune_changes(now=None, retention_hours=None):
+    """
+    Drop change-log rows older than the retention window.
+
+    Args:
+        now (datetime): Current time (UTC)
+        retention_hours (int): Defaults to CHANGE_LOG_RETENTION_HOURS
+
+    Returns:
+        int: Number of rows deleted
+    """
+    retention = timedelta(hours=retention_hours or Config.CHANGE_LOG_RETENTION_HOURS)
+    before = (now or datetime.utcnow()) - retention
+    deleted = db.session.execute(delete(CampaignChange).where(CampaignChange.created_at < before)).rowcount
+    db.session.commit()
+    if deleted:
+        logger.info("Pruned %s change-log rows", deleted)
+    return deleted
+
+
+def latest_cursor():
+    """Cursor of the newest logged change (0 if the log is empty)."""
+    return db.session.execute(LATEST_CURSOR_QUERY).scalar()
+
+
+def changes_since(cursor, limit=500):
+    """Changes after `cursor`, oldest first."""
+    return db.session.scalars(_changes_since_query(cursor, limit)).all()
+
+
+def cursor_expired(cursor):
+    """True if changes after `cursor` have already been pruned."""
+    oldest = db.session.execute(OLDEST_CURSOR_QUERY).scalar()
+    return oldest is not None and cursor < oldest - 1
+
+
+async def latest_cursor_async(session):
+    """latest_cursor() on an AsyncSession."""
+    return (await session.execute(LATEST_CURSOR_QUERY)).scalar()
+
+
+async def changes_since_async(session, cursor, limit=500):
+    """changes_since() on an AsyncSession."""
+    return (await session.scalars(_changes_since_query(cursor, limit))).all()
+
+
+async def cursor_expired_async(session, cursor):
+    """cursor_expired() on an AsyncSession."""
+    oldest = (await session.execute(OLDEST_CURSOR_QUERY)).scalar()
+    return oldest is not None and cursor < oldest - 1
+
+
+class ChangeFeed:
+    """
+    Polls the change log once per process and fans deltas out to subscribers.
+
+    Each subscriber registers with the latest cursor it read before
+    subscribing; the poller never reads from past the lowest of those, so no
+    change falls between a stream's catch-up and the first poll.
+    """
+
+    def __init__(self, app, poll_seconds=None):
+        self.app = app
+        self.poll_seconds = poll_seconds or Config.CHANGE_FEED_POLL_SECONDS
+        self._subscribers = set()
+        self._cursor = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, cursor):
+        """
+        Register a subscriber and return its queue of delta dicts.
+
+        Args:
+            cursor (int): latest_cursor() read before subscribing; every
+                          change after it is delivered
+        """
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.add(subscriber)
+            self._cursor = cursor if self._cursor is None else min(self._cursor, cursor)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        self._cursor = None
+                        return
+                    cursor = self._cursor
+
+                try:
+                    rows = changes_since(cursor)
+                except Exception as e:
+                    logger.error("Change feed poll failed: %s", e)
+                    rows = []
+                finally:
+                    db.session.remove()
+
+                # Snapshot after reading, so subscribers that joined meanwhile get these rows too
+                with self._lock:
+                    subscribers = list(self._subscribers)
+                    if rows and self._cursor == cursor:  # Not lowered by a new subscriber
+                        self._cursor = rows[-1].id
+
+                for row in rows:
+                    delta = row.to_dict()
+                    for subscriber in subscribers:
+                        if subscriber.qsize() >= MAX_PENDING_DELTAS:
+                            # Slow client: tell it to resync instead of buffering forever
+                            self.unsubscribe(subscriber)
+                            subscriber.put(None)
+                            continue
+                        subscriber.put(delta)
+
+                if len(rows) < 500:
+                    time.sleep(self.poll_seconds)
+
+
+class AsyncChangeFeed:
+    """ChangeFeed for the ASGI app: one polling task per process, asyncio queues."""
+
+    def __init__(self, session_factory, poll_seconds=None):
+        """
+        Args:
+            session_factory (callable): Returns a new AsyncSession
+        """
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds or Config.CHANGE_FEED_POLL_SECONDS
+        self._subscribers = set()
+        self._cursor = None
+        self._task = None
+
+    def subscribe(self, cursor):
+        """Register a subscriber and return its asyncio queue of delta dicts (see ChangeFeed.subscribe)."""
+        subscriber = asyncio.Queue()
+        self._subscribers.add(subscriber)
+        self._cursor = cursor if self._cursor is None else min(self._cursor, cursor)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def _run(self):
+        while self._subscribers:
+            cursor = self._cursor
+            try:
+                async with self.session_factory() as session:
+                    rows = await changes_since_async(session, cursor)
+            except Exception as e:
+                logger.error("Change feed poll failed: %s", e)
+                rows = []
+
+            if rows and self._cursor == cursor:  # Not lowered by a new subscriber
+                self._cursor = rows[-1].id
+            for row in rows:
+                delta = row.to_dict()
+                for subscriber in list(self._subscribers):
+                    if subscriber.qsize() >= MAX_PENDING_DELTAS:
+                        # Slow client: tell it to resync instead of buffering forever
+                        self.unsubscribe(subscriber)
+                        subscriber.put_nowait(None)
+                        continue
+                    subscriber.put_nowait(delta)
+
+            if len(rows) < 500:
+                await asyncio.sleep(self.poll_seconds)
+        self._cursor = None
+
+
+def format_event(delta, event_name='change'):
+    """Format a delta as a Server-Sent Events message."""
+    event_id = f"id: {delta['cursor']}\n" if 'cursor' in delta else ''
+    return f"{event_id}event: {event_name}\ndata: {json.dumps(delta, separators=(',', ':'))}\n\n"
+
+
+def stream_changes(feed, since=None):
+    """
+    Generate SSE messages for the change feed.
+
+    With `since`, every change after that cursor is replayed first; if those
+    changes were already pruned a `reset` event tells the client to refetch
+    the list. Without it, only changes from now on are sent.
+    """
+    start = latest_cursor()
+    subscriber = feed.subscribe(start)
+    try:
+        if since is None:
+            cursor = start
+        else:
+            cursor = since
+            if cursor_expired(cursor):
+                cursor = latest_cursor()
+                yield format_event({'cursor': cursor}, 'reset')
+            while True:
+                rows = changes_since(cursor)
+                for row in rows:
+                    yield format_event(row.to_dict())
+                    cursor = row.id
+                if len(rows) < 500:
+                    break
+        # Don't hold a pooled connection for the lifetime of the stream
+        db.session.remove()
+
+        yield format_event({'cursor': cursor}, 'ready')
+
+        while True:
+            try:
+                delta = subscriber.get(timeout=Config.CHANGE_FEED_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            if delta is None:
+                yield format_event({'cursor': cursor}, 'reset')
+                return
+            if delta['cursor'] <= cursor:
+                continue  # Already sent during catch-up
+            cursor = delta['cursor']
+            yield format_event(delta)
+    finally:
+        feed.unsubscribe(subscriber)
+
+
+async def stream_changes_async(feed, since=None):
+    """stream_changes() for the ASGI app, fed by an AsyncChangeFeed."""
+    async with feed.session_factory() as session:
+        start = await latest_cursor_async(session)
+    subscriber = feed.subscribe(start)
+    try:
+        # Keep the session (and its connection) only for the catch-up phase
+        async with feed.session_factory() as session:
+            if since is None:
+                cursor = start
+            else:
+                cursor = since
+                if await cursor_expired_async(session, cursor):
+                    cursor = await latest_cursor_async(session)
+                    yield format_event({'cursor': cursor}, 'reset')
+                while True:
+                    rows = await changes_since_async(session, cursor)
+                    for row in rows:
+                        yield format_event(row.to_dict())
+                        cursor = row.id
+                    if len(rows) < 500:
+                        break
+
+        yield format_event({'cursor': cursor}, 'ready')
+
+        while True:
+            try:
+                delta = await asyncio.wait_for(
+                    subscriber.get(), timeout=Config.CHANGE_FEED_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if delta is None:
+                yield format_event({'cursor': cursor}, 'reset')
+                return
+            if delta['cursor'] <= cursor:
+                continue  # Already sent during catch-up
+            cursor = delta['cursor']
+            yield format_event(delta)
+    finally:
+        feed.unsubscribe(subscriber)
@@ -0,0 +1,155 @@
+"""
+Bulk campaign cloning.
+Expands a request for variants of one campaign (a list of field overrides,
+a Cartesian product of override values, or both) into draft campaigns and
+inserts them with a single multi-row INSERT. Change-log deltas and summary
+rollup counts are written in the same transaction, since a Core INSERT
+bypasses the ORM flush hooks.
+
+Clones can be queued for publishing: their start_date is moved to today if
+it is missing or past, so the scheduler's next tick publishes them in one
+fanned-out batch.
+"""
+
+from datetime import datetime
+from itertools import product
+from math import prod
+from sqlalchemy import insert
+from models import Campaign, CustomerAccount, uuid7
+from summary import record_bulk_inserts
+from changes import record_creates
+from config import Config
+
+# Fields a variant may override; everything else is copied from the source
+CLONE_FIELDS = (
+    'customer_id', 'name', 'objective', 'campaign_type', 'daily_budget', 'budget_group',
+    'start_date', 'end_date', 'ad_group_name', 'ad_headline', 'ad_description', 'asset_url',
+)
+
+
+def expand_variants(data):
+    """
+    Turn a clone request body into one override dict per clone.
+
+    Args:
+        data (dict): {"variants": [{field: value}, ...],
+                      "matrix": {field: [value, ...]}}. With both, every
+                     variant is combined with every matrix combination.
+
+    Returns:
+        tuple: (list of override dicts, list of error messages)
+    """
+    variants = data.get('variants')
+    matrix = data.get('matrix')
+    if variants is None and matrix is None:
+        return [], ['Provide variants (a list of overrides) and/or matrix (values per field)']
+    if variants is not None and (not isinstance(variants, list) or
+                                 not all(isinstance(variant, dict) for variant in variants)):
+        return [], ['variants must be a list of objects']
+    if matrix is not None and (not isinstance(matrix, dict) or
+                               not all(isinstance(values, list) and values for values in matrix.values())):
+        return [], ['matrix must map fields to non-empty lists of values']
+
+    # Size the product before building it, so oversized matrices are rejected cheaply
+    requested = len(variants or [{}]) * prod(len(values) for values in (matrix or {}).values())
+    if not requested:
+        return [], ['No variants requested']
+    if requested > Config.CLONE_MAX_VARIANTS:
+        return [], [f'At most {Config.CLONE_MAX_VARIANTS} clones per request ({requested} requested)']
+
+    fields = set(matrix or ()).union(*(variants or [{}]))
+    unknown = sorted(fields - set(CLONE_FIELDS))
+    if unknown:
+        return [], [f"Fields cannot be overridden: {', '.join(unknown)}"]
+
+    combinations = [dict(zip(matrix, values)) for values in product(*matrix.values())] if matrix else [{}]
+    return [{**variant, **combination} for variant in (variants or [{}]) for combination in combinations], []
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).date() if value else None
+
+
+def build_clones(source, overrides, today, publish=False):
+    """
+    Build unsaved draft campaigns from a source campaign and its overrides.
+
+    Clones without a name override are named "<source name> #<n>".
+
+    Args:
+        source (Campaign): Campaign to copy
+        overrides (list): Override dicts from expand_variants
+        today (date): Start date given to clones queued for publishing
+        publish (bool): Queue the clones for the scheduler's next publish batch
+
+    Returns:
+        tuple: (list of Campaign, list of error messages prefixed with the variant number)
+    """
+    base = source.to_dict()
+    now = datetime.utcnow()
+    clones = []
+    errors = []
+    for number, override in enumerate(overrides, start=1):
+        data = {field: base[field] for field in CLONE_FIELDS}
+        data['name'] = f'{source.name} #{number}'
+        data.update(override)
+
+        variant_errors = Campaign.validate_campaign_data(data)
+        if not variant_errors:
+            try:
+                start_date, end_date = _parse_date(data['start_date']), _parse_date(data['end_date'])
+            except (ValueError, AttributeError):
+                variant_errors.append('Invalid date format')
+        if not variant_errors:
+            clone = Campaign(
+                id=str(uuid7()),
+                customer_id=CustomerAccount.normalize_id(data['customer_id']),
+                name=data['name'],
+                objective=data['objective'],
+                campaign_type=data['campaign_type'] or 'DEMAND_GEN',
+                daily_budget=int(data['daily_budget']) if data['daily_budget'] is not None else None,
+                budget_group=data['budget_group'] or None,
+                start_date=start_date,
+                end_date=end_date,
+                ad_group_name=data['ad_group_name'],
+                ad_headline=data['ad_headline'],
+                ad_description=data['ad_description'],
+                asset_url=data['asset_url'],
+                status='DRAFT',
+                created_at=now,
+                updated_at=now,
+            )
+            if publish:
+                if clone.start_date is None or clone.start_date < today:
+                    clone.start_date = today
+                # Catch what the scheduler would skip on every tick
+                variant_errors = Campaign.validate_publish_data(clone.build_google_ads_data(None), today)
+            clones.append(clone)
+        errors.extend(f'Variant {number}: {error}' for error in variant_errors)
+    return clones, errors
+
+
+def clone_customer_ids(clones):
+    """Client accounts the clones target (to check they are active)."""
+    return sorted({clone.customer_id for clone in clones if clone.customer_id})
+
+
+def clone_insert(clones):
+    """One multi-row INSERT for all clones."""
+    columns = [column.key for column in Campaign.__table__.columns]
+    return insert(Campaign.__table__).values([
+        {column: getattr(clone, column) for column in columns} for clone in clones
+    ])
+
+
+def record_clones(clones, connection=None):
+    """
+    Log 'create' deltas and add the clones to the summary rollup. Call in
+    the same transaction as clone_insert.
+
+    Args:
+        clones (list): Inserted campaigns
+        connection: Connection of the transaction (defaults to db.session's)
+    """
+    record_bulk_inserts(clones, connection)
+    record_creates(clones, connection)
@@ -0,0 +1,154 @@
+"""
+Response compression.
+Negotiates zstd, brotli or gzip from Accept-Encoding for API responses above
+a size threshold, and caches the encoded bytes of hot responses by table
+version so repeated loads skip both serialization and compression.
+
+brotli (`pip install brotli`) and zstd (`pip install zstandard`) are optional;
+gzip is always available.
+"""
+
+from flask import request
+from config import Config
+import gzip
+import threading
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/csv'}
+
+
+def available_encodings():
+    """Supported content codings, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def negotiate_encoding(accept_encodings=None):
+    """
+    Best content coding accepted by the request, or None.
+
+    Args:
+        accept_encodings: Parsed Accept-Encoding header; defaults to the
+                          current Flask request's
+    """
+    if not Config.COMPRESSION_ENABLED:
+        return None
+    if accept_encodings is None:
+        accept_encodings = request.accept_encodings
+    return accept_encodings.best_match(available_encodings())
+
+
+def compress(data, encoding):
+    """Compress `data` (bytes) with the given content coding."""
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=Config.COMPRESSION_LEVEL).compress(data)
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(Config.COMPRESSION_LEVEL, 11))
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=min(Config.COMPRESSION_LEVEL, 9))
+    return data
+
+
+def compressible(response):
+    """True if a buffered response is worth compressing."""
+    return (
+        response.status_code == 200
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+        and response.content_length is not None
+        and response.content_length >= Config.COMPRESSION_MIN_SIZE
+    )
+
+
+def compress_response(response):
+    """after_request hook: compress large, uncompressed API responses."""
+    response.vary.add('Accept-Encoding')
+
+    if response.direct_passthrough or response.is_streamed or not compressible(response):
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    """Register response compression on the app."""
+    if Config.COMPRESSION_ENABLED:
+        app.after_request(compress_response)
+        logger.info("Response compression enabled (%s)", ', '.join(available_encodings()))
+
+
+class CompressedResponseCache:
+    """
+    Caches one serialized response body per version, plus its encoded forms.
+
+    Only the latest version is kept: when the version changes, the next
+    request rebuilds the body and the old bytes are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._bodies = {}
+
+    def peek(self, version, encoding):
+        """Cached (body, content coding) for `version`, or None if not built yet."""
+        with self._lock:
+            if self._version != version:
+                return None
+            return self._bodies.get(encoding)
+
+    def get(self, version, encoding, build):
+        """
+        Return the response body for `version`, encoded if worthwhile.
+
+        Args:
+            version: Table version the body reflects (e.g. change-log cursor)
+            encoding (str): Negotiated content coding, or None for identity
+            build (callable): Returns the uncompressed body as bytes
+
+        Returns:
+            tuple: (body bytes, content coding applied or None)
+        """
+        with self._lock:
+            if self._version != version:
+                self._version = version
+                self._bodies = {}
+            cached = self._bodies.get(encoding)
+            identity = self._bodies.get(None)
+        if cached is not None:
+            return cached
+
+        identity_body = identity[0] if identity else build()
+        if encoding is not None and len(identity_body) >= Config.COMPRESSION_MIN_SIZE:
+            cached = (compress(identity_body, encoding), encoding)
+        else:
+            cached = (identity_body, None)
+
+        with self._lock:
+            if self._version == version:
+                self._bodies[None] = (identity_body, None)
+                self._bodies[encoding] = cached
+        return cached
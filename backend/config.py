@@ -25,7 +25,12 @@ class Config:
     )
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ECHO = DEBUG
+    SQLALCHEMY_ECHO = False  # SQL statements are logged through the log queue when LOG_SQL=true
+    
+    # Async (ASGI) app: defaults to DATABASE_URL with the asyncpg/aiosqlite driver
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', '')
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '20'))
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv('ASYNC_DB_MAX_OVERFLOW', '20'))
     
     # CORS Configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
@@ -38,6 +43,75 @@ class Config:
     GOOGLE_ADS_LOGIN_CUSTOMER_ID = os.getenv('GOOGLE_ADS_LOGIN_CUSTOMER_ID', '')
     GOOGLE_ADS_CUSTOMER_ID = os.getenv('GOOGLE_ADS_CUSTOMER_ID', '')
     
+    # OAuth Token Cache Configuration (access token shared by all workers on the host)
+    OAUTH_TOKEN_URI = os.getenv('OAUTH_TOKEN_URI', 'https://accounts.google.com/o/oauth2/token')
+    OAUTH_TOKEN_CACHE_PATH = os.getenv(
+        'OAUTH_TOKEN_CACHE_PATH',
+        os.path.join(
+            os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+            'google-ads-campaign-manager',
+            'token_cache.json'
+        )
+    )
+    OAUTH_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv('OAUTH_TOKEN_REFRESH_MARGIN_SECONDS', '300'))
+    
+    # Scheduler Configuration
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true'
+    SCHEDULER_INTERVAL_SECONDS = int(os.getenv('SCHEDULER_INTERVAL_SECONDS', '60'))
+    SCHEDULER_BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', '50'))
+    SCHEDULER_MAX_WORKERS = int(os.getenv('SCHEDULER_MAX_WORKERS', '4'))
+    SCHEDULER_LOCK_ID = int(os.getenv('SCHEDULER_LOCK_ID', '726001'))
+    
+    # Multi-account Configuration
+    ACCOUNT_MAX_CONCURRENCY = int(os.getenv('ACCOUNT_MAX_CONCURRENCY', '2'))
+    ACCOUNT_DAILY_OPERATION_LIMIT = int(os.getenv('ACCOUNT_DAILY_OPERATION_LIMIT', '0'))  # 0 = unlimited
+    
+    # Compression Configuration
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # Bytes
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+    
+    # Change Feed Configuration
+    CHANGE_FEED_POLL_SECONDS = float(os.getenv('CHANGE_FEED_POLL_SECONDS', '1'))
+    CHANGE_FEED_HEARTBEAT_SECONDS = int(os.getenv('CHANGE_FEED_HEARTBEAT_SECONDS', '15'))
+    CHANGE_LOG_RETENTION_HOURS = int(os.getenv('CHANGE_LOG_RETENTION_HOURS', '24'))
+    
+    # Search Configuration
+    SEARCH_CANDIDATE_LIMIT = int(os.getenv('SEARCH_CANDIDATE_LIMIT', '1000'))  # Matches ranked per query
+    
+    # Remote Status Refresh Configuration
+    STATUS_REFRESH_TTL_SECONDS = int(os.getenv('STATUS_REFRESH_TTL_SECONDS', '300'))
+    STATUS_REFRESH_CHUNK_SIZE = int(os.getenv('STATUS_REFRESH_CHUNK_SIZE', '1000'))  # Ids per GAQL IN-list
+    
+    # Logging Configuration
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # Records beyond this are dropped, never blocking
+    LOG_INFO_SAMPLE_RATE = float(os.getenv('LOG_INFO_SAMPLE_RATE', '1.0'))  # Share of requests logged at INFO
+    LOG_SLOW_REQUEST_MS = float(os.getenv('LOG_SLOW_REQUEST_MS', '1000'))  # Always logged, as warnings
+    LOG_SQL = os.getenv('LOG_SQL', 'false').lower() == 'true'
+    
+    # Health Check Configuration (background prober behind /api/health/ready)
+    HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv('HEALTH_PROBE_INTERVAL_SECONDS', '5'))  # Database, log queue
+    HEALTH_GOOGLE_ADS_PROBE_INTERVAL_SECONDS = float(os.getenv('HEALTH_GOOGLE_ADS_PROBE_INTERVAL_SECONDS', '30'))
+    HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '2'))
+    HEALTH_FAILURE_THRESHOLD = int(os.getenv('HEALTH_FAILURE_THRESHOLD', '3'))  # Consecutive failures to fail
+    HEALTH_RECOVERY_THRESHOLD = int(os.getenv('HEALTH_RECOVERY_THRESHOLD', '2'))  # Consecutive successes to recover
+    HEALTH_CRITICAL_CHECKS = os.getenv('HEALTH_CRITICAL_CHECKS', 'database,log_queue').split(',')
+    HEALTH_GOOGLE_ADS_ENDPOINT = os.getenv('HEALTH_GOOGLE_ADS_ENDPOINT', 'googleads.googleapis.com:443')
+    HEALTH_MAX_QUEUE_FILL = float(os.getenv('HEALTH_MAX_QUEUE_FILL', '0.8'))  # Share of LOG_QUEUE_SIZE
+    
+    # Publish Validation Configuration
+    MIN_DAILY_BUDGET_MICROS = int(os.getenv('MIN_DAILY_BUDGET_MICROS', '10000'))  # One cent
+    VALIDATION_BATCH_SIZE = int(os.getenv('VALIDATION_BATCH_SIZE', '1000'))  # Campaigns per validate_only request
+    
+    # Bulk Clone Configuration
+    CLONE_MAX_VARIANTS = int(os.getenv('CLONE_MAX_VARIANTS', '500'))  # Clones per request (one INSERT)
+    
+    # Archive Configuration
+    ARCHIVE_RETENTION_DAYS = int(os.getenv('ARCHIVE_RETENTION_DAYS', '90'))  # Days after end_date
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    
     @staticmethod
     def validate_google_ads_config():
         """Validate that all required Google Ads credentials are present."""
@@ -60,13 +134,18 @@ class Config:
         return True, []
     
     @staticmethod
-    def get_google_ads_config():
-        """Get Google Ads configuration as a dictionary."""
+    def get_google_ads_config(customer_id=None):
+        """
+        Get Google Ads configuration as a dictionary.
+        
+        Args:
+            customer_id (str): Client account to target instead of GOOGLE_ADS_CUSTOMER_ID
+        """
         return {
             'developer_token': Config.GOOGLE_ADS_DEVELOPER_TOKEN,
             'client_id': Config.GOOGLE_ADS_CLIENT_ID,
             'client_secret': Config.GOOGLE_ADS_CLIENT_SECRET,
             'refresh_token': Config.GOOGLE_ADS_REFRESH_TOKEN,
             'login_customer_id': Config.GOOGLE_ADS_LOGIN_CUSTOMER_ID,
-            'customer_id': Config.GOOGLE_ADS_CUSTOMER_ID,
+            'customer_id': customer_id or Config.GOOGLE_ADS_CUSTOMER_ID,
         }
@@ -0,0 +1,437 @@
+"""
+Google Ads API service layer for the ASGI app.
+Sends the same operations as GoogleAdsService over a shared gRPC asyncio
+channel, so a publish waiting on Google Ads does not hold a thread and one
+process can keep thousands of calls in flight.
+
+The google-ads library only ships blocking transports, so requests are
+built with its proto-plus types and sent with grpc.aio directly, using the
+same OAuth credentials and developer-token / login-customer-id headers.
+"""
+
+from datetime import date
+from google.auth.transport.grpc import AuthMetadataPlugin
+from google.auth.transport.requests import Request
+from google_ads_service import GoogleAdsService
+from accounts import AccountPool, refund_statement, usage_query
+from logging_setup import log_step
+from config import Config
+import async_db
+import asyncio
+import grpc
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = 'googleads.googleapis.com:443'
+
+# Seconds before a single mutate is abandoned
+RPC_TIMEOUT_SECONDS = 60
+
+
+def create_channel(client):
+    """
+    Open a gRPC asyncio channel authenticated with the client's credentials.
+
+    Token refreshes run on gRPC's metadata plugin thread, not on the event loop.
+    """
+    call_credentials = grpc.metadata_call_credentials(AuthMetadataPlugin(client.credentials, Request()))
+    channel_credentials = grpc.composite_channel_credentials(grpc.ssl_channel_credentials(), call_credentials)
+    return grpc.aio.secure_channel(
+        client.endpoint or DEFAULT_ENDPOINT,
+        channel_credentials,
+        options=[
+            ('grpc.max_metadata_size', 16 * 1024 * 1024),
+            ('grpc.max_receive_message_length', 64 * 1024 * 1024),
+        ]
+    )
+
+
+class AsyncGoogleAdsService(GoogleAdsService):
+    """
+    GoogleAdsService whose API calls are coroutines.
+
+    Operations are built by the inherited _build_* methods; only sending
+    them differs.
+    """
+
+    def __init__(self, credentials, client, channel):
+        """
+        Args:
+            credentials (dict): Google Ads credentials for one client account
+            client (GoogleAdsClient): Initialized client (types, enums, credentials)
+            channel (grpc.aio.Channel): Shared asyncio channel
+        """
+        super().__init__(credentials, client=client)
+        self.channel = channel
+        self.version = None
+        self._shared_budget_tasks = {}
+        self._rpcs = {}
+        self._metadata = [('developer-token', client.developer_token)]
+        if client.login_customer_id:
+            self._metadata.append(('login-customer-id', str(client.login_customer_id)))
+
+    def _rpc(self, service_name, method_name, message_name=None, streaming=False):
+        """
+        Callable for a Google Ads RPC on the shared channel, created once per
+        method and reused.
+
+        Args:
+            message_name (str): Request/response type prefix, if it differs
+                                from the method name
+
+        Returns:
+            tuple: (multicallable, request message class)
+        """
+        key = (service_name, method_name, streaming)
+        if key in self._rpcs:
+            return self._rpcs[key]
+
+        message_name = message_name or method_name
+        request_class = self.templates.message_class(f"{message_name}Request")
+        response_class = self.templates.message_class(f"{message_name}Response")
+        if self.version is None:
+            # e.g. google.ads.googleads.v17.services.types.campaign_service
+            self.version = self.client.version or request_class.__module__.split('.')[3]
+
+        make_rpc = self.channel.unary_stream if streaming else self.channel.unary_unary
+        rpc = make_rpc(
+            f"/google.ads.googleads.{self.version}.services.{service_name}/{method_name}",
+            request_serializer=request_class.serialize,
+            response_deserializer=response_class.deserialize
+        )
+        self._rpcs[key] = (rpc, request_class)
+        return self._rpcs[key]
+
+    async def _mutate(self, service_name, method_name, operations):
+        """
+        Send a mutate request.
+
+        Args:
+            service_name (str): e.g. "CampaignService"
+            method_name (str): e.g. "MutateCampaigns"
+            operations (list): Operations built by the _build_* methods
+
+        Returns:
+            The proto-plus mutate response
+        """
+        rpc, request_class = self._rpc(service_name, method_name)
+        request = request_class(customer_id=self.customer_id, operations=operations)
+        return await rpc(request, metadata=self._metadata, timeout=RPC_TIMEOUT_SECONDS)
+
+    def _rpc_failure(self, ex):
+        """GoogleAdsFailure attached to a failed gRPC call, or None."""
+        failure_key = f"google.ads.googleads.{self.version}.errors.googleadsfailure-bin"
+        for key, value in ex.trailing_metadata() or ():
+            if key == failure_key:
+                return self.templates.message_class("GoogleAdsFailure").deserialize(value)
+        return None
+
+    def _parse_rpc_error(self, ex):
+        """Extract Google Ads error messages from a failed gRPC call."""
+        failure = self._rpc_failure(ex)
+        messages = [error.message for error in failure.errors] if failure else []
+        if messages:
+            return " | ".join(messages)
+        return f"{ex.code().name}: {ex.details()}"
+
+    async def create_demand_gen_campaign(self, campaign_data):
+        """Async create_demand_gen_campaign. Returns the Google Ads campaign ID."""
+        try:
+            budget_resource_name = campaign_data.get('budget_resource_name')
+            if not budget_resource_name:
+                budget_resource_name = await self._create_campaign_budget(
+                    f"Budget for {campaign_data['name']}",
+                    campaign_data.get('daily_budget', 50000)
+                )
+
+            response = await self._mutate("CampaignService", "MutateCampaigns", [
+                self._build_campaign_operation(campaign_data, budget_resource_name)
+            ])
+
+            campaign_id = response.results[0].resource_name.split('/')[-1]
+            logger.info("Created Demand Gen campaign with ID: %s", campaign_id)
+            return campaign_id
+
+        except grpc.aio.AioRpcError as ex:
+            logger.error("Google Ads API error: %s", ex.details())
+            raise Exception(f"Failed to create campaign: {self._parse_rpc_error(ex)}")
+
+    async def get_shared_budget(self, budget_group, daily_budget_micros):
+        """
+        Async get_shared_budget.
+
+        Concurrent publishes in the same group await one creation task.
+        """
+        key = (budget_group, daily_budget_micros)
+        if key in self._shared_budgets:
+            return self._shared_budgets[key]
+
+        task = self._shared_budget_tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create_campaign_budget(
+                f"Shared budget {budget_group} ({daily_budget_micros})",
+                daily_budget_micros,
+                explicitly_shared=True
+            ))
+            self._shared_budget_tasks[key] = task
+        try:
+            resource_name = await task
+        finally:
+            # Failed creations are retried by the next publish
+            self._shared_budget_tasks.pop(key, None)
+
+        if key not in self._shared_budgets:
+            self._shared_budgets[key] = resource_name
+            logger.info("Created shared budget for group %s", budget_group)
+        return resource_name
+
+    async def _create_campaign_budget(self, budget_name, daily_budget_micros, explicitly_shared=False):
+        """Async _create_campaign_budget. Returns the budget resource name."""
+        response = await self._mutate("CampaignBudgetService", "MutateCampaignBudgets", [
+            self._build_campaign_budget_operation(budget_name, daily_budget_micros, explicitly_shared)
+        ])
+        return response.results[0].resource_name
+
+    async def create_ad_group(self, campaign_id, ad_group_data):
+        """Async create_ad_group. Returns the ad group ID."""
+        try:
+            response = await self._mutate("AdGroupService", "MutateAdGroups", [
+                self._build_ad_group_operation(campaign_id, ad_group_data)
+            ])
+
+            ad_group_id = response.results[0].resource_name.split('/')[-1]
+            logger.info("Created ad group with ID: %s", ad_group_id)
+            return ad_group_id
+
+        except grpc.aio.AioRpcError as ex:
+            logger.error("Google Ads API error creating ad group: %s", ex.details())
+            raise Exception(f"Failed to create ad group: {self._parse_rpc_error(ex)}")
+
+    async def create_responsive_display_ad(self, campaign_id, ad_group_id, ad_data):
+        """Async create_responsive_display_ad. Returns the ad ID."""
+        try:
+            response = await self._mutate("AdGroupAdService", "MutateAdGroupAds", [
+                self._build_ad_group_ad_operation(ad_group_id, ad_data)
+            ])
+
+            ad_id = response.results[0].resource_name.split('~')[-1]
+            logger.info("Created ad with ID: %s", ad_id)
+            return ad_id
+
+        except grpc.aio.AioRpcError as ex:
+            logger.error("Google Ads API error creating ad: %s", ex.details())
+            raise Exception(f"Failed to create ad: {self._parse_rpc_error(ex)}")
+
+    async def disable_campaign(self, campaign_id):
+        """Async disable_campaign."""
+        return await self.disable_campaigns([campaign_id])
+
+    async def disable_campaigns(self, campaign_ids):
+        """Async disable_campaigns: one mutate request for all campaigns."""
+        if not campaign_ids:
+            return True
+
+        try:
+            with log_step('google_ads.disable_campaigns'):
+                await self._mutate("CampaignService", "MutateCampaigns", [
+                    self._build_pause_operation(campaign_id) for campaign_id in campaign_ids
+                ])
+
+            logger.info("Disabled %s campaigns", len(campaign_ids))
+            return True
+
+        except grpc.aio.AioRpcError as ex:
+            logger.error("Google Ads API error disabling campaigns: %s", ex.details())
+            raise Exception(f"Failed to disable campaigns: {self._parse_rpc_error(ex)}")
+
+    async def get_campaign_statuses(self, campaign_ids, chunk_size=1000):
+        """Async get_campaign_statuses: one streamed GAQL query per chunk of ids."""
+        try:
+            rpc, request_class = self._rpc(
+                "GoogleAdsService", "SearchStream", "SearchGoogleAdsStream", streaming=True
+            )
+            statuses = {}
+            for query in self._campaign_status_queries(campaign_ids, chunk_size):
+                request = request_class(customer_id=self.customer_id, query=query)
+                with log_step('google_ads.campaign_status'):
+                    async for batch in rpc(request, metadata=self._metadata, timeout=RPC_TIMEOUT_SECONDS):
+                        for row in batch.results:
+                            statuses[str(row.campaign.id)] = (
+                                row.campaign.status.name,
+                                row.campaign.serving_status.name
+                            )
+
+            logger.info("Fetched status of %s campaigns", len(statuses))
+            return statuses
+
+        except grpc.aio.AioRpcError as ex:
+            logger.error("Google Ads API error reading campaign status: %s", ex.details())
+            raise Exception(f"Failed to read campaign status: {self._parse_rpc_error(ex)}")
+
+    async def validate_campaigns(self, campaigns_data):
+        """Async validate_campaigns: one validate_only GoogleAdsService mutate."""
+        operations, owners = self._build_validation_operations(campaigns_data)
+        rpc, request_class = self._rpc("GoogleAdsService", "Mutate", "MutateGoogleAds")
+        request = request_class(
+            customer_id=self.customer_id,
+            mutate_operations=operations,
+            partial_failure=True,
+            validate_only=True
+        )
+        try:
+            with log_step('google_ads.validate'):
+                response = await rpc(request, metadata=self._metadata, timeout=RPC_TIMEOUT_SECONDS)
+            failures = self._partial_failures(response.partial_failure_error)
+        except grpc.aio.AioRpcError as ex:
+            logger.error("Google Ads API error validating campaigns: %s", ex.details())
+            failure = self._rpc_failure(ex)
+            if failure is None:
+                raise Exception(f"Failed to validate campaigns: {self._parse_rpc_error(ex)}")
+            failures = [failure]
+
+        errors = self._errors_by_campaign(failures, owners, len(campaigns_data))
+        logger.info("Validated %s campaigns (%s invalid)", len(campaigns_data), sum(1 for e in errors if e))
+        return errors
+
+    async def publish_campaign(self, campaign_data):
+        """Async publish_campaign: creates campaign, ad group and ad."""
+        try:
+            if campaign_data.get('budget_group') and not campaign_data.get('budget_resource_name'):
+                with log_step('google_ads.shared_budget'):
+                    campaign_data = dict(
+                        campaign_data,
+                        budget_resource_name=await self.get_shared_budget(
+                            campaign_data['budget_group'],
+                            campaign_data.get('daily_budget', 50000)
+                        )
+                    )
+
+            with log_step('google_ads.create_campaign'):
+                campaign_id = await self.create_demand_gen_campaign(campaign_data)
+
+            with log_step('google_ads.create_ad_group'):
+                ad_group_id = await self.create_ad_group(campaign_id, {
+                    'name': campaign_data.get('ad_group_name', 'Main Ad Group')
+                })
+
+            with log_step('google_ads.create_ad'):
+                ad_id = await self.create_responsive_display_ad(campaign_id, ad_group_id, {
+                    'name': campaign_data['name'],
+                    'headline': campaign_data.get('ad_headline', 'Default Headline'),
+                    'description': campaign_data.get('ad_description', 'Default Description'),
+                    'asset_url': campaign_data.get('asset_url')
+                })
+
+            return {
+                'campaign_id': campaign_id,
+                'ad_group_id': ad_group_id,
+                'ad_id': ad_id,
+                'budget_resource_name': campaign_data.get('budget_resource_name')
+            }
+
+        except Exception as e:
+            logger.error("Error in publish_campaign workflow: %s", e)
+            raise
+
+
+class AsyncAccountPool(AccountPool):
+    """AccountPool handing out AsyncGoogleAdsService instances on one shared channel."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._channel = None
+
+    def get_service(self, customer_id=None):
+        """Get the AsyncGoogleAdsService bound to a client account."""
+        customer_id = customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', '')
+        with self._lock:
+            if customer_id not in self._services:
+                if self._client is None:
+                    bootstrap = GoogleAdsService(Config.get_google_ads_config())
+                    bootstrap.initialize_client()
+                    self._client = bootstrap.client
+                if self._channel is None:
+                    self._channel = create_channel(self._client)
+                self._services[customer_id] = AsyncGoogleAdsService(
+                    Config.get_google_ads_config(customer_id), self._client, self._channel
+                )
+            return self._services[customer_id]
+
+    async def run_async(self, customer_id, operation, operations=1):
+        """
+        Await `operation(service)` against an account, charging `operations`
+        against the account's daily operation limit. The charge is refunded
+        if the operation fails.
+        """
+        usage_date = await self._consume_quota_async(customer_id, operations)
+        try:
+            return await operation(self.get_service(customer_id))
+        except Exception:
+            await self._refund_quota_async(customer_id, operations, usage_date)
+            raise
+
+    async def fan_out_async(self, jobs):
+        """
+        fan_out() on the event loop: every job runs concurrently, with at most
+        `max_per_account` in flight per account.
+
+        Returns:
+            list: (key, result, error) tuples in job order; error is None on
+                  success
+        """
+        limits = {job.customer_id: asyncio.Semaphore(self.max_per_account) for job in jobs}
+
+        async def run(job):
+            async with limits[job.customer_id]:
+                try:
+                    return job.key, await self.run_async(job.customer_id, job.operation, job.operations), None
+                except Exception as e:
+                    return job.key, None, e
+
+        return await asyncio.gather(*[run(job) for job in jobs])
+
+    async def usage_async(self):
+        """usage() on the async engine."""
+        async with async_db.engine.connect() as connection:
+            return dict((await connection.execute(usage_query(date.today()))).all())
+
+    async def _consume_quota_async(self, customer_id, operations=1):
+        """_consume_quota() on the async engine."""
+        customer_id = customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', '')
+        today = date.today()
+        async with async_db.engine.begin() as connection:
+            statement = self._quota_statement(customer_id, operations, connection.dialect.name, today)
+            if (await connection.execute(statement)).first() is None:
+                raise self._quota_exceeded(customer_id)
+        return today
+
+    async def _refund_quota_async(self, customer_id, operations, usage_date):
+        """_refund_quota() on the async engine."""
+        customer_id = customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', '')
+        try:
+            async with async_db.engine.begin() as connection:
+                await connection.execute(refund_statement(customer_id, operations, usage_date))
+        except Exception as e:
+            logger.warning("Could not refund %s operations to account %s: %s", operations, customer_id, e)
+
+    async def close(self):
+        """Close the shared channel."""
+        if self._channel is not None:
+            await self._channel.close()
+            self._channel = None
+            self._services = {}
+
+
+_async_account_pool = None
+_async_account_pool_lock = threading.Lock()
+
+
+def get_async_account_pool():
+    """Process-wide AsyncAccountPool."""
+    global _async_account_pool
+    with _async_account_pool_lock:
+        if _async_account_pool is None:
+            _async_account_pool = AsyncAccountPool()
+        return _async_account_pool
@@ -6,7 +6,12 @@ ad group creation, and ad creation.
 
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
+from google.auth.transport.requests import Request
 from datetime import datetime, timedelta
+from logging_setup import log_step
+from operation_templates import ad_group_path, campaign_budget_path, campaign_path, get_templates
+from token_cache import get_credentials
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,35 +20,48 @@ logger = logging.getLogger(__name__)
 class GoogleAdsService:
     """Service class for Google Ads API operations."""
     
-    def __init__(self, credentials):
+    def __init__(self, credentials, client=None):
         """
         Initialize Google Ads client with credentials.
         
         Args:
             credentials (dict): Dictionary containing Google Ads API credentials
+            client (GoogleAdsClient): Already initialized client to share, if any
         """
         self.credentials = credentials
-        self.client = None
+        self.client = client
         self.customer_id = credentials.get('customer_id', '').replace('-', '')
+        self._shared_budgets = {}
+        self._shared_budget_lock = threading.Lock()
+        self._templates = None
         
+    @property
+    def templates(self):
+        """Cached service stubs, enums and operation prototypes of the client."""
+        if self._templates is None or self._templates.client is not self.client:
+            if not self.client:
+                self.initialize_client()
+            self._templates = get_templates(self.client)
+        return self._templates
+    
     def initialize_client(self):
         """Initialize the Google Ads client from credentials."""
         try:
-            # Create credentials dictionary in the format expected by Google Ads API
-            credentials_dict = {
-                'developer_token': self.credentials['developer_token'],
-                'client_id': self.credentials['client_id'],
-                'client_secret': self.credentials['client_secret'],
-                'refresh_token': self.credentials['refresh_token'],
-                'login_customer_id': self.credentials['login_customer_id'].replace('-', ''),
-                'use_proto_plus': True
-            }
-            
-            self.client = GoogleAdsClient.load_from_dict(credentials_dict)
+            # The access token comes from the cache shared by all worker processes;
+            # fetching it up front fails fast on bad credentials
+            oauth_credentials = get_credentials(self.credentials)
+            oauth_credentials.refresh(Request())
+            
+            self.client = GoogleAdsClient(
+                oauth_credentials,
+                self.credentials['developer_token'],
+                login_customer_id=self.credentials['login_customer_id'].replace('-', ''),
+                use_proto_plus=True
+            )
             logger.info("Google Ads client initialized successfully")
             return True
         except Exception as e:
-            logger.error(f"Failed to initialize Google Ads client: {str(e)}")
+            logger.error("Failed to initialize Google Ads client: %s", e)
             raise Exception(f"Failed to initialize Google Ads client: {str(e)}")
     
     def create_demand_gen_campaign(self, campaign_data):
@@ -60,46 +78,16 @@ class GoogleAdsService:
             self.initialize_client()
         
         try:
-            campaign_service = self.client.get_service("CampaignService")
-            campaign_operation = self.client.get_type("CampaignOperation")
-            
-            campaign = campaign_operation.create
-            
-            # Set campaign name
-            campaign.name = campaign_data['name']
-            
-            # Set campaign type to DEMAND_GEN
-            campaign.advertising_channel_type = self.client.enums.AdvertisingChannelTypeEnum.DEMAND_GEN
-            
-            # Set campaign status to PAUSED (inactive) or based on start date
-            start_date = campaign_data.get('start_date')
-            if start_date:
-                start_datetime = datetime.fromisoformat(str(start_date))
-                if start_datetime > datetime.now():
-                    campaign.status = self.client.enums.CampaignStatusEnum.ENABLED
-                else:
-                    campaign.status = self.client.enums.CampaignStatusEnum.PAUSED
-            else:
-                campaign.status = self.client.enums.CampaignStatusEnum.PAUSED
-            
-            # Set bidding strategy - Maximize Conversions for Demand Gen
-            campaign.maximize_conversions.target_cpa = 0
-            
-            # Set budget
-            budget_resource_name = self._create_campaign_budget(
-                campaign_data['name'],
-                campaign_data.get('daily_budget', 50000)
-            )
-            campaign.campaign_budget = budget_resource_name
+            campaign_service = self.templates.service("CampaignService")
             
-            # Set dates if provided
-            if start_date:
-                campaign.start_date = start_datetime.strftime('%Y%m%d')
-            
-            end_date = campaign_data.get('end_date')
-            if end_date:
-                end_datetime = datetime.fromisoformat(str(end_date))
-                campaign.end_date = end_datetime.strftime('%Y%m%d')
+            # Set budget (reuse an existing shared budget when one is given)
+            budget_resource_name = campaign_data.get('budget_resource_name')
+            if not budget_resource_name:
+                budget_resource_name = self._create_campaign_budget(
+                    f"Budget for {campaign_data['name']}",
+                    campaign_data.get('daily_budget', 50000)
+                )
+            campaign_operation = self._build_campaign_operation(campaign_data, budget_resource_name)
             
             # Execute the operation
             response = campaign_service.mutate_campaigns(
@@ -110,35 +98,95 @@ class GoogleAdsService:
             campaign_resource_name = response.results[0].resource_name
             campaign_id = campaign_resource_name.split('/')[-1]
             
-            logger.info(f"Created Demand Gen campaign with ID: {campaign_id}")
+            logger.info("Created Demand Gen campaign with ID: %s", campaign_id)
             return campaign_id
             
         except GoogleAdsException as ex:
-            logger.error(f"Google Ads API error: {ex}")
+            logger.error("Google Ads API error: %s", ex)
             error_message = self._parse_google_ads_error(ex)
             raise Exception(f"Failed to create campaign: {error_message}")
         except Exception as e:
-            logger.error(f"Unexpected error creating campaign: {str(e)}")
+            logger.error("Unexpected error creating campaign: %s", e)
             raise Exception(f"Failed to create campaign: {str(e)}")
     
-    def _create_campaign_budget(self, campaign_name, daily_budget_micros):
+    def _build_campaign_operation(self, campaign_data, budget_resource_name):
+        """Build the CampaignOperation that creates a Demand Gen campaign."""
+        templates = self.templates
+        campaign_operation = templates.new('campaign')  # Demand Gen, Maximize Conversions
+        
+        campaign = campaign_operation.create
+        campaign.name = campaign_data['name']
+        
+        # Set campaign status to PAUSED (inactive) or based on start date
+        start_date = campaign_data.get('start_date')
+        if start_date:
+            start_datetime = datetime.fromisoformat(str(start_date))
+        if campaign_data.get('enable'):
+            # Scheduled publishes go live as soon as they are created
+            campaign.status = templates.enum('CampaignStatusEnum', 'ENABLED')
+        elif start_date and start_datetime > datetime.now():
+            campaign.status = templates.enum('CampaignStatusEnum', 'ENABLED')
+        else:
+            campaign.status = templates.enum('CampaignStatusEnum', 'PAUSED')
+        
+        campaign.campaign_budget = budget_resource_name
+        
+        # Set dates if provided
+        if start_date:
+            campaign.start_date = start_datetime.strftime('%Y%m%d')
+        
+        end_date = campaign_data.get('end_date')
+        if end_date:
+            end_datetime = datetime.fromisoformat(str(end_date))
+            campaign.end_date = end_datetime.strftime('%Y%m%d')
+        
+        return templates.wrap('campaign', campaign_operation)
+    
+    def get_shared_budget(self, budget_group, daily_budget_micros):
+        """
+        Get the explicitly shared budget for a budget group and amount,
+        creating it in Google Ads on first use.
+        
+        Concurrent publishes through this service share one creation, so a
+        batch of campaigns in the same group never creates duplicate budgets.
+        
+        Args:
+            budget_group (str): Budget group name
+            daily_budget_micros (int): Daily budget in micros
+            
+        Returns:
+            str: Resource name of the shared budget
+        """
+        if not self.client:
+            self.initialize_client()
+        
+        key = (budget_group, daily_budget_micros)
+        with self._shared_budget_lock:
+            if key not in self._shared_budgets:
+                self._shared_budgets[key] = self._create_campaign_budget(
+                    f"Shared budget {budget_group} ({daily_budget_micros})",
+                    daily_budget_micros,
+                    explicitly_shared=True
+                )
+                logger.info("Created shared budget for group %s", budget_group)
+            return self._shared_budgets[key]
+    
+    def _create_campaign_budget(self, budget_name, daily_budget_micros, explicitly_shared=False):
         """
         Create a campaign budget.
         
         Args:
-            campaign_name (str): Name for the budget
+            budget_name (str): Name for the budget
             daily_budget_micros (int): Daily budget in micros
+            explicitly_shared (bool): Whether several campaigns may use the budget
             
         Returns:
             str: Resource name of the created budget
         """
-        campaign_budget_service = self.client.get_service("CampaignBudgetService")
-        campaign_budget_operation = self.client.get_type("CampaignBudgetOperation")
-        
-        campaign_budget = campaign_budget_operation.create
-        campaign_budget.name = f"Budget for {campaign_name}"
-        campaign_budget.amount_micros = daily_budget_micros
-        campaign_budget.delivery_method = self.client.enums.BudgetDeliveryMethodEnum.STANDARD
+        campaign_budget_service = self.templates.service("CampaignBudgetService")
+        campaign_budget_operation = self._build_campaign_budget_operation(
+            budget_name, daily_budget_micros, explicitly_shared
+        )
         
         response = campaign_budget_service.mutate_campaign_budgets(
             customer_id=self.customer_id,
@@ -147,6 +195,17 @@ class GoogleAdsService:
         
         return response.results[0].resource_name
     
+    def _build_campaign_budget_operation(self, budget_name, daily_budget_micros, explicitly_shared=False):
+        """Build the CampaignBudgetOperation that creates a daily budget."""
+        campaign_budget_operation = self.templates.new('campaign_budget')  # Standard delivery
+        
+        campaign_budget = campaign_budget_operation.create
+        campaign_budget.name = budget_name
+        campaign_budget.amount_micros = daily_budget_micros
+        campaign_budget.explicitly_shared = explicitly_shared
+        
+        return self.templates.wrap('campaign_budget', campaign_budget_operation)
+    
     def create_ad_group(self, campaign_id, ad_group_data):
         """
         Create an ad group for a campaign.
@@ -162,18 +221,8 @@ class GoogleAdsService:
             self.initialize_client()
         
         try:
-            ad_group_service = self.client.get_service("AdGroupService")
-            ad_group_operation = self.client.get_type("AdGroupOperation")
-            
-            ad_group = ad_group_operation.create
-            ad_group.name = ad_group_data.get('name', 'Ad Group 1')
-            ad_group.campaign = self.client.get_service("CampaignService").campaign_path(
-                self.customer_id, campaign_id
-            )
-            ad_group.status = self.client.enums.AdGroupStatusEnum.ENABLED
-            
-            # Set ad group type for Demand Gen
-            ad_group.type_ = self.client.enums.AdGroupTypeEnum.DISPLAY_STANDARD
+            ad_group_service = self.templates.service("AdGroupService")
+            ad_group_operation = self._build_ad_group_operation(campaign_id, ad_group_data)
             
             response = ad_group_service.mutate_ad_groups(
                 customer_id=self.customer_id,
@@ -183,14 +232,24 @@ class GoogleAdsService:
             ad_group_resource_name = response.results[0].resource_name
             ad_group_id = ad_group_resource_name.split('/')[-1]
             
-            logger.info(f"Created ad group with ID: {ad_group_id}")
+            logger.info("Created ad group with ID: %s", ad_group_id)
             return ad_group_id
             
         except GoogleAdsException as ex:
-            logger.error(f"Google Ads API error creating ad group: {ex}")
+            logger.error("Google Ads API error creating ad group: %s", ex)
             error_message = self._parse_google_ads_error(ex)
             raise Exception(f"Failed to create ad group: {error_message}")
     
+    def _build_ad_group_operation(self, campaign_id, ad_group_data):
+        """Build the AdGroupOperation that creates a campaign's ad group."""
+        ad_group_operation = self.templates.new('ad_group')  # Enabled, display standard (Demand Gen)
+        
+        ad_group = ad_group_operation.create
+        ad_group.name = ad_group_data.get('name', 'Ad Group 1')
+        ad_group.campaign = campaign_path(self.customer_id, campaign_id)
+        
+        return self.templates.wrap('ad_group', ad_group_operation)
+    
     def create_responsive_display_ad(self, campaign_id, ad_group_id, ad_data):
         """
         Create a responsive display ad.
@@ -207,30 +266,8 @@ class GoogleAdsService:
             self.initialize_client()
         
         try:
-            ad_group_ad_service = self.client.get_service("AdGroupAdService")
-            ad_group_ad_operation = self.client.get_type("AdGroupAdOperation")
-            
-            ad_group_ad = ad_group_ad_operation.create
-            ad_group_ad.ad_group = self.client.get_service("AdGroupService").ad_group_path(
-                self.customer_id, ad_group_id
-            )
-            ad_group_ad.status = self.client.enums.AdGroupAdStatusEnum.ENABLED
-            
-            # Create responsive display ad
-            ad = ad_group_ad.ad
-            ad.responsive_display_ad.headlines.append(
-                self._create_ad_text_asset(ad_data.get('headline', 'Default Headline'))
-            )
-            ad.responsive_display_ad.descriptions.append(
-                self._create_ad_text_asset(ad_data.get('description', 'Default Description'))
-            )
-            
-            # Add business name
-            ad.responsive_display_ad.business_name = ad_data.get('name', 'Business Name')
-            
-            # Add final URL if provided
-            if ad_data.get('asset_url'):
-                ad.final_urls.append(ad_data['asset_url'])
+            ad_group_ad_service = self.templates.service("AdGroupAdService")
+            ad_group_ad_operation = self._build_ad_group_ad_operation(ad_group_id, ad_data)
             
             response = ad_group_ad_service.mutate_ad_group_ads(
                 customer_id=self.customer_id,
@@ -240,19 +277,34 @@ class GoogleAdsService:
             ad_resource_name = response.results[0].resource_name
             ad_id = ad_resource_name.split('~')[-1]
             
-            logger.info(f"Created ad with ID: {ad_id}")
+            logger.info("Created ad with ID: %s", ad_id)
             return ad_id
             
         except GoogleAdsException as ex:
-            logger.error(f"Google Ads API error creating ad: {ex}")
+            logger.error("Google Ads API error creating ad: %s", ex)
             error_message = self._parse_google_ads_error(ex)
             raise Exception(f"Failed to create ad: {error_message}")
     
-    def _create_ad_text_asset(self, text):
-        """Helper to create ad text asset."""
-        ad_text_asset = self.client.get_type("AdTextAsset")
-        ad_text_asset.text = text[:30]  # Max 30 chars for headline
-        return ad_text_asset
+    def _build_ad_group_ad_operation(self, ad_group_id, ad_data):
+        """Build the AdGroupAdOperation that creates a responsive display ad."""
+        ad_group_ad_operation = self.templates.new('ad_group_ad')  # Enabled
+        
+        ad_group_ad = ad_group_ad_operation.create
+        ad_group_ad.ad_group = ad_group_path(self.customer_id, ad_group_id)
+        
+        # Create responsive display ad (length limits are checked by Campaign.validate_publish_data)
+        ad = ad_group_ad.ad
+        ad.responsive_display_ad.headlines.add().text = ad_data.get('headline', 'Default Headline')
+        ad.responsive_display_ad.descriptions.add().text = ad_data.get('description', 'Default Description')
+        
+        # Add business name
+        ad.responsive_display_ad.business_name = ad_data.get('name', 'Business Name')
+        
+        # Add final URL if provided
+        if ad_data.get('asset_url'):
+            ad.final_urls.append(ad_data['asset_url'])
+        
+        return self.templates.wrap('ad_group_ad', ad_group_ad_operation)
     
     def disable_campaign(self, campaign_id):
         """
@@ -268,29 +320,237 @@ class GoogleAdsService:
             self.initialize_client()
         
         try:
-            campaign_service = self.client.get_service("CampaignService")
-            campaign_operation = self.client.get_type("CampaignOperation")
+            campaign_service = self.templates.service("CampaignService")
+            campaign_operation = self._build_pause_operation(campaign_id)
             
-            campaign = campaign_operation.update
-            campaign.resource_name = campaign_service.campaign_path(
-                self.customer_id, campaign_id
-            )
-            campaign.status = self.client.enums.CampaignStatusEnum.PAUSED
+            with log_step('google_ads.disable_campaign'):
+                response = campaign_service.mutate_campaigns(
+                    customer_id=self.customer_id,
+                    operations=[campaign_operation]
+                )
             
-            campaign_operation.update_mask.paths.append("status")
+            logger.info("Disabled campaign %s", campaign_id)
+            return True
             
-            response = campaign_service.mutate_campaigns(
-                customer_id=self.customer_id,
-                operations=[campaign_operation]
-            )
+        except GoogleAdsException as ex:
+            logger.error("Google Ads API error disabling campaign: %s", ex)
+            error_message = self._parse_google_ads_error(ex)
+            raise Exception(f"Failed to disable campaign: {error_message}")
+    
+    def _build_pause_operation(self, campaign_id):
+        """Build the CampaignOperation that pauses a campaign."""
+        campaign_operation = self.templates.new('pause')  # status PAUSED, update mask set
+        campaign_operation.update.resource_name = campaign_path(self.customer_id, campaign_id)
+        return self.templates.wrap('pause', campaign_operation)
+    
+    def disable_campaigns(self, campaign_ids):
+        """
+        Disable (pause) several campaigns with a single mutate request.
+        
+        Args:
+            campaign_ids (list): Google Ads campaign IDs
             
-            logger.info(f"Disabled campaign {campaign_id}")
+        Returns:
+            bool: Success status
+        """
+        if not campaign_ids:
+            return True
+        
+        if not self.client:
+            self.initialize_client()
+        
+        try:
+            campaign_service = self.templates.service("CampaignService")
+            operations = [self._build_pause_operation(campaign_id) for campaign_id in campaign_ids]
+            
+            with log_step('google_ads.disable_campaigns'):
+                campaign_service.mutate_campaigns(
+                    customer_id=self.customer_id,
+                    operations=operations
+                )
+            
+            logger.info("Disabled %s campaigns", len(campaign_ids))
             return True
             
         except GoogleAdsException as ex:
-            logger.error(f"Google Ads API error disabling campaign: {ex}")
+            logger.error("Google Ads API error disabling campaigns: %s", ex)
             error_message = self._parse_google_ads_error(ex)
-            raise Exception(f"Failed to disable campaign: {error_message}")
+            raise Exception(f"Failed to disable campaigns: {error_message}")
+    
+    def _campaign_status_queries(self, campaign_ids, chunk_size):
+        """GAQL queries for campaign status, one per chunk of ids."""
+        campaign_ids = [str(campaign_id) for campaign_id in campaign_ids if str(campaign_id).isdigit()]
+        for start in range(0, len(campaign_ids), chunk_size):
+            yield (
+                "SELECT campaign.id, campaign.status, campaign.serving_status "
+                "FROM campaign "
+                f"WHERE campaign.id IN ({', '.join(campaign_ids[start:start + chunk_size])})"
+            )
+    
+    def get_campaign_statuses(self, campaign_ids, chunk_size=1000):
+        """
+        Read status and serving status for many campaigns.
+        
+        Each chunk of ids is fetched with a single streamed GAQL query
+        instead of one request per campaign.
+        
+        Args:
+            campaign_ids (list): Google Ads campaign IDs
+            chunk_size (int): Ids per IN-list
+            
+        Returns:
+            dict: Campaign ID -> (status, serving_status) enum names; ids
+                  Google Ads does not return are left out
+        """
+        if not self.client:
+            self.initialize_client()
+        
+        try:
+            ga_service = self.templates.service("GoogleAdsService")
+            statuses = {}
+            for query in self._campaign_status_queries(campaign_ids, chunk_size):
+                with log_step('google_ads.campaign_status'):
+                    stream = ga_service.search_stream(customer_id=self.customer_id, query=query)
+                    for batch in stream:
+                        for row in batch.results:
+                            statuses[str(row.campaign.id)] = (
+                                row.campaign.status.name,
+                                row.campaign.serving_status.name
+                            )
+            
+            logger.info("Fetched status of %s campaigns", len(statuses))
+            return statuses
+            
+        except GoogleAdsException as ex:
+            logger.error("Google Ads API error reading campaign status: %s", ex)
+            error_message = self._parse_google_ads_error(ex)
+            raise Exception(f"Failed to read campaign status: {error_message}")
+    
+    def _build_validation_operations(self, campaigns_data):
+        """
+        Build the budget, campaign, ad group and ad operations of several
+        campaigns as one GoogleAdsService mutate, linked by temporary
+        (negative) resource ids.
+        
+        Returns:
+            tuple: (MutateOperations, campaign indexes each operation belongs to)
+        """
+        templates = self.templates
+        operations = []
+        owners = []
+        shared_budgets = {}
+        
+        def add(field, operation, owner, resource_name=None):
+            mutate_operation = templates.new('mutate')
+            target = getattr(mutate_operation, field)
+            target.CopyFrom(type(operation).pb(operation))
+            if resource_name:
+                target.create.resource_name = resource_name
+            operations.append(templates.wrap('mutate', mutate_operation))
+            owners.append(owner)
+        
+        for index, campaign_data in enumerate(campaigns_data):
+            budget_resource_name = campaign_data.get('budget_resource_name')
+            daily_budget = campaign_data.get('daily_budget', 50000)
+            shared_key = (campaign_data['budget_group'], daily_budget) if campaign_data.get('budget_group') else None
+            
+            if not budget_resource_name and shared_key in shared_budgets:
+                # Shared budget created earlier in this request
+                budget_resource_name, budget_owner = shared_budgets[shared_key]
+                budget_owner.append(index)
+            elif not budget_resource_name:
+                budget_operation = self._build_campaign_budget_operation(
+                    f"Budget for {campaign_data['name']}", daily_budget, explicitly_shared=shared_key is not None
+                )
+                budget_owner = [index]
+                budget_resource_name = campaign_budget_path(self.customer_id, -len(operations) - 1)
+                add('campaign_budget_operation', budget_operation, budget_owner, budget_resource_name)
+                if shared_key:
+                    shared_budgets[shared_key] = (budget_resource_name, budget_owner)
+            
+            campaign_id = -len(operations) - 1
+            add('campaign_operation', self._build_campaign_operation(campaign_data, budget_resource_name),
+                [index], campaign_path(self.customer_id, campaign_id))
+            
+            ad_group_id = -len(operations) - 1
+            add('ad_group_operation', self._build_ad_group_operation(campaign_id, {
+                'name': campaign_data.get('ad_group_name', 'Main Ad Group')
+            }), [index], ad_group_path(self.customer_id, ad_group_id))
+            
+            add('ad_group_ad_operation', self._build_ad_group_ad_operation(ad_group_id, {
+                'name': campaign_data['name'],
+                'headline': campaign_data.get('ad_headline', 'Default Headline'),
+                'description': campaign_data.get('ad_description', 'Default Description'),
+                'asset_url': campaign_data.get('asset_url')
+            }), [index])
+        
+        return operations, owners
+    
+    def _partial_failures(self, status):
+        """GoogleAdsFailure messages carried by a partial_failure_error status."""
+        failure_class = self.templates.message_class("GoogleAdsFailure")
+        return [failure_class.deserialize(detail.value) for detail in status.details]
+    
+    def _errors_by_campaign(self, failures, owners, count):
+        """
+        Attribute Google Ads errors to campaigns by operation index.
+        
+        Raises:
+            Exception: For errors that are not tied to an operation
+                       (authentication, quota, ...)
+        """
+        errors = [[] for _ in range(count)]
+        request_errors = []
+        for failure in failures:
+            for error in failure.errors:
+                path = error.location.field_path_elements
+                if not path or path[0].field_name != 'mutate_operations':
+                    request_errors.append(error.message)
+                    continue
+                field = '.'.join(element.field_name for element in path[1:])
+                message = f"{field}: {error.message}" if field else error.message
+                for index in owners[path[0].index]:
+                    if message not in errors[index]:
+                        errors[index].append(message)
+        
+        if request_errors:
+            raise Exception(f"Failed to validate campaigns: {' | '.join(request_errors)}")
+        return errors
+    
+    def validate_campaigns(self, campaigns_data):
+        """
+        Check campaigns against Google Ads without creating anything.
+        
+        Every campaign's budget, campaign, ad group and ad are sent in a single
+        validate_only request with partial failure, so one invalid campaign
+        does not hide the errors of the others.
+        
+        Args:
+            campaigns_data (list): Campaign data dicts, as for publish_campaign
+            
+        Returns:
+            list: Error messages per campaign, in input order (empty = valid)
+        """
+        if not self.client:
+            self.initialize_client()
+        
+        operations, owners = self._build_validation_operations(campaigns_data)
+        try:
+            with log_step('google_ads.validate'):
+                response = self.templates.service("GoogleAdsService").mutate(
+                    customer_id=self.customer_id,
+                    mutate_operations=operations,
+                    partial_failure=True,
+                    validate_only=True
+                )
+            failures = self._partial_failures(response.partial_failure_error)
+        except GoogleAdsException as ex:
+            logger.error("Google Ads API error validating campaigns: %s", ex)
+            failures = [ex.failure]
+        
+        errors = self._errors_by_campaign(failures, owners, len(campaigns_data))
+        logger.info("Validated %s campaigns (%s invalid)", len(campaigns_data), sum(1 for e in errors if e))
+        return errors
     
     def _parse_google_ads_error(self, ex):
         """Parse Google Ads exception to extract meaningful error message."""
@@ -308,17 +568,30 @@ class GoogleAdsService:
             campaign_data (dict): Complete campaign data
             
         Returns:
-            dict: Contains campaign_id, ad_group_id, ad_id
+            dict: Contains campaign_id, ad_group_id, ad_id, budget_resource_name
         """
         try:
+            # Resolve the shared budget first so the campaign can reference it
+            if campaign_data.get('budget_group') and not campaign_data.get('budget_resource_name'):
+                with log_step('google_ads.shared_budget'):
+                    campaign_data = dict(
+                        campaign_data,
+                        budget_resource_name=self.get_shared_budget(
+                            campaign_data['budget_group'],
+                            campaign_data.get('daily_budget', 50000)
+                        )
+                    )
+            
             # Step 1: Create campaign
-            campaign_id = self.create_demand_gen_campaign(campaign_data)
+            with log_step('google_ads.create_campaign'):
+                campaign_id = self.create_demand_gen_campaign(campaign_data)
             
             # Step 2: Create ad group
             ad_group_data = {
                 'name': campaign_data.get('ad_group_name', 'Main Ad Group')
             }
-            ad_group_id = self.create_ad_group(campaign_id, ad_group_data)
+            with log_step('google_ads.create_ad_group'):
+                ad_group_id = self.create_ad_group(campaign_id, ad_group_data)
             
             # Step 3: Create ad
             ad_data = {
@@ -327,14 +600,16 @@ class GoogleAdsService:
                 'description': campaign_data.get('ad_description', 'Default Description'),
                 'asset_url': campaign_data.get('asset_url')
             }
-            ad_id = self.create_responsive_display_ad(campaign_id, ad_group_id, ad_data)
+            with log_step('google_ads.create_ad'):
+                ad_id = self.create_responsive_display_ad(campaign_id, ad_group_id, ad_data)
             
             return {
                 'campaign_id': campaign_id,
                 'ad_group_id': ad_group_id,
-                'ad_id': ad_id
+                'ad_id': ad_id,
+                'budget_resource_name': campaign_data.get('budget_resource_name')
             }
             
         except Exception as e:
-            logger.error(f"Error in publish_campaign workflow: {str(e)}")
+            logger.error("Error in publish_campaign workflow: %s", e)
             raise
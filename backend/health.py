@@ -0,0 +1,284 @@
+"""
+Liveness and readiness.
+Load balancers and the orchestrator poll health several times a second per
+replica, so the endpoints never touch a dependency themselves:
+
+- /api/health/live answers from the process alone.
+- /api/health/ready (and /api/health) serve the last results of a
+  background prober thread, which checks the database and its connection
+  pools, Google Ads reachability and the log queue depth on its own schedule.
+
+A check only flips to failing after HEALTH_FAILURE_THRESHOLD failures in a
+row, and back after HEALTH_RECOVERY_THRESHOLD successes, so one slow probe
+does not take a replica out of rotation. Only HEALTH_CRITICAL_CHECKS decide
+readiness; the others are reported. Results older than three probe
+intervals (a stuck prober) count as failing.
+
+The server entrypoints (app.py, asgi.py) start the prober when they begin
+serving, and a health request starts it if they did not. Until its first
+round finishes, both /api/health/ready and /api/health report "starting"
+(503); the critical checks run first in each round, so that window is one
+database round trip, not the Google Ads connect timeout.
+"""
+
+from datetime import datetime
+from sqlalchemy import text
+from models import db
+from config import Config
+from logging_setup import log_queue_stats
+import socket
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CheckState:
+    """Latest result of one check, with the consecutive-result counters."""
+
+    def __init__(self, name, interval, critical):
+        self.name = name
+        self.interval = interval
+        self.critical = critical
+        self.healthy = None  # Unknown until the first run
+        self.failures = 0
+        self.successes = 0
+        self.details = {}
+        self.error = None
+        self.checked_at = None
+        self.checked_monotonic = None
+
+    def record(self, ok, details, error, failure_threshold, recovery_threshold):
+        """Count a result and flip the state once a threshold is reached."""
+        if ok:
+            self.successes += 1
+            self.failures = 0
+            if self.healthy is None or self.successes >= recovery_threshold:
+                self.healthy = True
+        else:
+            self.failures += 1
+            self.successes = 0
+            if self.healthy is None or self.failures >= failure_threshold:
+                self.healthy = False
+        self.details = details
+        self.error = error
+        self.checked_at = datetime.utcnow()
+        self.checked_monotonic = time.monotonic()
+
+    def is_stale(self, now):
+        return self.checked_monotonic is None or now - self.checked_monotonic > self.interval * 3
+
+    def to_dict(self, now):
+        return {
+            'healthy': self.healthy and not self.is_stale(now),
+            'critical': self.critical,
+            'stale': self.is_stale(now),
+            'consecutive_failures': self.failures,
+            'checked_at': self.checked_at.isoformat() if self.checked_at else None,
+            'error': self.error,
+            **self.details,
+        }
+
+
+def pool_stats(pool):
+    """Checked-out connections and limits of a QueuePool (or what the pool type reports)."""
+    stats = {'checked_out': pool.checkedout()} if hasattr(pool, 'checkedout') else {}
+    if hasattr(pool, 'size'):
+        stats['size'] = pool.size()
+        stats['overflow'] = pool.overflow()
+        stats['max_overflow'] = getattr(pool, '_max_overflow', 0)  # -1 = unlimited
+        stats['exhausted'] = (stats['max_overflow'] >= 0 and
+                              stats['checked_out'] >= stats['size'] + stats['max_overflow'])
+    return stats
+
+
+def check_database(app, pools):
+    """
+    SELECT 1 on the app's engine, unless a watched pool is already exhausted
+    (the probe would only queue behind requests for a connection).
+
+    Returns:
+        tuple: (ok, details, error)
+    """
+    details = {'pools': {name: pool_stats(pool) for name, pool in pools.items()}}
+    exhausted = [name for name, stats in details['pools'].items() if stats.get('exhausted')]
+    if exhausted:
+        return False, details, f"Connection pool exhausted: {', '.join(exhausted)}"
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except Exception as e:
+            return False, details, str(e)
+    return True, details, None
+
+
+def check_google_ads(endpoint=None, timeout=None):
+    """
+    Configuration completeness and a TCP connect to the Google Ads API
+    endpoint (HEALTH_GOOGLE_ADS_ENDPOINT, which can point at a local
+    stand-in). No RPC is made, so the probe costs no API quota.
+
+    Returns:
+        tuple: (ok, details, error)
+    """
+    is_valid, missing_fields = Config.validate_google_ads_config()
+    details = {'config': 'valid' if is_valid else 'invalid', 'missing_config': missing_fields}
+    if not is_valid:
+        return False, details, 'Google Ads configuration incomplete'
+
+    host, _, port = (endpoint or Config.HEALTH_GOOGLE_ADS_ENDPOINT).rpartition(':')
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout or Config.HEALTH_PROBE_TIMEOUT_SECONDS):
+            pass
+    except OSError as e:
+        return False, details, f'Google Ads endpoint unreachable: {e}'
+    details['connect_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return True, details, None
+
+
+def check_log_queue(max_fill=None):
+    """
+    Depth of the log queue; a queue near capacity means the log sink is not
+    keeping up and records are about to be dropped.
+
+    Returns:
+        tuple: (ok, details, error)
+    """
+    stats = log_queue_stats()
+    if stats is None:
+        return True, {'configured': False}, None
+    max_fill = Config.HEALTH_MAX_QUEUE_FILL if max_fill is None else max_fill
+    if stats['capacity'] and stats['depth'] >= stats['capacity'] * max_fill:
+        return False, stats, f"Log queue {stats['depth']}/{stats['capacity']} full"
+    return True, stats, None
+
+
+class HealthProber:
+    """Runs the dependency checks on a background thread and keeps their last results."""
+
+    def __init__(self, app, interval=None, google_ads_interval=None,
+                 failure_threshold=None, recovery_threshold=None, critical_checks=None):
+        """
+        Args:
+            app (Flask): Application used to provide an app context
+            interval (float): Seconds between database and log queue checks
+            google_ads_interval (float): Seconds between Google Ads checks
+            failure_threshold (int): Consecutive failures before a check fails
+            recovery_threshold (int): Consecutive successes before it recovers
+            critical_checks (list): Checks that decide readiness
+        """
+        self.app = app
+        self.interval = interval or Config.HEALTH_PROBE_INTERVAL_SECONDS
+        self.failure_threshold = failure_threshold or Config.HEALTH_FAILURE_THRESHOLD
+        self.recovery_threshold = recovery_threshold or Config.HEALTH_RECOVERY_THRESHOLD
+        critical_checks = Config.HEALTH_CRITICAL_CHECKS if critical_checks is None else critical_checks
+        google_ads_interval = google_ads_interval or Config.HEALTH_GOOGLE_ADS_PROBE_INTERVAL_SECONDS
+
+        self.pools = {}
+        self._checks = {
+            'database': (CheckState('database', self.interval, 'database' in critical_checks),
+                         lambda: check_database(self.app, self.pools)),
+            'google_ads': (CheckState('google_ads', google_ads_interval, 'google_ads' in critical_checks),
+                           check_google_ads),
+            'log_queue': (CheckState('log_queue', self.interval, 'log_queue' in critical_checks),
+                          check_log_queue),
+        }
+        self.started_at = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def watch_pool(self, name, pool):
+        """Report a connection pool (and fail the database check when it is exhausted)."""
+        self.pools[name] = pool
+
+    def start(self):
+        """Run the checks in a background daemon thread (no-op if running)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='health-prober', daemon=True)
+            self._thread.start()
+        logger.info("Health prober started (interval=%ss)", self.interval)
+
+    def stop(self):
+        """Stop the background thread; readiness keeps serving the last results."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def run_forever(self):
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(min(state.interval for state, _ in self._checks.values()))
+
+    def run_once(self, force=False):
+        """Run every check whose interval has passed (all of them with force=True)."""
+        with self._run_lock:
+            self._run_checks(force)
+
+    def _run_checks(self, force):
+        now = time.monotonic()
+        # Critical checks first: readiness is known before a slow optional check finishes
+        for state, check in sorted(self._checks.values(), key=lambda item: not item[0].critical):
+            if not force and state.checked_monotonic is not None and now - state.checked_monotonic < state.interval:
+                continue
+            try:
+                ok, details, error = check()
+            except Exception as e:
+                ok, details, error = False, {}, str(e)
+            was_healthy = state.healthy
+            state.record(ok, details, error, self.failure_threshold, self.recovery_threshold)
+            if state.healthy is not was_healthy:
+                log = logger.info if state.healthy else logger.warning
+                log("Health check %s is now %s%s", state.name,
+                    'passing' if state.healthy else 'failing', f": {error}" if error else '')
+
+    def readiness(self):
+        """
+        Last known readiness; never runs a check. Starts the prober if the
+        server entrypoint did not (and restarts it if its thread died).
+
+        Returns:
+            tuple: (ready, response body)
+        """
+        if not self._stop_event.is_set() and not (self._thread and self._thread.is_alive()):
+            self.start()
+        now = time.monotonic()
+        checks = {name: state.to_dict(now) for name, (state, _) in self._checks.items()}
+        critical = [state for state, _ in self._checks.values() if state.critical]
+        if any(state.healthy is None for state in critical):
+            status = 'starting'
+        elif all(checks[state.name]['healthy'] for state in critical):
+            status = 'ready'
+        else:
+            status = 'not_ready'
+        return status == 'ready', {
+            'status': status,
+            'uptime_seconds': round(now - self.started_at, 1),
+            'checks': checks,
+        }
+
+
+def liveness():
+    """Liveness body: answering at all means the process is alive."""
+    return {'status': 'alive'}
+
+
+def legacy_health(ready, body):
+    """Readiness in the original /api/health response shape, plus the checks."""
+    database = body['checks']['database']
+    google_ads = body['checks']['google_ads']
+    return {
+        **body,
+        'status': 'healthy' if ready else 'unhealthy',
+        'readiness': body['status'],
+        'database': 'connected' if database['healthy'] else 'disconnected',
+        'google_ads_config': google_ads.get('config', 'unknown'),
+        'missing_config': google_ads.get('missing_config', []),
+    }
@@ -5,6 +5,7 @@ Creates all necessary tables in PostgreSQL.
 
 from app import create_app
 from models import db
+from search import ensure_search_index, rebuild_search_index
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +25,8 @@ def init_database():
             # Create all tables
             logger.info("Creating database tables...")
             db.create_all()
+            ensure_search_index()
+            rebuild_search_index()
             
             logger.info("Database initialized successfully!")
             logger.info("Tables created:")
@@ -33,12 +36,12 @@ def init_database():
             from sqlalchemy import inspect
             inspector = inspect(db.engine)
             for table_name in inspector.get_table_names():
-                logger.info(f"\nTable: {table_name}")
+                logger.info("\nTable: %s", table_name)
                 for column in inspector.get_columns(table_name):
-                    logger.info(f"  - {column['name']}: {column['type']}")
+                    logger.info("  - %s: %s", column['name'], column['type'])
             
         except Exception as e:
-            logger.error(f"Error initializing database: {str(e)}")
+            logger.error("Error initializing database: %s", e)
             raise
 
 
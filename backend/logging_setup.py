@@ -0,0 +1,278 @@
+"""
+Logging setup.
+Log calls on the request path only put the record on an in-memory queue; a
+listener thread formats it (JSON by default) and writes it out, so slow
+stdout/stderr or a backed-up log collector never blocks a request.
+
+Each request gets an id (X-Request-ID, or a generated one) that is attached
+to every record logged while handling it, including records from fan-out
+worker threads. Timed steps (log_step) are collected per request and logged
+with the access log line. With LOG_INFO_SAMPLE_RATE below 1, only that share
+of requests logs at INFO; warnings, errors, failed and slow requests are
+always logged.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config import Config
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed with extra=
+STANDARD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'request_id'}
+
+access_logger = logging.getLogger('access')
+
+_request_context = ContextVar('request_log_context', default=None)
+_listener = None
+
+
+class RequestLogContext:
+    """Per-request logging state: id, sampling decision and step timings."""
+
+    __slots__ = ('request_id', 'sampled', 'started', 'steps', '_lock')
+
+    def __init__(self, request_id, sampled):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def add_step(self, name, duration_ms):
+        # Fan-out workers share the context; repeated steps add up
+        with self._lock:
+            self.steps[name] = round(self.steps.get(name, 0) + duration_ms, 2)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Tags records with the current request id and drops INFO/DEBUG records
+    of requests that were not sampled. Runs in the logging thread, before
+    the record is queued.
+    """
+
+    def filter(self, record):
+        context = _request_context.get()
+        if context is None:
+            record.request_id = None
+            return True
+        record.request_id = context.request_id
+        return context.sampled or record.levelno >= logging.WARNING
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler merges args into the message before queuing; here the
+    record is queued as is, so `%s` arguments are only rendered off the
+    request path. Arguments must not be mutated after logging. When the
+    queue is full, records are dropped and counted instead of blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            payload['request_id'] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(stream=None):
+    """
+    Route all logging through the queue and start the listener thread.
+
+    Safe to call more than once; later calls are no-ops.
+
+    Returns:
+        DeferredQueueHandler: The handler installed on the root logger
+    """
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None:
+        return next(handler for handler in root.handlers if isinstance(handler, DeferredQueueHandler))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if Config.LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    handler = DeferredQueueHandler(queue.Queue(Config.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestContextFilter())
+
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(Config.LOG_LEVEL)
+
+    # SQL statements go through the queue too (instead of echo's own stdout handler)
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO if Config.LOG_SQL else logging.WARNING)
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return handler
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_queue_stats():
+    """
+    Depth of the log queue, for the health prober.
+
+    Returns:
+        dict: depth, capacity and dropped records, or None if
+              configure_logging() has not run
+    """
+    if _listener is None:
+        return None
+    handler = next((handler for handler in logging.getLogger().handlers
+                    if isinstance(handler, DeferredQueueHandler)), None)
+    if handler is None:
+        return None
+    return {'depth': handler.queue.qsize(), 'capacity': handler.queue.maxsize, 'dropped': handler.dropped}
+
+
+def begin_request(request_id=None):
+    """
+    Start the logging context of a request.
+
+    Args:
+        request_id (str): Incoming X-Request-ID, if any
+
+    Returns:
+        RequestLogContext
+    """
+    context = RequestLogContext(
+        request_id or uuid.uuid4().hex,
+        Config.LOG_INFO_SAMPLE_RATE >= 1 or random.random() < Config.LOG_INFO_SAMPLE_RATE
+    )
+    _request_context.set(context)
+    return context
+
+
+def end_request(method, path, status_code):
+    """Write the access log line of the current request and clear its context."""
+    context = _request_context.get()
+    if context is None:
+        return
+    duration_ms = (time.perf_counter() - context.started) * 1000
+    slow = duration_ms >= Config.LOG_SLOW_REQUEST_MS
+    if context.sampled or slow or status_code >= 500:
+        access_logger.log(
+            logging.WARNING if slow or status_code >= 500 else logging.INFO,
+            '%s %s %s %.1fms', method, path, status_code, duration_ms,
+            extra={
+                'method': method,
+                'path': path,
+                'status': status_code,
+                'duration_ms': round(duration_ms, 2),
+                'steps': context.steps,
+            }
+        )
+    _request_context.set(None)
+
+
+def current_request_id():
+    """Id of the request being handled, or None."""
+    context = _request_context.get()
+    return context.request_id if context else None
+
+
+@contextmanager
+def log_step(name):
+    """
+    Time a step of the current request (DB query, Google Ads call, ...).
+
+    Inside a request the duration is added to the access log line; outside
+    one (scheduler, scripts) it is logged at DEBUG.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        context = _request_context.get()
+        if context is not None:
+            context.add_step(name, duration_ms)
+        else:
+            logging.getLogger(__name__).debug(
+                'Step %s took %.1fms', name, duration_ms,
+                extra={'step': name, 'duration_ms': round(duration_ms, 2)}
+            )
+
+
+def init_request_logging(app):
+    """Request id and access log hooks for the Flask app."""
+    from flask import request
+
+    @app.before_request
+    def start_request_log():
+        begin_request(request.headers.get('X-Request-ID'))
+
+    @app.after_request
+    def finish_request_log(response):
+        request_id = current_request_id()
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        end_request(request.method, request.path, response.status_code)
+        return response
+
+
+def init_async_request_logging(app):
+    """Request id and access log hooks for the Quart (ASGI) app."""
+    from quart import request
+
+    @app.before_request
+    async def start_request_log():
+        begin_request(request.headers.get('X-Request-ID'))
+
+    @app.after_request
+    async def finish_request_log(response):
+        request_id = current_request_id()
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        end_request(request.method, request.path, response.status_code)
+        return response
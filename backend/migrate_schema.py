@@ -0,0 +1,94 @@
+"""
+Bring an existing database up to the current models.
+
+db.create_all() only creates missing tables; it never alters one that
+already exists. Databases created before shared budgets, accounts,
+archiving, status refresh or quota tracking therefore lack columns such as
+campaigns.customer_id, budget_group, archived_at, remote_status,
+serving_status and status_checked_at, and the indexes added with them.
+
+This script creates missing tables, adds missing columns with
+ALTER TABLE ... ADD COLUMN (all added columns are nullable, so existing rows
+stay valid) and creates missing indexes, then sets up full-text search (see
+search.py), so the app itself has nothing left to build at startup. It is
+idempotent; run it before starting the app after an upgrade, and before
+migrate_uuid_keys.py. Usage:
+
+    python migrate_schema.py
+"""
+
+from flask import Flask
+from sqlalchemy import inspect, text
+from models import db
+from search import ensure_search_index
+from config import Config
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def add_column_sql(dialect, table, column):
+    """ALTER TABLE statement adding `column` to an existing `table`."""
+    preparer = dialect.identifier_preparer
+    sql = (
+        f"ALTER TABLE {preparer.format_table(table)} "
+        f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=dialect)}"
+    )
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        sql += f" REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})"
+    return sql
+
+
+def missing_columns(inspector, table):
+    """Model columns the existing `table` does not have yet."""
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    return [column for column in table.columns if column.name not in existing]
+
+
+def migrate():
+    """Create missing tables, columns and indexes. Returns the number of changes."""
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = 0
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(engine)
+            logger.info("Created table %s", table.name)
+            changes += 1
+            continue
+
+        for column in missing_columns(inspector, table):
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} to existing rows"
+                )
+            with engine.begin() as connection:
+                connection.execute(text(add_column_sql(engine.dialect, table, column)))
+            logger.info("Added column %s.%s", table.name, column.name)
+            changes += 1
+
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+                logger.info("Created index %s", index.name)
+                changes += 1
+
+    ensure_search_index()
+    logger.info("Schema up to date (%s changes)", changes)
+    return changes
+
+
+if __name__ == '__main__':
+    # A bare app: create_app() queries the models at startup, which fails
+    # until the columns exist
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+
+    with app.app_context():
+        migrate()
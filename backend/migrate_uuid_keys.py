@@ -0,0 +1,180 @@
+"""
+Migrate campaigns.id from VARCHAR(36) to compact UUID storage.
+
+PostgreSQL (online): a new uuid column is added and kept in sync by a trigger
+while existing rows are backfilled in small batches; its unique index is
+built CONCURRENTLY. Only the final swap takes a brief exclusive lock.
+
+SQLite (offline, development only): the table is rebuilt with 16-byte BLOB
+ids in one transaction. Columns the old table does not have yet are left
+NULL.
+
+Existing ids keep their values, so API ids do not change; new campaigns get
+time-ordered ids. Usage:
+
+    python migrate_uuid_keys.py [--batch-size 5000]
+"""
+
+from sqlalchemy import inspect, text
+from models import db, Campaign
+import uuid
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def needs_migration():
+    """True if campaigns.id is still stored as text."""
+    for column in inspect(db.engine).get_columns('campaigns'):
+        if column['name'] == 'id':
+            return 'CHAR' in str(column['type']).upper()
+    return False
+
+
+def _postgres_has_constraint(connection, name):
+    """True if campaigns already has the constraint `name` (from an earlier, interrupted run)."""
+    return connection.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conrelid = 'campaigns'::regclass AND conname = :name"
+    ), {'name': name}).first() is not None
+
+
+def migrate_postgres(batch_size):
+    """Online migration to a native uuid primary key."""
+    engine = db.engine
+
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS id_uuid uuid"))
+        connection.execute(text("""
+            CREATE OR REPLACE FUNCTION campaigns_sync_id_uuid() RETURNS trigger AS $$
+            BEGIN
+                NEW.id_uuid := NEW.id::uuid;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """))
+        connection.execute(text("DROP TRIGGER IF EXISTS campaigns_sync_id_uuid ON campaigns"))
+        connection.execute(text("""
+            CREATE TRIGGER campaigns_sync_id_uuid
+            BEFORE INSERT OR UPDATE OF id ON campaigns
+            FOR EACH ROW EXECUTE FUNCTION campaigns_sync_id_uuid()
+        """))
+    logger.info("Added id_uuid column and sync trigger")
+
+    # Backfill in short transactions so row locks are held only briefly
+    total = 0
+    while True:
+        with engine.begin() as connection:
+            updated = connection.execute(text("""
+                UPDATE campaigns SET id_uuid = id::uuid
+                WHERE ctid IN (
+                    SELECT ctid FROM campaigns WHERE id_uuid IS NULL LIMIT :batch_size
+                )
+            """), {'batch_size': batch_size}).rowcount
+        total += updated
+        if updated:
+            logger.info("Backfilled %s rows", total)
+        if updated < batch_size:
+            break
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text("DROP INDEX CONCURRENTLY IF EXISTS campaigns_id_uuid_key"))
+        connection.execute(text(
+            "CREATE UNIQUE INDEX CONCURRENTLY campaigns_id_uuid_key ON campaigns (id_uuid)"
+        ))
+        # A validated CHECK lets SET NOT NULL / PRIMARY KEY skip the table scan
+        if not _postgres_has_constraint(connection, 'campaigns_id_uuid_not_null'):
+            connection.execute(text(
+                "ALTER TABLE campaigns ADD CONSTRAINT campaigns_id_uuid_not_null "
+                "CHECK (id_uuid IS NOT NULL) NOT VALID"
+            ))
+        connection.execute(text("ALTER TABLE campaigns VALIDATE CONSTRAINT campaigns_id_uuid_not_null"))
+    logger.info("Built unique index on id_uuid")
+
+    with engine.begin() as connection:
+        connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+        connection.execute(text("LOCK TABLE campaigns IN ACCESS EXCLUSIVE MODE"))
+        connection.execute(text("DROP TRIGGER campaigns_sync_id_uuid ON campaigns"))
+        connection.execute(text("DROP FUNCTION campaigns_sync_id_uuid()"))
+        connection.execute(text("ALTER TABLE campaigns DROP CONSTRAINT campaigns_pkey"))
+        connection.execute(text("ALTER TABLE campaigns DROP COLUMN id"))
+        connection.execute(text("ALTER TABLE campaigns RENAME COLUMN id_uuid TO id"))
+        connection.execute(text("ALTER TABLE campaigns ALTER COLUMN id SET NOT NULL"))
+        connection.execute(text("ALTER TABLE campaigns DROP CONSTRAINT campaigns_id_uuid_not_null"))
+        connection.execute(text(
+            "ALTER TABLE campaigns ADD CONSTRAINT campaigns_pkey PRIMARY KEY USING INDEX campaigns_id_uuid_key"
+        ))
+    logger.info("Swapped campaigns.id to uuid")
+
+
+def migrate_sqlite(batch_size):
+    """Rebuild the campaigns table with BLOB ids."""
+    from search import ensure_search_index, rebuild_search_index
+
+    table = Campaign.__table__
+
+    with db.engine.begin() as connection:
+        # Tables created before later columns were added lack them; those start out NULL
+        existing = {row.name for row in connection.execute(text("PRAGMA table_info(campaigns)"))}
+        columns = [column.name for column in table.columns if column.name in existing]
+
+        for trigger in ('campaigns_fts_insert', 'campaigns_fts_update', 'campaigns_fts_delete'):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        # Index names are global in SQLite, so drop them before recreating the table
+        for index in inspect(connection).get_indexes('campaigns'):
+            connection.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+        connection.execute(text("ALTER TABLE campaigns RENAME TO campaigns_old"))
+        table.create(connection)
+
+        column_list = ', '.join(columns)
+        connection.execute(text(
+            f"INSERT INTO campaigns ({column_list}) SELECT {column_list} FROM campaigns_old"
+        ))
+
+        # Convert text ids to 16-byte blobs in batches
+        converted = 0
+        while True:
+            rows = connection.execute(text(
+                "SELECT rowid, id FROM campaigns WHERE typeof(id) = 'text' LIMIT :limit"
+            ), {'limit': batch_size}).all()
+            if not rows:
+                break
+            connection.execute(
+                text("UPDATE campaigns SET id = :id WHERE rowid = :rowid"),
+                [{'id': uuid.UUID(row.id).bytes, 'rowid': row.rowid} for row in rows]
+            )
+            converted += len(rows)
+            logger.info("Converted %s rows", converted)
+
+        connection.execute(text("DROP TABLE campaigns_old"))
+
+    ensure_search_index()
+    rebuild_search_index()
+    logger.info("Rebuilt campaigns table with BLOB ids")
+
+
+def migrate(batch_size=5000):
+    if not needs_migration():
+        logger.info("campaigns.id already uses compact UUID storage")
+        return
+
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        migrate_postgres(batch_size)
+    elif dialect == 'sqlite':
+        migrate_sqlite(batch_size)
+    else:
+        raise Exception(f"UUID key migration is not supported on {dialect}")
+
+
+if __name__ == '__main__':
+    import sys
+    from app import create_app
+
+    batch_size = 5000
+    if '--batch-size' in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index('--batch-size') + 1])
+
+    with create_app().app_context():
+        migrate(batch_size)
@@ -3,20 +3,140 @@ Database models for the application.
 Defines the Campaign model with all necessary fields.
 """
 
+import os
+import time
 import uuid
 from datetime import datetime
+from urllib.parse import urlparse
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.types import TypeDecorator
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
 
 db = SQLAlchemy()
 
+DEFAULT_DAILY_BUDGET = 50000  # Micros ($50)
+
+# Google Ads limits for responsive display ads
+HEADLINE_MAX_LENGTH = 30
+DESCRIPTION_MAX_LENGTH = 90
+BUSINESS_NAME_MAX_LENGTH = 25
+
+
+def uuid7():
+    """
+    Generate a time-ordered UUID (version 7 layout).
+    
+    The first 48 bits are the Unix time in milliseconds, so new keys sort
+    after existing ones and inserts land at the right edge of the index.
+    """
+    value = (int(time.time() * 1000) & 0xFFFFFFFFFFFF) << 80
+    value |= int.from_bytes(os.urandom(10), 'big') & ((1 << 80) - 1)
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # Version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+class CompactUUID(TypeDecorator):
+    """
+    UUID stored natively on PostgreSQL and as a 16-byte BLOB elsewhere.
+    
+    Python values stay canonical strings, so the API representation is
+    unchanged.
+    """
+    
+    impl = db.LargeBinary(16)
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(PostgresUUID(as_uuid=True))
+        return dialect.type_descriptor(db.LargeBinary(16))
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            try:
+                value = uuid.UUID(bytes=value) if isinstance(value, bytes) else uuid.UUID(str(value))
+            except ValueError:
+                return None  # Malformed ids match nothing (lookups return 404)
+        return value if dialect.name == 'postgresql' else value.bytes
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            return str(uuid.UUID(bytes=value))
+        return str(value)
+
+
+class CustomerAccount(db.Model):
+    """Google Ads client account managed through the manager (MCC) account."""
+    
+    __tablename__ = 'customer_accounts'
+    
+    customer_id = db.Column(db.String(20), primary_key=True)  # Digits only
+    name = db.Column(db.String(255), nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CustomerAccount {self.customer_id} ({self.name})>'
+    
+    def to_dict(self):
+        """Convert account to dictionary for JSON serialization."""
+        return {
+            'customer_id': self.customer_id,
+            'name': self.name,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+    
+    @staticmethod
+    def normalize_id(customer_id):
+        """Strip dashes/whitespace from a customer ID (e.g. 123-456-7890)."""
+        return str(customer_id).replace('-', '').strip() if customer_id else None
+
+
+class AccountQuotaUsage(db.Model):
+    """Google Ads operations used per account and day, shared by every worker (see accounts.py)."""
+    
+    __tablename__ = 'account_quota_usage'
+    
+    customer_id = db.Column(db.String(20), primary_key=True)
+    usage_date = db.Column(db.Date, primary_key=True)
+    operations = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<AccountQuotaUsage {self.customer_id} {self.usage_date}: {self.operations}>'
+
 
 class Campaign(db.Model):
     """Campaign model representing a marketing campaign."""
     
     __tablename__ = 'campaigns'
+    __table_args__ = (
+        # Used by the scheduler to find due drafts and expired campaigns
+        db.Index('ix_campaigns_status_start_date', 'status', 'start_date'),
+        db.Index('ix_campaigns_status_end_date', 'status', 'end_date'),
+        # Used by the archiver (see archive.py)
+        db.Index('ix_campaigns_end_date', 'end_date'),
+        db.Index('ix_campaigns_archived_at', 'archived_at',
+                 postgresql_where=db.text('archived_at IS NOT NULL'),
+                 sqlite_where=db.text('archived_at IS NOT NULL')),
+    )
     
     # Primary key
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(CompactUUID, primary_key=True, default=lambda: str(uuid7()))
+    
+    # Google Ads account (NULL means the default GOOGLE_ADS_CUSTOMER_ID)
+    customer_id = db.Column(db.String(20), db.ForeignKey('customer_accounts.customer_id'), nullable=True, index=True)
     
     # Campaign basic information
     name = db.Column(db.String(255), nullable=False)
@@ -25,12 +145,20 @@ class Campaign(db.Model):
     
     # Budget and dates
     daily_budget = db.Column(db.Integer)  # Budget in micros (e.g., 50000 = $50)
+    budget_group = db.Column(db.String(100), nullable=True)  # Shares a budget with the same group/amount
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
     
     # Status tracking
     status = db.Column(db.String(20), default='DRAFT')  # DRAFT, PUBLISHED, PAUSED
     google_campaign_id = db.Column(db.String(100), unique=True, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=True)  # Set = hidden from lists, moved to the archive soon
+    restored_at = db.Column(db.DateTime, nullable=True)  # Set = kept out of end_date auto-archiving
+    
+    # Last status read back from Google Ads (see status_refresh.py)
+    remote_status = db.Column(db.String(20), nullable=True)  # ENABLED, PAUSED, REMOVED, UNKNOWN
+    serving_status = db.Column(db.String(20), nullable=True)  # SERVING, ENDED, PENDING, SUSPENDED, NONE
+    status_checked_at = db.Column(db.DateTime, nullable=True)
     
     # Ad group and creative details
     ad_group_name = db.Column(db.String(255))
@@ -49,14 +177,20 @@ class Campaign(db.Model):
         """Convert campaign to dictionary for JSON serialization."""
         return {
             'id': self.id,
+            'customer_id': self.customer_id,
             'name': self.name,
             'objective': self.objective,
             'campaign_type': self.campaign_type,
             'daily_budget': self.daily_budget,
+            'budget_group': self.budget_group,
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'status': self.status,
             'google_campaign_id': self.google_campaign_id,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None,
+            'remote_status': self.remote_status,
+            'serving_status': self.serving_status,
+            'status_checked_at': self.status_checked_at.isoformat() if self.status_checked_at else None,
             'ad_group_name': self.ad_group_name,
             'ad_headline': self.ad_headline,
             'ad_description': self.ad_description,
@@ -65,6 +199,30 @@ class Campaign(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
     
+    def to_google_ads_data(self, session=None):
+        """Build the campaign data dictionary expected by GoogleAdsService."""
+        return self.build_google_ads_data(SharedBudget.find_resource_name(
+            self.customer_id, self.budget_group, self.daily_budget or DEFAULT_DAILY_BUDGET, session=session
+        ))
+    
+    def build_google_ads_data(self, budget_resource_name):
+        """Same as to_google_ads_data, with the shared budget already looked up."""
+        daily_budget = self.daily_budget or DEFAULT_DAILY_BUDGET
+        return {
+            'name': self.name,
+            'objective': self.objective,
+            'campaign_type': self.campaign_type,
+            'daily_budget': daily_budget,
+            'budget_group': self.budget_group,
+            'budget_resource_name': budget_resource_name,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'ad_group_name': self.ad_group_name or 'Main Ad Group',
+            'ad_headline': self.ad_headline or 'Default Headline',
+            'ad_description': self.ad_description or 'Default Description',
+            'asset_url': self.asset_url
+        }
+    
     @staticmethod
     def validate_campaign_data(data):
         """Validate campaign data before creation/update."""
@@ -75,6 +233,9 @@ class Campaign(db.Model):
             errors.append('Campaign name is required')
         
         # Budget validation
+        if data.get('budget_group') is not None and len(str(data['budget_group'])) > 100:
+            errors.append('Budget group must be at most 100 characters')
+        
         if data.get('daily_budget') is not None:
             try:
                 budget = int(data['daily_budget'])
@@ -98,3 +259,206 @@ class Campaign(db.Model):
                 errors.append('Invalid date format')
         
         return errors
+    
+    @staticmethod
+    def validate_publish_data(campaign_data, today):
+        """
+        Check data built by to_google_ads_data against Google Ads limits, so
+        a draft that would be rejected is caught before any remote call.
+        
+        Args:
+            campaign_data (dict): Output of to_google_ads_data
+            today (date): Reference date for the start/end date checks
+            
+        Returns:
+            list: Error messages (empty if the campaign can be published)
+        """
+        errors = []
+        
+        # The campaign name doubles as the ad's business name
+        if len(campaign_data['name']) > BUSINESS_NAME_MAX_LENGTH:
+            errors.append(f'Campaign name is used as the business name and must be at most {BUSINESS_NAME_MAX_LENGTH} characters')
+        
+        if len(campaign_data['ad_headline']) > HEADLINE_MAX_LENGTH:
+            errors.append(f'Ad headline must be at most {HEADLINE_MAX_LENGTH} characters')
+        
+        if len(campaign_data['ad_description']) > DESCRIPTION_MAX_LENGTH:
+            errors.append(f'Ad description must be at most {DESCRIPTION_MAX_LENGTH} characters')
+        
+        asset_url = campaign_data.get('asset_url')
+        if not asset_url:
+            errors.append('Final URL (asset_url) is required to publish')
+        else:
+            url = urlparse(asset_url)
+            if url.scheme not in ('http', 'https') or not url.netloc:
+                errors.append('Final URL must be an absolute http(s) URL')
+        
+        if campaign_data['daily_budget'] < Config.MIN_DAILY_BUDGET_MICROS:
+            errors.append(f'Daily budget must be at least {Config.MIN_DAILY_BUDGET_MICROS} micros')
+        
+        start_date = campaign_data.get('start_date')
+        end_date = campaign_data.get('end_date')
+        if start_date and start_date < today:
+            errors.append('Start date is in the past')
+        if end_date and end_date < today:
+            errors.append('End date is in the past')
+        if start_date and end_date and end_date < start_date:
+            errors.append('End date must be after start date')
+        
+        return errors
+
+
+class ArchivedCampaign(db.Model):
+    """
+    Campaign moved out of the hot campaigns table by the archiver.
+    
+    On PostgreSQL the table is range-partitioned by archived_at, one
+    partition per year (created by the archiver as needed).
+    """
+    
+    __tablename__ = 'campaigns_archive'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (archived_at)'}
+    
+    # The partition key must be part of the primary key
+    id = db.Column(CompactUUID, primary_key=True)
+    archived_at = db.Column(db.DateTime, primary_key=True)
+    
+    customer_id = db.Column(db.String(20), nullable=True, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    objective = db.Column(db.String(50))
+    campaign_type = db.Column(db.String(50))
+    daily_budget = db.Column(db.Integer)
+    budget_group = db.Column(db.String(100), nullable=True)
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    status = db.Column(db.String(20))  # Status at the time it was archived
+    google_campaign_id = db.Column(db.String(100), nullable=True, index=True)
+    remote_status = db.Column(db.String(20), nullable=True)
+    serving_status = db.Column(db.String(20), nullable=True)
+    status_checked_at = db.Column(db.DateTime, nullable=True)
+    ad_group_name = db.Column(db.String(255))
+    ad_headline = db.Column(db.String(500))
+    ad_description = db.Column(db.Text)
+    asset_url = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ArchivedCampaign {self.name} ({self.status})>'
+    
+    def to_dict(self):
+        """Same shape as Campaign.to_dict (archived_at is always set)."""
+        return Campaign.to_dict(self)
+
+
+class SharedBudget(db.Model):
+    """Explicitly shared Google Ads budget, cached per budget group and amount."""
+    
+    __tablename__ = 'budgets'
+    __table_args__ = (
+        db.UniqueConstraint('customer_id', 'budget_group', 'amount_micros', name='uq_budgets_customer_group_amount'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.String(20), nullable=False, default='')  # '' is the default account
+    budget_group = db.Column(db.String(100), nullable=False)
+    amount_micros = db.Column(db.Integer, nullable=False)
+    resource_name = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SharedBudget {self.budget_group} ({self.amount_micros})>'
+    
+    @staticmethod
+    def find_resource_name(customer_id, budget_group, amount_micros, session=None):
+        """
+        Return the cached budget resource name, or None if not created yet.
+        
+        Args:
+            session: Session to read with (defaults to db.session)
+        """
+        if not budget_group:
+            return None
+        session = session or db.session
+        return session.query(SharedBudget.resource_name).filter_by(
+            customer_id=customer_id or '',
+            budget_group=budget_group,
+            amount_micros=amount_micros
+        ).scalar()
+    
+    @staticmethod
+    def remember(customer_id, budget_group, amount_micros, resource_name, session=None):
+        """
+        Cache a shared budget created in Google Ads (no-op if already known).
+        
+        Concurrent publishes in the same group may both get here, so the
+        insert skips an existing row instead of failing on the unique
+        constraint. It runs in a savepoint and never raises: the campaign
+        already exists remotely, and losing the cache entry only costs a
+        new budget on a later publish.
+        
+        Args:
+            session: Session to write with (defaults to db.session)
+        """
+        if not budget_group or not resource_name:
+            return
+        session = session or db.session
+        dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+        statement = dialect.insert(SharedBudget.__table__).values(
+            customer_id=customer_id or '',
+            budget_group=budget_group,
+            amount_micros=amount_micros,
+            resource_name=resource_name,
+            created_at=datetime.utcnow()
+        ).on_conflict_do_nothing(index_elements=['customer_id', 'budget_group', 'amount_micros'])
+        try:
+            with session.begin_nested():
+                session.execute(statement)
+        except SQLAlchemyError as e:
+            logger.warning("Could not cache shared budget %s for group %s: %s", resource_name, budget_group, e)
+
+
+class CampaignSummary(db.Model):
+    """Rollup of campaign counts and budgets per (status, objective, campaign_type)."""
+    
+    __tablename__ = 'campaign_summary'
+    
+    # Empty string stands in for NULL so every group has a unique key
+    status = db.Column(db.String(20), primary_key=True)
+    objective = db.Column(db.String(50), primary_key=True)
+    campaign_type = db.Column(db.String(50), primary_key=True)
+    
+    campaign_count = db.Column(db.Integer, nullable=False, default=0)
+    total_daily_budget = db.Column(db.BigInteger, nullable=False, default=0)  # Micros
+    
+    def __repr__(self):
+        return f'<CampaignSummary {self.status}/{self.objective}/{self.campaign_type}: {self.campaign_count}>'
+
+
+class CampaignChange(db.Model):
+    """Append-only log of campaign changes, read by the SSE change feed."""
+    
+    __tablename__ = 'campaign_changes'
+    # SQLite would otherwise reuse ids once pruning empties the log, moving cursors backwards
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    # Monotonically increasing cursor
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    campaign_id = db.Column(db.String(36), nullable=False)
+    action = db.Column(db.String(10), nullable=False)  # create, update, delete
+    payload = db.Column(db.JSON)  # Full campaign on create, changed fields on update
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<CampaignChange {self.id} {self.action} {self.campaign_id}>'
+    
+    def to_dict(self):
+        """Convert change to the delta format sent to clients."""
+        delta = {
+            'cursor': self.id,
+            'action': self.action,
+            'id': self.campaign_id,
+        }
+        if self.payload is not None:
+            delta['campaign'] = self.payload
+        return delta
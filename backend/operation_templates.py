@@ -0,0 +1,152 @@
+"""
+Cached Google Ads client lookups and operation templates.
+GoogleAdsClient.get_service opens a new gRPC channel on every call,
+client.enums resolves the enum module on every attribute access, and
+filling proto-plus messages field by field goes through its marshal layer.
+For batch work (validation, bulk pause) those costs dominate.
+
+OperationTemplates keeps, per client:
+- service stubs, created once
+- enum values, resolved once
+- prototype operations with the constant fields (channel type, bidding
+  strategy, statuses, ...) already set. Builders copy a prototype and fill
+  in the remaining fields on the underlying protobuf message, then wrap it
+  back into proto-plus.
+
+Resource names are built with plain string formatting instead of the path
+helpers on service stubs.
+"""
+
+import threading
+
+
+def campaign_path(customer_id, campaign_id):
+    return f"customers/{customer_id}/campaigns/{campaign_id}"
+
+
+def campaign_budget_path(customer_id, budget_id):
+    return f"customers/{customer_id}/campaignBudgets/{budget_id}"
+
+
+def ad_group_path(customer_id, ad_group_id):
+    return f"customers/{customer_id}/adGroups/{ad_group_id}"
+
+
+def ad_group_ad_path(customer_id, ad_group_id, ad_id):
+    return f"customers/{customer_id}/adGroupAds/{ad_group_id}~{ad_id}"
+
+
+class OperationTemplates:
+    """Service stubs, enum values and operation prototypes of one GoogleAdsClient."""
+
+    def __init__(self, client):
+        """
+        Args:
+            client (GoogleAdsClient): Initialized client (use_proto_plus=True)
+        """
+        self.client = client
+        self._services = {}
+        self._classes = {}
+        self._enums = {}
+        self._lock = threading.Lock()
+
+        # Prototypes: (proto-plus class, protobuf message with constant fields set)
+        self._prototypes = {}
+        self._add_prototype('campaign', 'CampaignOperation', self._init_campaign)
+        self._add_prototype('campaign_budget', 'CampaignBudgetOperation', self._init_campaign_budget)
+        self._add_prototype('ad_group', 'AdGroupOperation', self._init_ad_group)
+        self._add_prototype('ad_group_ad', 'AdGroupAdOperation', self._init_ad_group_ad)
+        self._add_prototype('pause', 'CampaignOperation', self._init_pause)
+        self._add_prototype('mutate', 'MutateOperation', None)
+
+    def service(self, name):
+        """Service stub, created on first use and shared afterwards."""
+        stub = self._services.get(name)
+        if stub is None:
+            with self._lock:
+                stub = self._services.get(name)
+                if stub is None:
+                    stub = self._services[name] = self.client.get_service(name)
+        return stub
+
+    def message_class(self, name):
+        """Proto-plus class of a message type, e.g. "GoogleAdsFailure"."""
+        message_class = self._classes.get(name)
+        if message_class is None:
+            message_class = self._classes[name] = type(self.client.get_type(name))
+        return message_class
+
+    def enum(self, enum_name, value_name):
+        """Enum value, e.g. enum("CampaignStatusEnum", "PAUSED")."""
+        key = (enum_name, value_name)
+        value = self._enums.get(key)
+        if value is None:
+            value = self._enums[key] = getattr(getattr(self.client.enums, enum_name), value_name)
+        return value
+
+    def new(self, template):
+        """
+        Fresh copy of a prototype as a raw protobuf message, to fill in.
+
+        Args:
+            template (str): campaign, campaign_budget, ad_group, ad_group_ad,
+                            pause or mutate
+
+        Returns:
+            protobuf message; pass it to wrap() when done
+        """
+        prototype = self._prototypes[template][1]
+        message = type(prototype)()
+        message.CopyFrom(prototype)
+        return message
+
+    def wrap(self, template, message):
+        """Proto-plus view of a message from new() (no copy)."""
+        return self._prototypes[template][0].wrap(message)
+
+    def _add_prototype(self, template, type_name, init):
+        message_class = self.message_class(type_name)
+        message = message_class.pb()()
+        if init:
+            init(message)
+        self._prototypes[template] = (message_class, message)
+
+    def _init_campaign(self, operation):
+        campaign = operation.create
+        campaign.advertising_channel_type = self.enum('AdvertisingChannelTypeEnum', 'DEMAND_GEN')
+        # Maximize Conversions without a target CPA
+        campaign.maximize_conversions.SetInParent()
+
+    def _init_campaign_budget(self, operation):
+        operation.create.delivery_method = self.enum('BudgetDeliveryMethodEnum', 'STANDARD')
+
+    def _init_ad_group(self, operation):
+        ad_group = operation.create
+        ad_group.status = self.enum('AdGroupStatusEnum', 'ENABLED')
+        ad_group.type_ = self.enum('AdGroupTypeEnum', 'DISPLAY_STANDARD')
+
+    def _init_ad_group_ad(self, operation):
+        operation.create.status = self.enum('AdGroupAdStatusEnum', 'ENABLED')
+
+    def _init_pause(self, operation):
+        operation.update.status = self.enum('CampaignStatusEnum', 'PAUSED')
+        operation.update_mask.paths.append('status')
+
+
+_templates_lock = threading.Lock()
+
+
+def get_templates(client):
+    """
+    OperationTemplates shared by every service using `client`.
+
+    They are kept on the client itself, so the cached stubs and their gRPC
+    channels are released together with it.
+    """
+    templates = getattr(client, '_operation_templates', None)
+    if templates is None:
+        with _templates_lock:
+            templates = getattr(client, '_operation_templates', None)
+            if templates is None:
+                templates = client._operation_templates = OperationTemplates(client)
+    return templates
@@ -3,11 +3,19 @@ API routes for campaign management.
 Defines all REST endpoints for CRUD operations and Google Ads publishing.
 """
 
-from flask import Blueprint, request, jsonify
-from models import db, Campaign
-from google_ads_service import GoogleAdsService
-from config import Config
-from datetime import datetime
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from models import db
+from accounts import get_account_pool, publish_operation_count
+from search import search_campaigns
+from summary import get_campaign_summary
+from changes import latest_cursor, stream_changes
+from compression import CompressedResponseCache, negotiate_encoding
+from archive import all_campaigns_query, campaign_page, restore_campaign
+from validation import validate_drafts
+from health import legacy_health, liveness
+from status_refresh import campaign_statuses, refresh_campaign_statuses
+import campaign_actions
+from campaign_actions import CampaignActionError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,31 +23,172 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 api = Blueprint('api', __name__, url_prefix='/api')
 
+# Serialized (and compressed) campaign lists, keyed by change-log cursor
+campaign_list_cache = CompressedResponseCache()
+
+
+@api.route('/accounts', methods=['GET'])
+def get_accounts():
+    """Get managed Google Ads client accounts with today's operation usage."""
+    try:
+        usage = get_account_pool().usage()
+        accounts = campaign_actions.list_accounts()
+        return jsonify({
+            'accounts': [
+                dict(account.to_dict(), operations_today=usage.get(account.customer_id, 0))
+                for account in accounts
+            ]
+        }), 200
+    except Exception as e:
+        logger.error("Error fetching accounts: %s", e)
+        return jsonify({'error': 'Failed to fetch accounts'}), 500
+
+
+@api.route('/accounts', methods=['POST'])
+def create_account():
+    """Register (or update) a client account under the manager account."""
+    try:
+        account, created = campaign_actions.save_account(request.get_json() or {})
+        db.session.commit()
+        
+        logger.info("%s customer account: %s", 'Created' if created else 'Updated', account.customer_id)
+        return jsonify({
+            'message': 'Account saved successfully',
+            'account': account.to_dict()
+        }), 201 if created else 200
+        
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error saving account: %s", e)
+        return jsonify({'error': f'Failed to save account: {str(e)}'}), 500
+
 
 @api.route('/campaigns', methods=['GET'])
 def get_campaigns():
-    """Get all campaigns from the database."""
+    """
+    Get campaigns from the database.
+    Only live campaigns are returned unless include_archived=true is passed;
+    that list is paged (limit, page) since the archive grows without bound.
+    """
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    page_token = request.args.get('page')
     try:
-        campaigns = Campaign.query.order_by(Campaign.created_at.desc()).all()
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    
+    try:
+        # Read the cursor first so no change between the two queries is missed.
+        # It also versions the table (archiving logs a delete), so unchanged
+        # lists are served from cache.
+        cursor = latest_cursor()
+        # Weak: one tag covers the identity and every compressed body
+        etag = f"campaigns-all-{cursor}-{limit}-{page_token or ''}" if include_archived else f"campaigns-{cursor}"
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.vary.add('Accept-Encoding')
+            return response
+        
+        if include_archived:
+            try:
+                statement = all_campaigns_query(limit, page_token)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            campaigns, next_page = campaign_page(db.session.execute(statement).all(), limit)
+            response = jsonify({'campaigns': campaigns, 'cursor': cursor, 'next_page': next_page})
+            response.set_etag(etag, weak=True)
+            response.vary.add('Accept-Encoding')
+            return response
+        
+        def build_body():
+            campaigns = campaign_actions.live_campaigns()
+            return current_app.json.dumps({
+                'campaigns': [campaign.to_dict() for campaign in campaigns],
+                'cursor': cursor
+            }).encode('utf-8')
+        
+        body, encoding = campaign_list_cache.get(cursor, negotiate_encoding(), build_body)
+        response = Response(body, status=200, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    except Exception as e:
+        logger.error("Error fetching campaigns: %s", e)
+        return jsonify({'error': 'Failed to fetch campaigns'}), 500
+
+
+@api.route('/campaigns/search', methods=['GET'])
+def search():
+    """Full-text search over campaign names and creatives, ranked by relevance."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    
+    try:
+        campaigns, next_cursor = search_campaigns(query, limit, request.args.get('cursor'))
         return jsonify({
-            'campaigns': [campaign.to_dict() for campaign in campaigns]
+            'campaigns': [campaign.to_dict() for campaign in campaigns],
+            'next_cursor': next_cursor
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f"Error fetching campaigns: {str(e)}")
-        return jsonify({'error': 'Failed to fetch campaigns'}), 500
+        logger.error("Error searching campaigns: %s", e)
+        return jsonify({'error': 'Failed to search campaigns'}), 500
+
+
+@api.route('/campaigns/summary', methods=['GET'])
+def campaign_summary():
+    """Get campaign counts by status, objective and type from the rollup table."""
+    try:
+        return jsonify(get_campaign_summary()), 200
+    except Exception as e:
+        logger.error("Error fetching campaign summary: %s", e)
+        return jsonify({'error': 'Failed to fetch campaign summary'}), 500
+
+
+@api.route('/campaigns/changes', methods=['GET'])
+def campaign_changes():
+    """
+    Server-Sent Events stream of campaign create/update/delete deltas.
+    Pass since=<cursor> (or Last-Event-ID on reconnect) to replay missed changes.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'since must be a change cursor'}), 400
+    
+    feed = current_app.extensions['change_feed']
+    return Response(
+        stream_with_context(stream_changes(feed, since)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @api.route('/campaigns/<campaign_id>', methods=['GET'])
 def get_campaign(campaign_id):
     """Get a specific campaign by ID."""
     try:
-        campaign = Campaign.query.get(campaign_id)
-        if not campaign:
-            return jsonify({'error': 'Campaign not found'}), 404
-        
+        campaign = campaign_actions.find_campaign(campaign_id)
         return jsonify(campaign.to_dict()), 200
+    except CampaignActionError as e:
+        return jsonify(e.body), e.status
     except Exception as e:
-        logger.error(f"Error fetching campaign: {str(e)}")
+        logger.error("Error fetching campaign: %s", e)
         return jsonify({'error': 'Failed to fetch campaign'}), 500
 
 
@@ -47,43 +196,21 @@ def get_campaign(campaign_id):
 def create_campaign():
     """Create a new campaign in the local database."""
     try:
-        data = request.get_json()
-        
-        # Validate input data
-        validation_errors = Campaign.validate_campaign_data(data)
-        if validation_errors:
-            return jsonify({
-                'error': 'Validation failed',
-                'details': validation_errors
-            }), 400
-        
-        # Create new campaign
-        campaign = Campaign(
-            name=data.get('name'),
-            objective=data.get('objective'),
-            campaign_type=data.get('campaign_type', 'DEMAND_GEN'),
-            daily_budget=data.get('daily_budget'),
-            start_date=datetime.fromisoformat(data['start_date']) if data.get('start_date') else None,
-            end_date=datetime.fromisoformat(data['end_date']) if data.get('end_date') else None,
-            ad_group_name=data.get('ad_group_name'),
-            ad_headline=data.get('ad_headline'),
-            ad_description=data.get('ad_description'),
-            asset_url=data.get('asset_url'),
-            status='DRAFT'
-        )
-        
-        db.session.add(campaign)
+        campaign = campaign_actions.create_campaign(request.get_json())
         db.session.commit()
         
-        logger.info(f"Created campaign: {campaign.id}")
+        logger.info("Created campaign: %s", campaign.id)
         return jsonify({
             'message': 'Campaign created successfully',
             'campaign': campaign.to_dict()
         }), 201
         
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error creating campaign: {str(e)}")
+        logger.error("Error creating campaign: %s", e)
         return jsonify({'error': f'Failed to create campaign: {str(e)}'}), 500
 
 
@@ -91,61 +218,21 @@ def create_campaign():
 def update_campaign(campaign_id):
     """Update an existing campaign."""
     try:
-        campaign = Campaign.query.get(campaign_id)
-        if not campaign:
-            return jsonify({'error': 'Campaign not found'}), 404
-        
-        # Don't allow updating published campaigns
-        if campaign.status == 'PUBLISHED':
-            return jsonify({
-                'error': 'Cannot update published campaign. Create a new one instead.'
-            }), 400
-        
-        data = request.get_json()
-        
-        # Validate input data
-        validation_errors = Campaign.validate_campaign_data(data)
-        if validation_errors:
-            return jsonify({
-                'error': 'Validation failed',
-                'details': validation_errors
-            }), 400
-        
-        # Update fields
-        if 'name' in data:
-            campaign.name = data['name']
-        if 'objective' in data:
-            campaign.objective = data['objective']
-        if 'campaign_type' in data:
-            campaign.campaign_type = data['campaign_type']
-        if 'daily_budget' in data:
-            campaign.daily_budget = data['daily_budget']
-        if 'start_date' in data:
-            campaign.start_date = datetime.fromisoformat(data['start_date']) if data['start_date'] else None
-        if 'end_date' in data:
-            campaign.end_date = datetime.fromisoformat(data['end_date']) if data['end_date'] else None
-        if 'ad_group_name' in data:
-            campaign.ad_group_name = data['ad_group_name']
-        if 'ad_headline' in data:
-            campaign.ad_headline = data['ad_headline']
-        if 'ad_description' in data:
-            campaign.ad_description = data['ad_description']
-        if 'asset_url' in data:
-            campaign.asset_url = data['asset_url']
-        
-        campaign.updated_at = datetime.utcnow()
-        
+        campaign = campaign_actions.update_campaign(campaign_id, request.get_json())
         db.session.commit()
         
-        logger.info(f"Updated campaign: {campaign.id}")
+        logger.info("Updated campaign: %s", campaign.id)
         return jsonify({
             'message': 'Campaign updated successfully',
             'campaign': campaign.to_dict()
         }), 200
         
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error updating campaign: {str(e)}")
+        logger.error("Error updating campaign: %s", e)
         return jsonify({'error': f'Failed to update campaign: {str(e)}'}), 500
 
 
@@ -153,79 +240,115 @@ def update_campaign(campaign_id):
 def delete_campaign(campaign_id):
     """Delete a campaign from the database."""
     try:
-        campaign = Campaign.query.get(campaign_id)
-        if not campaign:
-            return jsonify({'error': 'Campaign not found'}), 404
-        
-        # Warn if deleting published campaign
-        if campaign.status == 'PUBLISHED':
-            logger.warning(f"Deleting published campaign: {campaign.id}")
-        
-        db.session.delete(campaign)
+        campaign_actions.delete_campaign(campaign_id)
         db.session.commit()
         
-        logger.info(f"Deleted campaign: {campaign_id}")
+        logger.info("Deleted campaign: %s", campaign_id)
         return jsonify({'message': 'Campaign deleted successfully'}), 200
         
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting campaign: {str(e)}")
+        logger.error("Error deleting campaign: %s", e)
         return jsonify({'error': 'Failed to delete campaign'}), 500
 
 
-@api.route('/campaigns/<campaign_id>/publish', methods=['POST'])
-def publish_campaign(campaign_id):
-    """Publish a campaign to Google Ads."""
+@api.route('/campaigns/<campaign_id>/archive', methods=['POST'])
+def archive_campaign(campaign_id):
+    """
+    Archive a campaign. It disappears from the campaign list at once and is
+    moved to the archive table on the next archiver run.
+    """
     try:
-        # Get campaign from database
-        campaign = Campaign.query.get(campaign_id)
+        campaign = campaign_actions.archive_campaign(campaign_id)
+        db.session.commit()
+        
+        logger.info("Archived campaign: %s", campaign_id)
+        return jsonify({
+            'message': 'Campaign archived successfully',
+            'campaign': campaign.to_dict()
+        }), 200
+        
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error archiving campaign: %s", e)
+        return jsonify({'error': 'Failed to archive campaign'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/restore', methods=['POST'])
+def restore_archived_campaign(campaign_id):
+    """Bring an archived campaign back to the campaign list."""
+    try:
+        campaign = restore_campaign(campaign_id)
         if not campaign:
             return jsonify({'error': 'Campaign not found'}), 404
+        db.session.commit()
         
-        # Check if already published
-        if campaign.status == 'PUBLISHED':
-            return jsonify({
-                'error': 'Campaign is already published',
-                'google_campaign_id': campaign.google_campaign_id
-            }), 400
-        
-        # Validate Google Ads configuration
-        is_valid, missing_fields = Config.validate_google_ads_config()
-        if not is_valid:
-            return jsonify({
-                'error': 'Google Ads configuration incomplete',
-                'missing_fields': missing_fields
-            }), 500
+        logger.info("Restored campaign: %s", campaign_id)
+        return jsonify({
+            'message': 'Campaign restored successfully',
+            'campaign': campaign.to_dict()
+        }), 200
         
-        # Initialize Google Ads service
-        google_ads_config = Config.get_google_ads_config()
-        ads_service = GoogleAdsService(google_ads_config)
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error restoring campaign: %s", e)
+        return jsonify({'error': 'Failed to restore campaign'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/clone', methods=['POST'])
+def clone_campaign(campaign_id):
+    """
+    Create draft variants of a campaign in one INSERT.
+
+    Body: {"variants": [{field: value}, ...], "matrix": {field: [value, ...]},
+    "publish": false}. With "publish": true the clones are queued for the
+    scheduler's next publish batch.
+    """
+    try:
+        clones, publish = campaign_actions.clone_campaign(campaign_id, request.get_json(silent=True) or {})
+        db.session.commit()
         
-        # Prepare campaign data
-        campaign_data = {
-            'name': campaign.name,
-            'objective': campaign.objective,
-            'campaign_type': campaign.campaign_type,
-            'daily_budget': campaign.daily_budget or 50000,  # Default $50
-            'start_date': campaign.start_date,
-            'end_date': campaign.end_date,
-            'ad_group_name': campaign.ad_group_name or 'Main Ad Group',
-            'ad_headline': campaign.ad_headline or 'Default Headline',
-            'ad_description': campaign.ad_description or 'Default Description',
-            'asset_url': campaign.asset_url
-        }
+        logger.info("Cloned campaign %s into %s variants", campaign_id, len(clones))
+        return jsonify({
+            'message': f'Created {len(clones)} campaign variants',
+            'queued_for_publish': publish,
+            'campaigns': [clone.to_dict() for clone in clones]
+        }), 201
         
-        # Publish to Google Ads
-        result = ads_service.publish_campaign(campaign_data)
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error cloning campaign: %s", e)
+        return jsonify({'error': f'Failed to clone campaign: {str(e)}'}), 500
+
+
+@api.route('/campaigns/<campaign_id>/publish', methods=['POST'])
+def publish_campaign(campaign_id):
+    """Publish a campaign to Google Ads."""
+    try:
+        customer_id, campaign_data = campaign_actions.prepare_publish(campaign_id)
+        # Don't hold the transaction open while waiting on Google Ads
+        db.session.commit()
         
-        # Update campaign in database
-        campaign.google_campaign_id = result['campaign_id']
-        campaign.status = 'PUBLISHED'
-        campaign.updated_at = datetime.utcnow()
+        # Publish to Google Ads in the campaign's account
+        result = get_account_pool().run(
+            customer_id,
+            lambda ads_service: ads_service.publish_campaign(campaign_data),
+            publish_operation_count(campaign_data)
+        )
         
+        campaign_actions.record_publish(campaign_id, customer_id, campaign_data, result)
         db.session.commit()
         
-        logger.info(f"Published campaign {campaign_id} to Google Ads: {result['campaign_id']}")
+        logger.info("Published campaign %s to Google Ads: %s", campaign_id, result['campaign_id'])
         
         return jsonify({
             'message': 'Campaign published successfully',
@@ -235,9 +358,12 @@ def publish_campaign(campaign_id):
             'status': 'PUBLISHED'
         }), 200
         
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error publishing campaign: {str(e)}")
+        logger.error("Error publishing campaign: %s", e)
         return jsonify({
             'error': f'Failed to publish campaign: {str(e)}'
         }), 500
@@ -247,71 +373,107 @@ def publish_campaign(campaign_id):
 def disable_campaign(campaign_id):
     """Disable (pause) a campaign in Google Ads."""
     try:
-        # Get campaign from database
-        campaign = Campaign.query.get(campaign_id)
-        if not campaign:
-            return jsonify({'error': 'Campaign not found'}), 404
-        
-        # Check if published
-        if campaign.status != 'PUBLISHED' or not campaign.google_campaign_id:
-            return jsonify({
-                'error': 'Campaign is not published to Google Ads'
-            }), 400
-        
-        # Validate Google Ads configuration
-        is_valid, missing_fields = Config.validate_google_ads_config()
-        if not is_valid:
-            return jsonify({
-                'error': 'Google Ads configuration incomplete',
-                'missing_fields': missing_fields
-            }), 500
-        
-        # Initialize Google Ads service
-        google_ads_config = Config.get_google_ads_config()
-        ads_service = GoogleAdsService(google_ads_config)
-        
-        # Disable in Google Ads
-        ads_service.disable_campaign(campaign.google_campaign_id)
+        customer_id, google_campaign_id = campaign_actions.prepare_disable(campaign_id)
+        # Don't hold the transaction open while waiting on Google Ads
+        db.session.commit()
         
-        # Update status in database
-        campaign.status = 'PAUSED'
-        campaign.updated_at = datetime.utcnow()
+        # Disable in Google Ads in the campaign's account
+        get_account_pool().run(
+            customer_id,
+            lambda ads_service: ads_service.disable_campaign(google_campaign_id)
+        )
         
+        campaign_actions.record_disable(campaign_id)
         db.session.commit()
         
-        logger.info(f"Disabled campaign {campaign_id} in Google Ads")
+        logger.info("Disabled campaign %s in Google Ads", campaign_id)
         
         return jsonify({
             'message': 'Campaign disabled successfully',
             'status': 'PAUSED'
         }), 200
         
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error disabling campaign: {str(e)}")
+        logger.error("Error disabling campaign: %s", e)
         return jsonify({
             'error': f'Failed to disable campaign: {str(e)}'
         }), 500
 
 
-@api.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint."""
+@api.route('/campaigns/validate', methods=['POST'])
+def validate_campaigns():
+    """
+    Dry-run publishing: check drafts locally and with Google Ads
+    (validate_only) without creating anything.
+
+    Body (optional): {"ids": [...]}; defaults to every draft.
+    """
     try:
-        # Test database connection
-        db.session.execute('SELECT 1')
-        
-        # Check Google Ads config
-        is_valid, missing_fields = Config.validate_google_ads_config()
-        
+        data = request.get_json(silent=True) or {}
+        campaign_ids = data.get('ids')
+        if campaign_ids is not None and not isinstance(campaign_ids, list):
+            return jsonify({'error': 'ids must be a list'}), 400
+
+        return jsonify(validate_drafts(campaign_ids)), 200
+
+    except Exception as e:
+        logger.error("Error validating campaigns: %s", e)
         return jsonify({
-            'status': 'healthy',
-            'database': 'connected',
-            'google_ads_config': 'valid' if is_valid else 'invalid',
-            'missing_config': missing_fields if not is_valid else []
-        }), 200
+            'error': f'Failed to validate campaigns: {str(e)}'
+        }), 500
+
+
+@api.route('/campaigns/refresh-status', methods=['POST'])
+def refresh_campaign_status():
+    """
+    Read serving status back from Google Ads for published campaigns.
+
+    Body (optional): {"ids": [...], "force": false}. Campaigns checked within
+    STATUS_REFRESH_TTL_SECONDS are served from the cached columns.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        campaign_ids = data.get('ids')
+        if campaign_ids is not None and not isinstance(campaign_ids, list):
+            return jsonify({'error': 'ids must be a list'}), 400
+
+        campaign_actions.check_google_ads_config()
+
+        result = refresh_campaign_statuses(campaign_ids, force=bool(data.get('force')))
+        result['campaigns'] = campaign_statuses(campaign_ids)
+
+        return jsonify(result), 200
+
+    except CampaignActionError as e:
+        db.session.rollback()
+        return jsonify(e.body), e.status
     except Exception as e:
+        db.session.rollback()
+        logger.error("Error refreshing campaign status: %s", e)
         return jsonify({
-            'status': 'unhealthy',
-            'error': str(e)
+            'error': f'Failed to refresh campaign status: {str(e)}'
         }), 500
+
+
+@api.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving. Touches no dependency."""
+    return jsonify(liveness()), 200
+
+
+@api.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness from the background prober's last results (see health.py)."""
+    ready, body = current_app.extensions['health_prober'].readiness()
+    return jsonify(body), 200 if ready else 503
+
+
+@api.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint (readiness in the original response shape)."""
+    ready, body = current_app.extensions['health_prober'].readiness()
+    return jsonify(legacy_health(ready, body)), 200 if ready else 503
@@ -0,0 +1,342 @@
+"""
+Campaign scheduler.
+Publishes DRAFT campaigns once their start_date is reached, pauses
+published campaigns whose end_date has passed, moves old campaigns to
+the archive table and prunes the change log.
+
+Runs inside the Flask process when SCHEDULER_ENABLED=true, or as a
+standalone worker:
+
+    python scheduler.py          # run until interrupted
+    python scheduler.py --once   # run a single tick and exit
+
+Only one replica does the work at a time: on PostgreSQL the scheduler holds
+a session-level advisory lock for as long as it is the leader.
+"""
+
+from datetime import date, datetime
+from sqlalchemy import text, tuple_
+from models import db, Campaign, SharedBudget
+from accounts import FanOutJob, get_account_pool, publish_operation_count
+from config import Config
+from summary import record_bulk_status_change
+from changes import prune_changes, record_bulk_changes
+from archive import archive_campaigns
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignScheduler:
+    """Periodically publishes due drafts, pauses expired campaigns and archives old ones."""
+
+    def __init__(self, app, interval=None, batch_size=None, max_workers=None, lock_id=None):
+        """
+        Args:
+            app (Flask): Application used to provide an app context
+            interval (int): Seconds between ticks
+            batch_size (int): Campaigns loaded and processed per batch
+            max_workers (int): Concurrent Google Ads calls per batch, across accounts
+            lock_id (int): PostgreSQL advisory lock key used for leader election
+        """
+        self.app = app
+        self.interval = interval or Config.SCHEDULER_INTERVAL_SECONDS
+        self.batch_size = batch_size or Config.SCHEDULER_BATCH_SIZE
+        self.max_workers = max_workers or Config.SCHEDULER_MAX_WORKERS
+        self.lock_id = lock_id or Config.SCHEDULER_LOCK_ID
+        self._lock_connection = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run the scheduler loop in a background daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever, name='campaign-scheduler', daemon=True
+        )
+        self._thread.start()
+        logger.info("Campaign scheduler started (interval=%ss)", self.interval)
+
+    def stop(self):
+        """Stop the background loop and give up leadership."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        with self.app.app_context():
+            self._release_leadership()
+
+    def run_forever(self):
+        """Tick until stopped. Errors in one tick never kill the loop."""
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Scheduler tick failed: %s", e)
+            self._stop_event.wait(self.interval)
+
+    def run_once(self, today=None):
+        """
+        Run a single scheduler tick.
+
+        Due work is selected with `<= today` / `< today` rather than by
+        matching the current tick, so anything missed while no scheduler was
+        running is caught up on the next tick.
+
+        Archiving and change-log pruning only touch the database, so they
+        run even when the Google Ads configuration is incomplete.
+
+        Returns:
+            dict: Counts of published, failed, paused and archived campaigns
+                  and pruned change-log rows, or None if another replica
+                  holds the leader lock
+        """
+        today = today or date.today()
+
+        with self.app.app_context():
+            if not self._acquire_leadership():
+                logger.debug("Scheduler lock held by another replica, skipping tick")
+                return None
+
+            result = {'published': 0, 'failed': 0, 'paused': 0}
+            is_valid, missing_fields = Config.validate_google_ads_config()
+            if is_valid:
+                account_pool = get_account_pool()
+                result['published'], result['failed'] = self.publish_due_campaigns(account_pool, today)
+                result['paused'] = self.pause_expired_campaigns(account_pool, today)
+            else:
+                logger.warning("Publishing skipped: Google Ads configuration incomplete. Missing: %s", missing_fields)
+
+            result['archived'] = archive_campaigns(today, stop_event=self._stop_event)
+            result['pruned_changes'] = prune_changes()
+            return result
+
+    def publish_due_campaigns(self, account_pool, today):
+        """
+        Publish DRAFT campaigns whose start_date has been reached.
+
+        Batches are walked with a (start_date, id) keyset so that campaigns
+        failing to publish are retried on the next tick instead of being
+        picked up again in this one. Each batch is fanned out across the
+        campaigns' Google Ads accounts.
+
+        Each campaign is committed as soon as its publish returns. Flushing
+        a campaign takes the change-log lock (see changes.py) until commit,
+        so a batch-wide transaction would hold it across the remaining
+        Google Ads calls and block every other campaign write.
+
+        Returns:
+            tuple: (number published, number failed)
+        """
+        published = 0
+        failed = 0
+        last_key = None
+
+        while not self._stop_event.is_set():
+            query = Campaign.query.filter(
+                Campaign.status == 'DRAFT',
+                Campaign.start_date.isnot(None),
+                Campaign.start_date <= today
+            )
+            if last_key is not None:
+                query = query.filter(tuple_(Campaign.start_date, Campaign.id) > last_key)
+            batch = query.order_by(Campaign.start_date, Campaign.id).limit(self.batch_size).all()
+            if not batch:
+                break
+            last_key = (batch[-1].start_date, batch[-1].id)
+
+            jobs = []
+            pending = {}
+            for campaign in batch:
+                campaign_data = campaign.to_google_ads_data()
+                campaign_data['enable'] = True
+                # Google Ads rejects start dates in the past (missed ticks)
+                campaign_data['start_date'] = max(campaign.start_date, today)
+                validation_errors = Campaign.validate_publish_data(campaign_data, today)
+                if validation_errors:
+                    failed += 1
+                    logger.error("Scheduled publish of campaign %s skipped: %s", campaign.id, '; '.join(validation_errors))
+                    continue
+                pending[campaign.id] = (campaign, campaign_data)
+                jobs.append(FanOutJob(
+                    campaign.customer_id,
+                    campaign.id,
+                    lambda ads_service, data=campaign_data: ads_service.publish_campaign(data),
+                    publish_operation_count(campaign_data)
+                ))
+
+            for campaign_id, result, error in account_pool.fan_out(jobs, self.max_workers):
+                campaign, campaign_data = pending[campaign_id]
+                if error is not None:
+                    failed += 1
+                    logger.error("Scheduled publish of campaign %s failed: %s", campaign_id, error)
+                    continue
+
+                campaign.google_campaign_id = result['campaign_id']
+                campaign.status = 'PUBLISHED'
+                campaign.updated_at = datetime.utcnow()
+                SharedBudget.remember(
+                    campaign.customer_id,
+                    campaign.budget_group,
+                    campaign_data['daily_budget'],
+                    result.get('budget_resource_name')
+                )
+                db.session.commit()
+                published += 1
+                logger.info("Scheduled publish of campaign %s: %s", campaign_id, result['campaign_id'])
+
+        return published, failed
+
+    def pause_expired_campaigns(self, account_pool, today):
+        """
+        Pause PUBLISHED campaigns whose end_date has passed.
+
+        Each batch is paused remotely with one mutate request per account
+        (fanned out across accounts) and locally with one bulk UPDATE, plus
+        the matching rollup and change-log rows. Campaigns in accounts whose
+        mutate fails are left for the next tick.
+
+        Returns:
+            int: Number of campaigns paused
+        """
+        paused = 0
+        last_id = None
+
+        while not self._stop_event.is_set():
+            query = db.session.query(
+                Campaign.id,
+                Campaign.customer_id,
+                Campaign.google_campaign_id,
+                Campaign.status,
+                Campaign.objective,
+                Campaign.campaign_type,
+                Campaign.daily_budget
+            ).filter(
+                Campaign.status == 'PUBLISHED',
+                Campaign.google_campaign_id.isnot(None),
+                Campaign.end_date < today
+            )
+            if last_id is not None:
+                query = query.filter(Campaign.id > last_id)
+            batch = query.order_by(Campaign.id).limit(self.batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            rows_by_account = {}
+            for row in batch:
+                rows_by_account.setdefault(row.customer_id, []).append(row)
+            jobs = [
+                FanOutJob(
+                    customer_id,
+                    customer_id,
+                    lambda ads_service, ids=[row.google_campaign_id for row in rows]: ads_service.disable_campaigns(ids),
+                    len(rows)
+                )
+                for customer_id, rows in rows_by_account.items()
+            ]
+
+            batch = []
+            for customer_id, result, error in account_pool.fan_out(jobs, self.max_workers):
+                if error is not None:
+                    logger.error("Failed to pause expired campaigns in account %s: %s", customer_id, error)
+                    continue
+                batch.extend(rows_by_account[customer_id])
+            if not batch:
+                continue
+
+            campaign_ids = [row.id for row in batch]
+            values = {'status': 'PAUSED', 'updated_at': datetime.utcnow()}
+            Campaign.query.filter(
+                Campaign.id.in_(campaign_ids)
+            ).update(values, synchronize_session=False)
+            record_bulk_status_change(batch, 'PAUSED')
+            record_bulk_changes(campaign_ids, values)
+            db.session.commit()
+            paused += len(batch)
+            logger.info("Paused %s expired campaigns", len(batch))
+
+        return paused
+
+    def _acquire_leadership(self):
+        """
+        Become (or remain) the leader.
+
+        On PostgreSQL this takes a session-level advisory lock on a dedicated
+        connection that is kept open between ticks. It is released by
+        _release_leadership on stop or re-election, and by the server if the
+        process dies. Other databases have no shared
+        lock, so the scheduler assumes it is the only instance.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return True
+
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.execute(text('SELECT 1'))
+                return True
+            except Exception:
+                logger.warning("Lost scheduler lock connection, re-electing")
+                self._release_leadership()
+
+        connection = db.engine.connect()
+        acquired = connection.execute(
+            text('SELECT pg_try_advisory_lock(:lock_id)'), {'lock_id': self.lock_id}
+        ).scalar()
+        connection.commit()
+        if not acquired:
+            connection.close()
+            return False
+
+        self._lock_connection = connection
+        logger.info("Acquired scheduler leader lock")
+        return True
+
+    def _release_leadership(self):
+        """
+        Give up the advisory lock.
+
+        Closing a pooled connection only returns it to the pool, and the
+        pool's reset rolls back without ending the session, so the lock is
+        released explicitly first. If that fails (e.g. the connection was
+        lost), the connection is invalidated instead: its session ends, and
+        the lock with it, rather than going back to the pool.
+        """
+        connection = self._lock_connection
+        if connection is None:
+            return
+        self._lock_connection = None
+        try:
+            connection.execute(text('SELECT pg_advisory_unlock(:lock_id)'), {'lock_id': self.lock_id})
+            connection.commit()
+        except Exception:
+            try:
+                connection.invalidate()
+            except Exception:
+                pass
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+if __name__ == '__main__':
+    import sys
+    from app import create_app
+
+    # create_app() would start a second, in-process scheduler in this worker
+    if Config.SCHEDULER_ENABLED:
+        sys.exit("SCHEDULER_ENABLED=true runs the scheduler inside the API; "
+                 "set SCHEDULER_ENABLED=false to use the standalone worker")
+
+    scheduler = CampaignScheduler(create_app())
+    if '--once' in sys.argv:
+        logger.info("Scheduler tick result: %s", scheduler.run_once())
+    else:
+        logger.info("Starting campaign scheduler worker")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            logger.info("Scheduler stopped")
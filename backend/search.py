@@ -0,0 +1,325 @@
+"""
+Full-text search over campaigns.
+PostgreSQL uses a generated, weighted tsvector column with a GIN index plus a
+pg_trgm index on the name for typo tolerance (skipped, with the tsvector
+alone, where the extension cannot be installed). SQLite falls back to an
+FTS5 external-content table kept in sync by triggers.
+
+The schema objects are created by migrate_schema.py. At startup only missing
+ones are created, and Postgres indexes are built CONCURRENTLY, so restarts
+take no locks that block writes on a large campaigns table.
+
+Only the first SEARCH_CANDIDATE_LIMIT matches are ranked, so a broad query
+costs the same on a million campaigns as on a thousand; narrower queries are
+ranked exactly.
+"""
+
+from sqlalchemy import Float, bindparam, select, text
+from models import db, Campaign, CompactUUID
+from config import Config
+import base64
+import json
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Set by ensure_search_index once pg_trgm is known to be installed
+_trigram_available = False
+
+# Fields are weighted name > ad group > headline > description. Adding the
+# stored column rewrites the table; it is only run when the column is missing.
+POSTGRES_SEARCH_COLUMN_DDL = """
+    ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(ad_group_name, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(ad_headline, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(ad_description, '')), 'D')
+    ) STORED
+"""
+
+# Built CONCURRENTLY, outside a transaction, so writes carry on meanwhile
+POSTGRES_SEARCH_INDEXES = {
+    'ix_campaigns_search_vector': 'USING GIN (search_vector)',
+}
+POSTGRES_TRIGRAM_INDEXES = {
+    'ix_campaigns_name_trgm': 'USING GIN (name gin_trgm_ops)',
+}
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS campaigns_fts USING fts5(
+        name, ad_group_name, ad_headline, ad_description,
+        content='campaigns', content_rowid='rowid'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS campaigns_fts_insert AFTER INSERT ON campaigns BEGIN
+        INSERT INTO campaigns_fts(rowid, name, ad_group_name, ad_headline, ad_description)
+        VALUES (new.rowid, new.name, new.ad_group_name, new.ad_headline, new.ad_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS campaigns_fts_delete AFTER DELETE ON campaigns BEGIN
+        INSERT INTO campaigns_fts(campaigns_fts, rowid, name, ad_group_name, ad_headline, ad_description)
+        VALUES ('delete', old.rowid, old.name, old.ad_group_name, old.ad_headline, old.ad_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS campaigns_fts_update AFTER UPDATE ON campaigns BEGIN
+        INSERT INTO campaigns_fts(campaigns_fts, rowid, name, ad_group_name, ad_headline, ad_description)
+        VALUES ('delete', old.rowid, old.name, old.ad_group_name, old.ad_headline, old.ad_description);
+        INSERT INTO campaigns_fts(rowid, name, ad_group_name, ad_headline, ad_description)
+        VALUES (new.rowid, new.name, new.ad_group_name, new.ad_headline, new.ad_description);
+    END
+    """,
+]
+
+# Postgres: full-text matches with prefix terms, plus trigram matches on the
+# name. Candidates are capped before ranking so ts_rank never scores every match.
+POSTGRES_SEARCH_SQL = """
+    SELECT id, rank FROM (
+        SELECT id,
+               CAST(ts_rank(search_vector, to_tsquery('simple', :tsquery)){trigram_rank}
+                    AS DOUBLE PRECISION) AS rank
+        FROM (
+            SELECT id, name, search_vector
+            FROM campaigns
+            WHERE (search_vector @@ to_tsquery('simple', :tsquery){trigram_match})
+              AND archived_at IS NULL
+            LIMIT :candidates
+        ) AS candidates
+    ) AS matches
+    {keyset}
+    ORDER BY rank DESC, id
+    LIMIT :limit
+"""
+
+# Only when pg_trgm is installed; without it similarity() and % do not exist
+TRIGRAM_RANK_SQL = " + similarity(name, :q)"
+TRIGRAM_MATCH_SQL = " OR name % :q"
+
+# SQLite: bm25 is "lower is better", so negate it to share the keyset logic
+SQLITE_SEARCH_SQL = """
+    SELECT id, rank FROM (
+        SELECT campaigns.id AS id,
+               -bm25(campaigns_fts, 10.0, 5.0, 2.0, 1.0) AS rank
+        FROM campaigns_fts
+        JOIN campaigns ON campaigns.rowid = campaigns_fts.rowid
+        WHERE campaigns_fts MATCH :match
+          AND campaigns.archived_at IS NULL
+        LIMIT :candidates
+    ) AS matches
+    {keyset}
+    ORDER BY rank DESC, id
+    LIMIT :limit
+"""
+
+KEYSET_SQL = "WHERE rank < :cursor_rank OR (rank = :cursor_rank AND id > :cursor_id)"
+
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _postgres_has_column(connection):
+    return bool(connection.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = 'campaigns' AND column_name = 'search_vector'"
+    )).scalar())
+
+
+def _postgres_has_trigram(connection):
+    return bool(connection.execute(text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+    )).scalar())
+
+
+def _postgres_index_state(connection, name):
+    """True if the index is valid, False if a failed build left it invalid, None if missing."""
+    return connection.execute(text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+    ), {'name': name}).scalar()
+
+
+def _ensure_postgres_indexes(indexes):
+    """
+    Build missing (or invalid) indexes CONCURRENTLY. A failure, e.g. another
+    worker building the same index, is logged and retried on the next start.
+    """
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        for name, definition in indexes.items():
+            try:
+                state = _postgres_index_state(connection, name)
+                if state:
+                    continue
+                if state is False:
+                    connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                logger.info("Building search index %s", name)
+                connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON campaigns {definition}"))
+            except Exception as e:
+                logger.warning("Could not build search index %s: %s", name, e)
+
+
+def ensure_search_index():
+    """
+    Create the search column/table, indexes and triggers if missing.
+
+    Cheap when everything exists (catalog lookups only), so it runs at every
+    startup; migrate_schema.py runs it too, ahead of a deploy.
+    """
+    global _trigram_available
+    dialect = db.engine.dialect.name
+
+    if dialect == 'postgresql':
+        with db.engine.connect() as connection:
+            has_column = _postgres_has_column(connection)
+            _trigram_available = _postgres_has_trigram(connection)
+        if not has_column:
+            logger.info("Adding campaigns.search_vector")
+            with db.engine.begin() as connection:
+                connection.execute(text(POSTGRES_SEARCH_COLUMN_DDL))
+        _ensure_postgres_indexes(POSTGRES_SEARCH_INDEXES)
+
+        if not _trigram_available:
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                _trigram_available = True
+            except Exception as e:
+                logger.warning("pg_trgm unavailable, search will not tolerate typos: %s", e)
+        if _trigram_available:
+            _ensure_postgres_indexes(POSTGRES_TRIGRAM_INDEXES)
+    elif dialect == 'sqlite':
+        with db.engine.begin() as connection:
+            exists = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'campaigns_fts'"
+            )).scalar()
+            for statement in SQLITE_SEARCH_DDL:
+                connection.execute(text(statement))
+        if not exists:
+            rebuild_search_index()
+    else:
+        logger.warning("Full-text search is not supported on %s", dialect)
+
+
+def rebuild_search_index():
+    """
+    Re-index all existing campaigns.
+
+    Only needed on SQLite (e.g. after VACUUM renumbers rowids); the Postgres
+    search column is generated and always in sync.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        with db.engine.begin() as connection:
+            connection.execute(text("INSERT INTO campaigns_fts(campaigns_fts) VALUES ('rebuild')"))
+
+
+def encode_cursor(rank, campaign_id):
+    """Encode a (rank, id) keyset position as an opaque URL-safe string."""
+    raw = json.dumps([rank, campaign_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        rank, campaign_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(rank), str(campaign_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def build_search_statement(query, limit, cursor, dialect):
+    """
+    Build the ranked search query for one page.
+
+    Args:
+        query (str): Free-text query
+        limit (int): Page size
+        cursor (str): Cursor returned with the previous page, if any
+        dialect (str): Database dialect name
+
+    Returns:
+        tuple: (statement, params), or None if the query has no terms
+    """
+    terms = TERM_PATTERN.findall(query.lower())
+    if not terms:
+        return None
+
+    params = {'limit': limit, 'candidates': Config.SEARCH_CANDIDATE_LIMIT}
+    fragments = {'keyset': ''}
+    if cursor:
+        params['cursor_rank'], params['cursor_id'] = decode_cursor(cursor)
+        fragments['keyset'] = KEYSET_SQL
+
+    if dialect == 'postgresql':
+        sql = POSTGRES_SEARCH_SQL
+        params['tsquery'] = ' & '.join(f'{term}:*' for term in terms)
+        fragments['trigram_rank'] = fragments['trigram_match'] = ''
+        if _trigram_available:
+            params['q'] = query
+            fragments['trigram_rank'] = TRIGRAM_RANK_SQL
+            fragments['trigram_match'] = TRIGRAM_MATCH_SQL
+    else:
+        sql = SQLITE_SEARCH_SQL
+        params['match'] = ' '.join(f'"{term}"*' for term in terms)
+
+    statement = text(sql.format(**fragments))
+    if cursor:
+        statement = statement.bindparams(bindparam('cursor_id', type_=CompactUUID))
+    # Type the result so ids come back as strings on every backend
+    return statement.columns(id=CompactUUID, rank=Float), params
+
+
+def search_page(rows, campaigns, limit):
+    """
+    Order loaded campaigns by rank and work out the next cursor.
+
+    Args:
+        rows: (id, rank) rows returned by the search statement
+        campaigns: Campaign objects for those ids
+        limit (int): Page size
+
+    Returns:
+        tuple: (list of Campaign, next cursor or None)
+    """
+    campaigns_by_id = {campaign.id: campaign for campaign in campaigns}
+    page = [campaigns_by_id[row.id] for row in rows if row.id in campaigns_by_id]
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+
+    return page, next_cursor
+
+
+def search_campaigns(query, limit=20, cursor=None, session=None):
+    """
+    Search campaigns by name, ad group name, headline and description.
+
+    Results are ordered by relevance (then id) and paginated with a keyset
+    cursor, so pages stay stable while campaigns change. At most
+    SEARCH_CANDIDATE_LIMIT matches are ranked; beyond that, the results are
+    the best of an arbitrary subset and the query should be narrowed.
+
+    Args:
+        query (str): Free-text query; each term also matches as a prefix
+        limit (int): Maximum number of campaigns to return
+        cursor (str): Cursor returned with the previous page
+        session (Session): Session to use (defaults to db.session)
+
+    Returns:
+        tuple: (list of Campaign, next cursor or None)
+    """
+    session = session or db.session
+    search = build_search_statement(query, limit, cursor, session.get_bind().dialect.name)
+    if search is None:
+        return [], None
+
+    statement, params = search
+    rows = session.execute(statement, params).all()
+    if not rows:
+        return [], None
+
+    campaigns = session.scalars(select(Campaign).where(Campaign.id.in_([row.id for row in rows]))).all()
+    return search_page(rows, campaigns, limit)
@@ -0,0 +1,207 @@
+"""
+Remote campaign status refresh.
+Reads campaign.status and campaign.serving_status back from Google Ads for
+many campaigns at once: one streamed GAQL query per account and chunk of ids
+(STATUS_REFRESH_CHUNK_SIZE), written back with one bulk UPDATE per chunk.
+
+The values are cached on the campaign rows; campaigns checked less than
+STATUS_REFRESH_TTL_SECONDS ago are not queried again unless forced.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import case, select, update
+from models import db, Campaign
+from accounts import FanOutJob, get_account_pool, status_query_count
+from changes import record_row_changes
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields returned by the refresh endpoints
+STATUS_FIELDS = ('id', 'google_campaign_id', 'status', 'remote_status', 'serving_status', 'status_checked_at')
+
+
+def refreshable_campaigns_query(campaign_ids=None):
+    """Published (or once published) live campaigns, optionally limited to `campaign_ids` (an empty list selects none)."""
+    query = select(
+        Campaign.id,
+        Campaign.customer_id,
+        Campaign.google_campaign_id,
+        Campaign.status,
+        Campaign.remote_status,
+        Campaign.serving_status,
+        Campaign.status_checked_at
+    ).where(
+        Campaign.google_campaign_id.isnot(None),
+        Campaign.archived_at.is_(None)
+    )
+    if campaign_ids is not None:
+        query = query.where(Campaign.id.in_(campaign_ids))
+    return query
+
+
+def stale_by_account(rows, now, force=False):
+    """
+    Group campaigns whose cached status has expired by Google Ads account.
+
+    Returns:
+        dict: customer_id -> rows to refresh
+    """
+    cutoff = now - timedelta(seconds=Config.STATUS_REFRESH_TTL_SECONDS)
+    stale = {}
+    for row in rows:
+        if force or row.status_checked_at is None or row.status_checked_at < cutoff:
+            stale.setdefault(row.customer_id, []).append(row)
+    return stale
+
+
+def collect_statuses(stale, outcomes):
+    """
+    Merge per-account results.
+
+    Args:
+        stale (dict): Output of stale_by_account
+        outcomes: (customer_id, statuses, error) per account
+
+    Returns:
+        tuple: (refreshed rows, google id -> (status, serving_status),
+                accounts that failed)
+    """
+    refreshed = []
+    statuses = {}
+    failed_accounts = []
+    for customer_id, result, error in outcomes:
+        if error is not None:
+            logger.error("Status refresh failed for account %s: %s", customer_id or 'default', error)
+            failed_accounts.append(customer_id or Config.GOOGLE_ADS_CUSTOMER_ID.replace('-', ''))
+            continue
+        refreshed.extend(stale[customer_id])
+        statuses.update(result)
+    return refreshed, statuses, failed_accounts
+
+
+def status_updates(refreshed, statuses, checked_at, chunk_size=None):
+    """
+    Build the UPDATEs that write every refreshed campaign's status, one per
+    `chunk_size` campaigns (defaults to STATUS_REFRESH_CHUNK_SIZE) so the
+    bound parameters stay within driver and SQLite limits.
+
+    Campaigns Google Ads did not return are marked UNKNOWN. Every row gets a
+    new status_checked_at, so every row is returned for the change log (the
+    list cache and ETag are keyed on its cursor).
+
+    Returns:
+        tuple: (list of UPDATE statements, campaign id -> values written)
+    """
+    chunk_size = chunk_size or Config.STATUS_REFRESH_CHUNK_SIZE
+    statements = []
+    written = {}
+    for start in range(0, len(refreshed), chunk_size):
+        remote_status = {}
+        serving_status = {}
+        for row in refreshed[start:start + chunk_size]:
+            status, serving = statuses.get(row.google_campaign_id, ('UNKNOWN', None))
+            remote_status[row.google_campaign_id] = status
+            serving_status[row.google_campaign_id] = serving
+            written[row.id] = {
+                'remote_status': status,
+                'serving_status': serving,
+                'status_checked_at': checked_at,
+            }
+        statements.append(update(Campaign).where(
+            Campaign.google_campaign_id.in_(list(remote_status))
+        ).values(
+            remote_status=case(remote_status, value=Campaign.google_campaign_id),
+            serving_status=case(serving_status, value=Campaign.google_campaign_id),
+            status_checked_at=checked_at
+        ).execution_options(synchronize_session=False))
+    return statements, written
+
+
+def status_dict(row):
+    """Status fields of a refreshable_campaigns_query row for the refresh response."""
+    values = {field: getattr(row, field) for field in STATUS_FIELDS}
+    if values['status_checked_at']:
+        values['status_checked_at'] = values['status_checked_at'].isoformat()
+    return values
+
+
+def load_stale(campaign_ids=None, now=None, force=False, session=None):
+    """
+    Find the campaigns whose cached status has expired.
+
+    Returns:
+        tuple: (number of campaigns served from cache, stale_by_account output)
+    """
+    session = session or db.session
+    rows = session.execute(refreshable_campaigns_query(campaign_ids)).all()
+    stale = stale_by_account(rows, now or datetime.utcnow(), force)
+    return len(rows) - sum(len(account_rows) for account_rows in stale.values()), stale
+
+
+def status_jobs(stale):
+    """One streamed status query per account, as FanOutJobs keyed by customer_id."""
+    return [
+        FanOutJob(
+            customer_id,
+            customer_id,
+            lambda ads_service, ids=[row.google_campaign_id for row in account_rows]:
+                ads_service.get_campaign_statuses(ids, Config.STATUS_REFRESH_CHUNK_SIZE),
+            status_query_count(account_rows, Config.STATUS_REFRESH_CHUNK_SIZE)
+        )
+        for customer_id, account_rows in stale.items()
+    ]
+
+
+def save_statuses(stale, outcomes, checked_at, session=None):
+    """
+    Write the statuses returned by a status_jobs fan-out. The caller commits.
+
+    Args:
+        stale (dict): Output of stale_by_account
+        outcomes: (customer_id, statuses, error) per account
+        checked_at (datetime): Time the refresh started
+        session (Session): Session to use (defaults to db.session)
+
+    Returns:
+        dict: Number of refreshed campaigns and the accounts that failed
+    """
+    session = session or db.session
+    refreshed, statuses, failed_accounts = collect_statuses(stale, outcomes)
+    statements, written = status_updates(refreshed, statuses, checked_at)
+    if statements:
+        for statement in statements:
+            session.execute(statement)
+        record_row_changes(written, session.connection())
+        logger.info("Refreshed remote status of %s campaigns", len(refreshed))
+    return {'refreshed': len(refreshed), 'failed_accounts': failed_accounts}
+
+
+def campaign_statuses(campaign_ids=None, session=None):
+    """Current status fields of the refreshable campaigns, for the refresh response."""
+    session = session or db.session
+    return [status_dict(row) for row in session.execute(refreshable_campaigns_query(campaign_ids)).all()]
+
+
+def refresh_campaign_statuses(campaign_ids=None, force=False, account_pool=None):
+    """
+    Refresh remote status for campaigns whose cached value has expired.
+
+    Args:
+        campaign_ids (list): Local campaign ids; None for every published campaign
+        force (bool): Ignore the TTL cache
+        account_pool (AccountPool): Defaults to the process-wide pool
+
+    Returns:
+        dict: Counts of refreshed and cached campaigns, and failed accounts
+    """
+    account_pool = account_pool or get_account_pool()
+    now = datetime.utcnow()
+    cached, stale = load_stale(campaign_ids, now, force)
+    outcomes = account_pool.fan_out(status_jobs(stale), Config.SCHEDULER_MAX_WORKERS)
+    result = save_statuses(stale, outcomes, now)
+    db.session.commit()
+
+    result['cached'] = cached
+    return result
@@ -0,0 +1,229 @@
+"""
+Incrementally maintained campaign summary.
+Keeps the campaign_summary rollup in step with the campaigns table inside the
+same transaction as each change, so dashboards read O(groups) rows instead of
+scanning every campaign.
+
+Drift (e.g. rows edited by hand in the database) is fixed with:
+
+    python summary.py --rebuild
+"""
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Campaign, CampaignSummary
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ('status', 'objective', 'campaign_type', 'daily_budget')
+
+
+def _summary_key(status, objective, campaign_type):
+    """Rollup key for a campaign; NULLs are stored as empty strings."""
+    return (status or '', objective or '', campaign_type or '')
+
+
+def add_summary_delta(deltas, status, objective, campaign_type, daily_budget, sign):
+    """
+    Accumulate a +1/-1 change for one campaign into `deltas`.
+
+    Args:
+        deltas (dict): Maps rollup key to [count delta, budget delta]
+        sign (int): 1 when the campaign enters the group, -1 when it leaves
+    """
+    delta = deltas.setdefault(_summary_key(status, objective, campaign_type), [0, 0])
+    delta[0] += sign
+    delta[1] += sign * int(daily_budget or 0)
+
+
+def apply_summary_deltas(connection, deltas):
+    """Upsert accumulated deltas into the rollup table on `connection`."""
+    values = [
+        {
+            'status': key[0],
+            'objective': key[1],
+            'campaign_type': key[2],
+            'campaign_count': count,
+            'total_daily_budget': budget,
+        }
+        # Sorted so concurrent transactions lock rollup rows in the same order
+        for key, (count, budget) in sorted(deltas.items())
+        if count or budget
+    ]
+    if not values:
+        return
+
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    table = CampaignSummary.__table__
+    statement = dialect.insert(table).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.status, table.c.objective, table.c.campaign_type],
+        set_={
+            'campaign_count': table.c.campaign_count + statement.excluded.campaign_count,
+            'total_daily_budget': table.c.total_daily_budget + statement.excluded.total_daily_budget,
+        }
+    )
+    connection.execute(statement)
+
+
+def _committed_value(state, field):
+    """Value of `field` as it was before the pending changes."""
+    history = state.attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), field)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _track_campaign_changes(session, flush_context):
+    """Fold ORM inserts, updates and deletes of campaigns into the rollup."""
+    deltas = {}
+
+    for campaign in session.new:
+        if isinstance(campaign, Campaign):
+            add_summary_delta(
+                deltas, campaign.status, campaign.objective,
+                campaign.campaign_type, campaign.daily_budget, 1
+            )
+
+    for campaign in session.deleted:
+        if isinstance(campaign, Campaign):
+            state = inspect(campaign)
+            old = [_committed_value(state, field) for field in SUMMARY_FIELDS]
+            add_summary_delta(deltas, *old, -1)
+
+    for campaign in session.dirty:
+        if not isinstance(campaign, Campaign):
+            continue
+        state = inspect(campaign)
+        if not any(state.attrs[field].history.has_changes() for field in SUMMARY_FIELDS):
+            continue
+        old = [_committed_value(state, field) for field in SUMMARY_FIELDS]
+        add_summary_delta(deltas, *old, -1)
+        add_summary_delta(
+            deltas, campaign.status, campaign.objective,
+            campaign.campaign_type, campaign.daily_budget, 1
+        )
+
+    if deltas:
+        apply_summary_deltas(session.connection(), deltas)
+
+
+def record_bulk_status_change(rows, new_status):
+    """
+    Update the rollup for a bulk UPDATE of campaign status, which bypasses
+    the ORM flush events. Call in the same transaction as the UPDATE.
+
+    Args:
+        rows: Rows with status, objective, campaign_type and daily_budget
+              as they were before the update
+        new_status (str): Status the rows were moved to
+    """
+    deltas = {}
+    for row in rows:
+        add_summary_delta(deltas, row.status, row.objective, row.campaign_type, row.daily_budget, -1)
+        add_summary_delta(deltas, new_status, row.objective, row.campaign_type, row.daily_budget, 1)
+    apply_summary_deltas(db.session.connection(), deltas)
+
+
+def record_bulk_inserts(campaigns, connection=None):
+    """
+    Add campaigns inserted with a bulk INSERT to the rollup. Call in the
+    same transaction as the INSERT.
+
+    Args:
+        campaigns (list): Inserted campaigns
+        connection: Connection of the transaction (defaults to db.session's)
+    """
+    deltas = {}
+    for campaign in campaigns:
+        add_summary_delta(
+            deltas, campaign.status, campaign.objective,
+            campaign.campaign_type, campaign.daily_budget, 1
+        )
+    apply_summary_deltas(connection or db.session.connection(), deltas)
+
+
+def rebuild_campaign_summary():
+    """Recompute the whole rollup from the campaigns table in one transaction."""
+    groups = db.session.query(
+        Campaign.status,
+        Campaign.objective,
+        Campaign.campaign_type,
+        func.count(Campaign.id),
+        func.coalesce(func.sum(Campaign.daily_budget), 0)
+    ).group_by(Campaign.status, Campaign.objective, Campaign.campaign_type).all()
+
+    CampaignSummary.query.delete()
+    deltas = {}
+    for status, objective, campaign_type, count, budget in groups:
+        delta = deltas.setdefault(_summary_key(status, objective, campaign_type), [0, 0])
+        delta[0] += count
+        delta[1] += int(budget)
+    apply_summary_deltas(db.session.connection(), deltas)
+    db.session.commit()
+
+    logger.info("Rebuilt campaign summary (%s groups)", len(deltas))
+
+
+def ensure_campaign_summary():
+    """Populate the rollup on first start against an existing campaigns table."""
+    if CampaignSummary.query.first() is None and Campaign.query.first() is not None:
+        rebuild_campaign_summary()
+
+
+def get_campaign_summary(session=None):
+    """
+    Read the rollup.
+
+    Args:
+        session (Session): Session to use (defaults to db.session)
+
+    Returns:
+        dict: Counts by status, objective and campaign type, plus the total
+              daily budget (micros) of published campaigns
+    """
+    session = session or db.session
+    return summarize(session.scalars(select(CampaignSummary).where(CampaignSummary.campaign_count > 0)))
+
+
+def summarize(groups):
+    """Fold non-empty CampaignSummary rows into the summary response."""
+    by_status = {}
+    by_objective = {}
+    by_campaign_type = {}
+    total = 0
+    active_daily_budget = 0
+
+    for group in groups:
+        count = group.campaign_count
+        total += count
+        by_status[group.status] = by_status.get(group.status, 0) + count
+        objective = group.objective or 'NONE'
+        by_objective[objective] = by_objective.get(objective, 0) + count
+        by_campaign_type[group.campaign_type] = by_campaign_type.get(group.campaign_type, 0) + count
+        if group.status == 'PUBLISHED':
+            active_daily_budget += group.total_daily_budget
+
+    return {
+        'total_campaigns': total,
+        'by_status': by_status,
+        'by_objective': by_objective,
+        'by_campaign_type': by_campaign_type,
+        'active_daily_budget': active_daily_budget,
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    from app import create_app
+
+    if '--rebuild' not in sys.argv:
+        print("Usage: python summary.py --rebuild")
+        sys.exit(1)
+
+    with create_app().app_context():
+        rebuild_campaign_summary()
@@ -0,0 +1,83 @@
+"""
+Shared pytest setup.
+
+Tests import the backend modules directly and run against a throwaway
+SQLite database. The `client` fixture is parametrised over the Flask app
+and the Quart (ASGI) app, so every functional test covers both.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config reads the environment at import time
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+class Result:
+    """The parts of a test response the suite checks, from either app."""
+
+    def __init__(self, status_code, json, headers):
+        self.status_code = status_code
+        self.json = json
+        self.headers = headers
+
+
+class FlaskClient:
+    name = 'flask'
+
+    def __init__(self, app):
+        self.app = app
+        self._client = app.test_client()
+
+    def request(self, method, path, **kwargs):
+        response = self._client.open(path, method=method, **kwargs)
+        return Result(response.status_code, response.get_json(silent=True), response.headers)
+
+
+class QuartClient:
+    name = 'quart'
+
+    def __init__(self, app, loop):
+        self.app = app
+        self._loop = loop
+        self._client = app.test_client()
+
+    def request(self, method, path, **kwargs):
+        async def send():
+            response = await self._client.open(path, method=method, **kwargs)
+            return Result(response.status_code, await response.get_json(), response.headers)
+        return self._loop.run_until_complete(send())
+
+
+@pytest.fixture(scope='session')
+def flask_app():
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture(scope='session')
+def quart_app():
+    import asgi
+    loop = asyncio.new_event_loop()
+    app = asgi.create_app()
+    serving = app.test_app()
+    loop.run_until_complete(serving.__aenter__())
+    yield app, loop
+    loop.run_until_complete(serving.__aexit__(None, None, None))
+    loop.close()
+
+
+@pytest.fixture(params=['flask', 'quart'])
+def client(request):
+    """A synchronous client for the Flask app or the Quart app."""
+    if request.param == 'flask':
+        return FlaskClient(request.getfixturevalue('flask_app'))
+    app, loop = request.getfixturevalue('quart_app')
+    return QuartClient(app, loop)
@@ -0,0 +1,392 @@
+"""
+Functional tests for the /api endpoints.
+
+Every test runs against both the Flask app and the Quart app (see the
+`client` fixture), so the two stay in step. Google Ads is replaced by a
+stub service on the account pools; the database is real (SQLite).
+"""
+
+from datetime import date, timedelta
+from config import Config
+import time
+import uuid
+import pytest
+
+
+def campaign_payload(**overrides):
+    data = {
+        'name': f'Spring Sale {uuid.uuid4().hex[:8]}',
+        'objective': 'SALES',
+        'campaign_type': 'DEMAND_GEN',
+        'daily_budget': 5000000,
+        'start_date': (date.today() + timedelta(days=1)).isoformat(),
+        'end_date': (date.today() + timedelta(days=30)).isoformat(),
+        'ad_group_name': 'Shoppers',
+        'ad_headline': 'Spring deals',
+        'ad_description': 'Everything half price this week',
+        'asset_url': 'https://example.com/spring',
+    }
+    data.update(overrides)
+    return data
+
+
+def create_campaign(client, **overrides):
+    response = client.request('POST', '/api/campaigns', json=campaign_payload(**overrides))
+    assert response.status_code == 201, response.json
+    return response.json['campaign']
+
+
+def listed_ids(client, path='/api/campaigns'):
+    response = client.request('GET', path)
+    assert response.status_code == 200, response.json
+    return [campaign['id'] for campaign in response.json['campaigns']]
+
+
+class StubAdsService:
+    """Stands in for GoogleAdsService / AsyncGoogleAdsService."""
+
+    def __init__(self):
+        self.published = []
+        self.validated = []
+        self.status_requests = []
+        self.publish_error = None
+
+    def _publish(self, campaign_data):
+        if self.publish_error:
+            raise self.publish_error
+        self.published.append(campaign_data)
+        number = len(self.published)
+        return {
+            'campaign_id': f'stub-{uuid.uuid4().hex[:12]}',
+            'ad_group_id': f'ad-group-{number}',
+            'ad_id': f'ad-{number}',
+            'budget_resource_name': f'customers/1/campaignBudgets/{number}',
+        }
+
+    def _validate(self, campaigns):
+        self.validated.extend(campaigns)
+        return [[] for _ in campaigns]
+
+    def _statuses(self, campaign_ids):
+        self.status_requests.append(list(campaign_ids))
+        return {campaign_id: ('ENABLED', 'SERVING') for campaign_id in campaign_ids}
+
+
+class SyncStubAdsService(StubAdsService):
+    def publish_campaign(self, campaign_data):
+        return self._publish(campaign_data)
+
+    def validate_campaigns(self, campaigns):
+        return self._validate(campaigns)
+
+    def get_campaign_statuses(self, campaign_ids, chunk_size):
+        return self._statuses(campaign_ids)
+
+
+class AsyncStubAdsService(StubAdsService):
+    async def publish_campaign(self, campaign_data):
+        return self._publish(campaign_data)
+
+    async def validate_campaigns(self, campaigns):
+        return self._validate(campaigns)
+
+    async def get_campaign_statuses(self, campaign_ids, chunk_size):
+        return self._statuses(campaign_ids)
+
+
+@pytest.fixture
+def ads_service(client, monkeypatch):
+    """Route the client's account pool to a stub Google Ads service."""
+    if client.name == 'flask':
+        from accounts import get_account_pool
+        pool, service = get_account_pool(), SyncStubAdsService()
+    else:
+        from google_ads_async import get_async_account_pool
+        pool, service = get_async_account_pool(), AsyncStubAdsService()
+    monkeypatch.setattr(pool, 'get_service', lambda customer_id=None: service)
+    monkeypatch.setattr(Config, 'validate_google_ads_config', staticmethod(lambda: (True, [])))
+    return service
+
+
+def test_create_and_get(client):
+    campaign = create_campaign(client)
+
+    assert campaign['status'] == 'DRAFT'
+    response = client.request('GET', f"/api/campaigns/{campaign['id']}")
+    assert response.status_code == 200
+    assert response.json['name'] == campaign['name']
+
+
+def test_create_rejects_invalid_data(client):
+    response = client.request('POST', '/api/campaigns', json=campaign_payload(name=''))
+
+    assert response.status_code == 400
+    assert response.json['error'] == 'Validation failed'
+
+
+def test_list_includes_new_campaign(client):
+    campaign = create_campaign(client)
+
+    assert campaign['id'] in listed_ids(client)
+
+
+def test_list_etag_revalidates(client):
+    response = client.request('GET', '/api/campaigns')
+    etag = response.headers['ETag']
+
+    assert etag.startswith('W/')
+    not_modified = client.request('GET', '/api/campaigns', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert 'Accept-Encoding' in not_modified.headers['Vary']
+
+    create_campaign(client)
+    assert client.request('GET', '/api/campaigns', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_search(client):
+    word = f'zebra{uuid.uuid4().hex[:6]}'
+    campaign = create_campaign(client, ad_headline=f'Striped {word} deals')
+    create_campaign(client)
+
+    response = client.request('GET', f'/api/campaigns/search?q={word}')
+
+    assert response.status_code == 200
+    assert [found['id'] for found in response.json['campaigns']] == [campaign['id']]
+
+
+def test_search_ranks_at_most_candidate_limit(client, monkeypatch):
+    monkeypatch.setattr(Config, 'SEARCH_CANDIDATE_LIMIT', 2)
+    word = f'okapi{uuid.uuid4().hex[:6]}'
+    for _ in range(3):
+        create_campaign(client, ad_headline=f'{word} deals')
+
+    response = client.request('GET', f'/api/campaigns/search?q={word}&limit=10')
+
+    assert response.status_code == 200
+    assert len(response.json['campaigns']) == 2
+
+
+def test_search_requires_query(client):
+    assert client.request('GET', '/api/campaigns/search').status_code == 400
+
+
+def test_summary_counts_new_drafts(client):
+    before = client.request('GET', '/api/campaigns/summary').json
+
+    create_campaign(client, objective='LEADS')
+    after = client.request('GET', '/api/campaigns/summary').json
+
+    assert after['total_campaigns'] == before['total_campaigns'] + 1
+    assert after['by_status'].get('DRAFT', 0) == before['by_status'].get('DRAFT', 0) + 1
+    assert after['by_objective'].get('LEADS', 0) == before['by_objective'].get('LEADS', 0) + 1
+
+
+def test_clone_expands_matrix(client):
+    source = create_campaign(client)
+
+    response = client.request('POST', f"/api/campaigns/{source['id']}/clone", json={
+        'matrix': {'ad_headline': ['A', 'B', 'C'], 'daily_budget': [1000000, 2000000]}
+    })
+
+    assert response.status_code == 201, response.json
+    clones = response.json['campaigns']
+    assert len(clones) == 6
+    assert {(clone['ad_headline'], clone['daily_budget']) for clone in clones} == {
+        (headline, budget) for headline in 'ABC' for budget in (1000000, 2000000)
+    }
+    assert all(clone['status'] == 'DRAFT' for clone in clones)
+    assert {clone['id'] for clone in clones} <= set(listed_ids(client))
+
+
+def test_clone_rejects_unknown_field(client):
+    source = create_campaign(client)
+
+    response = client.request('POST', f"/api/campaigns/{source['id']}/clone", json={
+        'variants': [{'bogus': 1}]
+    })
+
+    assert response.status_code == 400
+
+
+def test_publish(client, ads_service):
+    campaign = create_campaign(client)
+
+    response = client.request('POST', f"/api/campaigns/{campaign['id']}/publish")
+
+    assert response.status_code == 200, response.json
+    assert response.json['status'] == 'PUBLISHED'
+    assert [data['name'] for data in ads_service.published] == [campaign['name']]
+    published = client.request('GET', f"/api/campaigns/{campaign['id']}").json
+    assert published['status'] == 'PUBLISHED'
+    assert published['google_campaign_id'] == response.json['google_campaign_id']
+
+    again = client.request('POST', f"/api/campaigns/{campaign['id']}/publish")
+    assert again.status_code == 400
+    assert len(ads_service.published) == 1
+
+
+def test_failed_publish_refunds_quota(client, ads_service):
+    customer_id = str(uuid.uuid4().int)[:10]
+    client.request('POST', '/api/accounts', json={'customer_id': customer_id, 'name': 'Refunds'})
+    campaign = create_campaign(client, customer_id=customer_id)
+
+    def operations_today():
+        accounts = client.request('GET', '/api/accounts').json['accounts']
+        return next(a['operations_today'] for a in accounts if a['customer_id'] == customer_id)
+
+    ads_service.publish_error = Exception('INTERNAL: backend error')
+    failed = client.request('POST', f"/api/campaigns/{campaign['id']}/publish")
+    assert failed.status_code == 500
+    assert operations_today() == 0
+
+    ads_service.publish_error = None
+    published = client.request('POST', f"/api/campaigns/{campaign['id']}/publish")
+    assert published.status_code == 200, published.json
+    assert operations_today() == 4  # Budget, campaign, ad group and ad
+
+
+def test_publish_validates_before_calling_google_ads(client, ads_service):
+    campaign = create_campaign(client, asset_url='')
+
+    response = client.request('POST', f"/api/campaigns/{campaign['id']}/publish")
+
+    assert response.status_code == 400
+    assert ads_service.published == []
+
+
+def test_validate_empty_ids_checks_nothing(client, ads_service):
+    create_campaign(client)
+
+    response = client.request('POST', '/api/campaigns/validate', json={'ids': []})
+
+    assert response.status_code == 200
+    assert response.json['campaigns'] == []
+    assert ads_service.validated == []
+
+
+def test_validate_drafts(client, ads_service):
+    campaign = create_campaign(client)
+
+    response = client.request('POST', '/api/campaigns/validate', json={'ids': [campaign['id']]})
+
+    assert response.status_code == 200
+    assert [(result['id'], result['valid']) for result in response.json['campaigns']] == [(campaign['id'], True)]
+    assert len(ads_service.validated) == 1
+
+
+def test_refresh_status(client, ads_service, monkeypatch):
+    monkeypatch.setattr(Config, 'STATUS_REFRESH_CHUNK_SIZE', 2)
+    campaigns = [create_campaign(client) for _ in range(3)]
+    for campaign in campaigns:
+        assert client.request('POST', f"/api/campaigns/{campaign['id']}/publish").status_code == 200
+    ids = [campaign['id'] for campaign in campaigns]
+
+    # An empty selection refreshes nothing
+    response = client.request('POST', '/api/campaigns/refresh-status', json={'ids': []})
+    assert response.status_code == 200
+    assert response.json['refreshed'] == 0
+    assert response.json['campaigns'] == []
+    assert ads_service.status_requests == []
+
+    response = client.request('POST', '/api/campaigns/refresh-status', json={'ids': ids, 'force': True})
+    assert response.status_code == 200, response.json
+    assert response.json['refreshed'] == 3
+    assert {row['serving_status'] for row in response.json['campaigns']} == {'SERVING'}
+
+    # A forced refresh that changes nothing but status_checked_at still
+    # invalidates cached lists
+    etag = client.request('GET', '/api/campaigns').headers['ETag']
+    response = client.request('POST', '/api/campaigns/refresh-status', json={'ids': ids, 'force': True})
+    assert response.json['refreshed'] == 3
+    listed = client.request('GET', '/api/campaigns', headers={'If-None-Match': etag})
+    assert listed.status_code == 200
+    checked_at = {row['id']: row['status_checked_at'] for row in response.json['campaigns']}
+    assert {
+        campaign['id']: campaign['status_checked_at']
+        for campaign in listed.json['campaigns'] if campaign['id'] in checked_at
+    } == checked_at
+
+
+def test_archive_and_restore(client):
+    campaign = create_campaign(client)
+
+    response = client.request('POST', f"/api/campaigns/{campaign['id']}/archive")
+
+    assert response.status_code == 200
+    assert campaign['id'] not in listed_ids(client)
+    assert campaign['id'] in listed_ids(client, '/api/campaigns?include_archived=true&limit=500')
+
+    response = client.request('POST', f"/api/campaigns/{campaign['id']}/restore")
+    assert response.status_code == 200
+    assert campaign['id'] in listed_ids(client)
+
+
+def test_archived_campaigns_move_to_archive_table(client, flask_app):
+    from archive import archive_campaigns
+    campaign = create_campaign(client)
+    client.request('POST', f"/api/campaigns/{campaign['id']}/archive")
+
+    with flask_app.app_context():
+        assert archive_campaigns() >= 1
+
+    # Still served by id, now from the archive table
+    archived = client.request('GET', f"/api/campaigns/{campaign['id']}")
+    assert archived.status_code == 200
+    assert archived.json['archived_at']
+    assert client.request('POST', f"/api/campaigns/{campaign['id']}/publish").status_code in (400, 404)
+    assert campaign['id'] in listed_ids(client, '/api/campaigns?include_archived=true&limit=500')
+
+
+def test_restored_campaign_is_not_archived_again(client, flask_app):
+    from archive import archive_campaigns
+    # Ended long before the retention window, so the archiver picks it up
+    ended = (date.today() - timedelta(days=Config.ARCHIVE_RETENTION_DAYS + 30)).isoformat()
+    campaign = create_campaign(client, start_date=None, end_date=ended)
+
+    with flask_app.app_context():
+        archive_campaigns()
+    assert campaign['id'] not in listed_ids(client)
+
+    assert client.request('POST', f"/api/campaigns/{campaign['id']}/restore").status_code == 200
+    with flask_app.app_context():
+        archive_campaigns()
+    assert campaign['id'] in listed_ids(client)
+
+    # Changing the end date makes it eligible again
+    response = client.request('PUT', f"/api/campaigns/{campaign['id']}", json={
+        'name': campaign['name'], 'end_date': ended
+    })
+    assert response.status_code == 200, response.json
+    with flask_app.app_context():
+        archive_campaigns()
+    assert campaign['id'] not in listed_ids(client)
+
+
+def test_archived_list_pages(client):
+    for _ in range(3):
+        create_campaign(client)
+
+    first = client.request('GET', '/api/campaigns?include_archived=true&limit=2').json
+    second = client.request('GET', f"/api/campaigns?include_archived=true&limit=2&page={first['next_page']}").json
+
+    assert len(first['campaigns']) == 2
+    assert not {c['id'] for c in first['campaigns']} & {c['id'] for c in second['campaigns']}
+    assert client.request('GET', '/api/campaigns?include_archived=true&page=bogus').status_code == 400
+
+
+def test_health(client):
+    live = client.request('GET', '/api/health/live')
+    assert live.status_code == 200
+
+    # Legacy endpoint serves the prober's last results and never probes itself
+    deadline = time.monotonic() + 10
+    legacy = client.request('GET', '/api/health')
+    while legacy.json['readiness'] == 'starting' and time.monotonic() < deadline:
+        assert legacy.status_code == 503
+        time.sleep(0.05)
+        legacy = client.request('GET', '/api/health')
+    assert legacy.status_code == 200
+    assert legacy.json['database'] == 'connected'
+
+    ready = client.request('GET', '/api/health/ready')
+    assert ready.json['checks']['database']['healthy'] is True
@@ -0,0 +1,146 @@
+"""SharedTokenCredentials against a local stand-in for the OAuth token endpoint."""
+
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from google.auth import _helpers
+from google.auth.transport.requests import Request
+import json
+import multiprocessing
+import threading
+import time
+import pytest
+import token_cache
+
+PROCESSES = 4
+THREADS = 8
+
+
+class TokenEndpoint(ThreadingHTTPServer):
+    """Counts token requests and hands out numbered access tokens."""
+
+    def __init__(self, expires_in=3600):
+        super().__init__(('127.0.0.1', 0), TokenHandler)
+        self.expires_in = expires_in
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def uri(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/token'
+
+
+class TokenHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            token = f'token-{self.server.requests}'
+        time.sleep(0.2)  # Widen the window for duplicate refreshes
+        body = json.dumps({'access_token': token, 'expires_in': self.server.expires_in}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = TokenEndpoint()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_credentials(token_uri, cache_path, refresh_margin=300):
+    return token_cache.SharedTokenCredentials(
+        None,
+        refresh_token='refresh-token',
+        client_id='client-id',
+        client_secret='client-secret',
+        token_uri=token_uri,
+        cache_path=cache_path,
+        refresh_margin=refresh_margin,
+    )
+
+
+def refresh_in_threads(token_uri, cache_path, start, results):
+    """Process body: THREADS credentials refresh at once once `start` is set."""
+    tokens = []
+
+    def refresh():
+        credentials = make_credentials(token_uri, cache_path)
+        credentials.refresh(Request())
+        tokens.append(credentials.token)
+
+    start.wait()
+    threads = [threading.Thread(target=refresh) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(tokens)
+
+
+def test_one_token_request_across_processes_and_threads(endpoint, tmp_path):
+    cache_path = str(tmp_path / 'cache' / 'token_cache.json')
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=refresh_in_threads, args=(endpoint.uri, cache_path, start, results))
+        for _ in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    start.set()
+    tokens = [token for _ in processes for token in results.get(timeout=60)]
+    for process in processes:
+        process.join(timeout=60)
+
+    assert endpoint.requests == 1
+    assert tokens == ['token-1'] * (PROCESSES * THREADS)
+
+
+def test_token_inside_refresh_margin_is_refreshed(endpoint, tmp_path):
+    cache_path = str(tmp_path / 'token_cache.json')
+    credentials = make_credentials(endpoint.uri, cache_path, refresh_margin=300)
+    credentials.refresh(Request())
+    assert credentials.token == 'token-1'
+    assert not credentials.expired
+
+    # A second worker reuses the cached token
+    other = make_credentials(endpoint.uri, cache_path, refresh_margin=300)
+    other.refresh(Request())
+    assert other.token == 'token-1'
+    assert endpoint.requests == 1
+
+    # Move the cached token to within the margin of its expiry
+    expiry = _helpers.utcnow() + timedelta(seconds=60)
+    entries = token_cache.read_cache(cache_path)
+    for entry in entries.values():
+        entry['expiry'] = expiry.isoformat()
+    token_cache.write_cache(cache_path, entries)
+    credentials.expiry = expiry
+    assert credentials.expired
+
+    credentials.refresh(Request())
+    assert credentials.token == 'token-2'
+    assert endpoint.requests == 2
+    assert not credentials.expired
+
+
+def test_unusable_lock_file_does_not_break_refresh(endpoint, tmp_path):
+    cache_path = str(tmp_path / 'token_cache.json')
+    (tmp_path / 'token_cache.json.lock').mkdir()  # open() on it fails
+
+    credentials = make_credentials(endpoint.uri, cache_path)
+    credentials.refresh(Request())
+
+    assert credentials.token == 'token-1'
+    assert token_cache.read_cache(cache_path)
@@ -0,0 +1,204 @@
+"""
+Shared OAuth access-token cache.
+Every process used to exchange GOOGLE_ADS_REFRESH_TOKEN for its own access
+token. SharedTokenCredentials keeps the access token in a JSON file
+(OAUTH_TOKEN_CACHE_PATH) that all workers on the host read, so one exchange
+serves them all until the token nears expiry.
+
+Tokens are refreshed OAUTH_TOKEN_REFRESH_MARGIN_SECONDS before they expire.
+Refreshes are single-flight: a thread lock within the process and an flock
+on `<cache>.lock` across processes, with the cache re-read once the lock is
+held, so only the first worker to notice calls the token endpoint and the
+rest pick up its token. Without fcntl (Windows), or if the lock file
+cannot be opened, only the thread lock is used.
+
+The cache directory is created 0700 and the lock file is opened without
+following symlinks, so the default location is not shared with other users.
+"""
+
+from datetime import datetime, timedelta
+from google.auth import _helpers
+from google.auth.credentials import TokenState
+from google.oauth2.credentials import Credentials
+from config import Config
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def _process_lock(path):
+    """Thread lock shared by every credentials object using the same cache file."""
+    with _process_locks_guard:
+        return _process_locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive flock on `path`, held for the duration of the block."""
+    if fcntl is None:
+        yield
+        return
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    except OSError as e:
+        # Only costs cross-process single-flight; the thread lock still holds
+        logger.warning("Could not open token cache lock %s: %s", path, e)
+        yield
+        return
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+    finally:
+        os.close(descriptor)
+
+
+def entry_expiry(entry):
+    """Expiry of a cache entry as a naive UTC datetime, or None if malformed."""
+    try:
+        return datetime.fromisoformat(entry['expiry'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def cache_key(client_id, refresh_token):
+    """Cache entry key; the refresh token itself is never written to the cache."""
+    return hashlib.sha256(f'{client_id}:{refresh_token}'.encode()).hexdigest()
+
+
+def read_cache(path):
+    """Cache file contents, or an empty dict if it is missing or unreadable."""
+    try:
+        with open(path) as cache_file:
+            entries = json.load(cache_file)
+        return entries if isinstance(entries, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_cache(path, entries):
+    """Replace the cache file atomically so readers never see a partial write."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token-cache-')  # Created 0600
+    try:
+        with os.fdopen(handle, 'w') as tmp_file:
+            json.dump(entries, tmp_file)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+class SharedTokenCredentials(Credentials):
+    """OAuth user credentials whose access token is shared through a file cache."""
+
+    def __init__(self, *args, cache_path=None, refresh_margin=None, **kwargs):
+        """
+        Args:
+            cache_path (str): Cache file; defaults to OAUTH_TOKEN_CACHE_PATH
+            refresh_margin (int): Seconds before expiry at which the token is
+                                  refreshed; defaults to OAUTH_TOKEN_REFRESH_MARGIN_SECONDS
+            *args, **kwargs: google.oauth2.credentials.Credentials arguments
+        """
+        super().__init__(*args, **kwargs)
+        self.cache_path = cache_path or Config.OAUTH_TOKEN_CACHE_PATH
+        self.refresh_margin = timedelta(seconds=(
+            Config.OAUTH_TOKEN_REFRESH_MARGIN_SECONDS if refresh_margin is None else refresh_margin
+        ))
+        self._cache_key = cache_key(self.client_id, self.refresh_token)
+
+    @property
+    def expired(self):
+        """True once the token is within the refresh margin of its expiry."""
+        if not self.expiry:
+            return False
+        return _helpers.utcnow() >= self.expiry - self.refresh_margin
+
+    @property
+    def token_state(self):
+        # No background refresh: a token inside the margin is refreshed before use
+        if self.token is None or self.expired:
+            return TokenState.INVALID
+        return TokenState.FRESH
+
+    def refresh(self, request):
+        """
+        Load a fresh token from the cache, or get one from the token endpoint
+        and cache it if no other thread or process already has.
+
+        Args:
+            request (google.auth.transport.Request): HTTP transport for the token endpoint
+        """
+        with _process_lock(self.cache_path):
+            if self._load_cached():
+                return
+            with _file_lock(f'{self.cache_path}.lock'):
+                if self._load_cached():
+                    return
+                super().refresh(request)
+                logger.info("Refreshed Google Ads access token (expires %s UTC)", self.expiry)
+                self._store()
+
+    def _load_cached(self):
+        """Adopt the cached token if it is still outside the refresh margin."""
+        entry = read_cache(self.cache_path).get(self._cache_key)
+        expiry = entry_expiry(entry) if entry else None
+        if expiry is None or not entry.get('token') or _helpers.utcnow() >= expiry - self.refresh_margin:
+            return False
+        self.token = entry['token']
+        self.expiry = expiry
+        return True
+
+    def _store(self):
+        """Write the current token to the cache; failures only cost later refreshes."""
+        if not self.expiry:
+            return
+        now = _helpers.utcnow()
+        # Drop tokens that have expired, e.g. from a rotated refresh token
+        entries = {
+            key: entry for key, entry in read_cache(self.cache_path).items()
+            if (entry_expiry(entry) or now) > now
+        }
+        entries[self._cache_key] = {'token': self.token, 'expiry': self.expiry.isoformat()}
+        try:
+            write_cache(self.cache_path, entries)
+        except OSError as e:
+            logger.warning("Could not write token cache %s: %s", self.cache_path, e)
+
+
+def get_credentials(credentials):
+    """
+    Build shared-cache credentials from a Google Ads credentials dict.
+
+    Args:
+        credentials (dict): client_id, client_secret and refresh_token
+                            (as returned by Config.get_google_ads_config)
+
+    Returns:
+        SharedTokenCredentials
+    """
+    return SharedTokenCredentials(
+        None,
+        refresh_token=credentials['refresh_token'],
+        client_id=credentials['client_id'],
+        client_secret=credentials['client_secret'],
+        token_uri=credentials.get('token_uri') or Config.OAUTH_TOKEN_URI,
+    )
@@ -0,0 +1,175 @@
+"""
+Publish dry run.
+Checks many drafts at once without creating anything in Google Ads: first
+against the local limits in Campaign.validate_publish_data, then, for the
+campaigns that pass, with validate_only mutates of VALIDATION_BATCH_SIZE
+campaigns per request, fanned out across accounts.
+"""
+
+from datetime import date
+from sqlalchemy import select
+from models import db, Campaign, SharedBudget, DEFAULT_DAILY_BUDGET
+from accounts import FanOutJob, get_account_pool, publish_operation_count
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def drafts_query(campaign_ids=None):
+    """Campaigns to check: the given ids (none for an empty list), or every live draft."""
+    query = select(Campaign).where(Campaign.archived_at.is_(None))
+    if campaign_ids is not None:
+        query = query.where(Campaign.id.in_(campaign_ids))
+    else:
+        query = query.where(Campaign.status == 'DRAFT')
+    return query.order_by(Campaign.created_at)
+
+
+def shared_budgets_query(campaigns):
+    """Known shared budgets for the campaigns' budget groups."""
+    budget_groups = {campaign.budget_group for campaign in campaigns if campaign.budget_group}
+    return select(SharedBudget).where(SharedBudget.budget_group.in_(budget_groups))
+
+
+def check_locally(campaigns, shared_budgets, today):
+    """
+    Run the local checks and batch the campaigns that pass them.
+
+    Args:
+        campaigns (list): Campaigns from drafts_query
+        shared_budgets (list): SharedBudget rows from shared_budgets_query
+        today (date): Reference date for the date checks
+
+    Returns:
+        tuple: (result dict per campaign, batches of at most
+                VALIDATION_BATCH_SIZE (result, campaign_data) pairs per account)
+    """
+    budgets = {
+        (budget.customer_id, budget.budget_group, budget.amount_micros): budget.resource_name
+        for budget in shared_budgets
+    }
+    results = []
+    pending = {}
+    for campaign in campaigns:
+        result = {'id': str(campaign.id), 'name': campaign.name, 'valid': False, 'errors': []}
+        results.append(result)
+        if campaign.status != 'DRAFT':
+            result['errors'].append('Only draft campaigns can be published')
+            continue
+
+        campaign_data = campaign.build_google_ads_data(budgets.get((
+            campaign.customer_id or '', campaign.budget_group, campaign.daily_budget or DEFAULT_DAILY_BUDGET
+        )))
+        result['errors'] = Campaign.validate_publish_data(campaign_data, today)
+        if not result['errors']:
+            result['valid'] = None  # Not checked by Google Ads yet
+            pending.setdefault(campaign.customer_id, []).append((result, campaign_data))
+
+    batches = [
+        (customer_id, items[start:start + Config.VALIDATION_BATCH_SIZE])
+        for customer_id, items in pending.items()
+        for start in range(0, len(items), Config.VALIDATION_BATCH_SIZE)
+    ]
+    return results, batches
+
+
+def apply_remote_results(batch, errors=None, error=None):
+    """
+    Record the outcome of one validate_only request on its campaigns.
+
+    Args:
+        batch (list): (result, campaign_data) pairs sent in the request
+        errors (list): Error messages per campaign returned by validate_campaigns
+        error (Exception): Set if the request itself failed; the campaigns
+                           stay unchecked
+    """
+    for index, (result, _) in enumerate(batch):
+        if error is not None:
+            result['errors'] = [f'Could not check with Google Ads: {str(error)}']
+        else:
+            result['errors'] = errors[index]
+            result['valid'] = not errors[index]
+
+
+def summarize_results(results, remote_checked):
+    """Response body for the dry run."""
+    return {
+        'remote_checked': remote_checked,
+        'valid': sum(1 for result in results if result['valid'] is True),
+        'invalid': sum(1 for result in results if result['valid'] is False),
+        'unchecked': sum(1 for result in results if result['valid'] is None),
+        'campaigns': results,
+    }
+
+
+def load_drafts(campaign_ids=None, session=None):
+    """
+    Load the campaigns to check and run the local checks on them.
+
+    Args:
+        campaign_ids (list): Campaign ids; None for every live draft
+        session (Session): Session to use (defaults to db.session)
+
+    Returns:
+        tuple: (results, batches) as returned by check_locally
+    """
+    session = session or db.session
+    campaigns = session.scalars(drafts_query(campaign_ids)).all()
+    shared_budgets = session.scalars(shared_budgets_query(campaigns)).all()
+    return check_locally(campaigns, shared_budgets, date.today())
+
+
+def validation_jobs(batches):
+    """
+    One validate_only request per batch.
+
+    Returns:
+        tuple: (True if Google Ads is checked at all, FanOutJob per batch
+                keyed by its index; none if the configuration is incomplete)
+    """
+    remote_checked, _ = Config.validate_google_ads_config()
+    if not remote_checked:
+        logger.warning("Google Ads configuration incomplete; dry run used local checks only")
+        return False, []
+    return True, [
+        FanOutJob(
+            customer_id,
+            index,
+            lambda ads_service, data=[campaign_data for _, campaign_data in batch]:
+                ads_service.validate_campaigns(data),
+            sum(publish_operation_count(campaign_data) for _, campaign_data in batch)
+        )
+        for index, (customer_id, batch) in enumerate(batches)
+    ]
+
+
+def apply_outcomes(batches, outcomes):
+    """Record fan-out outcomes, (index, errors, error) tuples, on their batches."""
+    for index, errors, error in outcomes:
+        if error is not None:
+            logger.error("Validation batch for account %s failed: %s", batches[index][0] or 'default', error)
+        apply_remote_results(batches[index][1], errors, error)
+
+
+def validate_drafts(campaign_ids=None, account_pool=None):
+    """
+    Dry-run publishing for many campaigns.
+
+    Only local checks are run if the Google Ads configuration is incomplete.
+
+    Args:
+        campaign_ids (list): Campaign ids; None for every live draft
+        account_pool (AccountPool): Defaults to the process-wide pool
+
+    Returns:
+        dict: Counts and per-campaign results (valid is None for campaigns
+              that passed the local checks but were not checked remotely)
+    """
+    results, batches = load_drafts(campaign_ids)
+    remote_checked, jobs = validation_jobs(batches)
+    if jobs:
+        account_pool = account_pool or get_account_pool()
+        apply_outcomes(batches, account_pool.fan_out(jobs, Config.SCHEDULER_MAX_WORKERS))
+
+    return summarize_results(results, remote_checked)
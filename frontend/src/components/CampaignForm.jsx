@@ -181,11 +181,17 @@ const CampaignForm = ({ onSuccess }) => {
         <div style={styles.formGroup}>
           <label style={styles.label}>Ad Description</label>
           <textarea
-            {...register('ad_description')}
+            {...register('ad_description', {
+              maxLength: { value: 90, message: 'Maximum 90 characters' },
+            })}
             style={styles.textarea}
             placeholder="Save up to 50% on all products. Limited time offer!"
             rows={3}
+            maxLength={90}
           />
+          {errors.ad_description && (
+            <span style={styles.errorText}>{errors.ad_description.message}</span>
+          )}
         </div>
 
         <div style={styles.formGroup}>
@@ -12,17 +12,76 @@ const CampaignList = ({ refreshTrigger }) => {
   const [error, setError] = useState(null);
   const [actionLoading, setActionLoading] = useState({});
   const [actionMessages, setActionMessages] = useState({});
+  const [searchInput, setSearchInput] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [feedCursor, setFeedCursor] = useState(null);
+  const [statusRefreshing, setStatusRefreshing] = useState(false);
+  const [validating, setValidating] = useState(false);
 
   useEffect(() => {
     fetchCampaigns();
+  }, [searchQuery]);
+
+  // The change feed keeps the full list current; search results are refetched
+  useEffect(() => {
+    if (refreshTrigger && searchQuery) {
+      fetchCampaigns();
+    }
   }, [refreshTrigger]);
 
+  useEffect(() => {
+    if (searchQuery || feedCursor === null) {
+      return undefined;
+    }
+    return campaignAPI.subscribeToChanges(feedCursor, {
+      onChange: applyChange,
+      onReset: () => {
+        setFeedCursor(null);
+        fetchCampaigns();
+      },
+    });
+  }, [feedCursor, searchQuery]);
+
+  const applyChange = (change) => {
+    setCampaigns((prev) => {
+      if (change.action === 'delete') {
+        return prev.filter((campaign) => campaign.id !== change.id);
+      }
+      if (change.action === 'update' && change.campaign?.archived_at) {
+        return prev.filter((campaign) => campaign.id !== change.id);
+      }
+      const isRestore = change.action === 'update' && change.campaign && 'archived_at' in change.campaign;
+      if ((change.action === 'create' || isRestore) && !prev.some((campaign) => campaign.id === change.id)) {
+        return [change.campaign, ...prev];
+      }
+      return prev.map((campaign) =>
+        campaign.id === change.id ? { ...campaign, ...change.campaign } : campaign
+      );
+    });
+  };
+
+  const refreshAfterAction = async () => {
+    // Outside search the change feed delivers the update
+    if (searchQuery) {
+      await fetchCampaigns();
+    }
+  };
+
   const fetchCampaigns = async () => {
     setLoading(true);
     setError(null);
     try {
-      const data = await campaignAPI.getAll();
-      setCampaigns(data.campaigns || []);
+      if (searchQuery) {
+        const data = await campaignAPI.search(searchQuery);
+        setCampaigns(data.campaigns || []);
+        setNextCursor(data.next_cursor);
+      } else {
+        const data = await campaignAPI.getAll();
+        setCampaigns(data.campaigns || []);
+        setNextCursor(null);
+        setFeedCursor(data.cursor);
+      }
     } catch (err) {
       setError(err.response?.data?.error || 'Failed to fetch campaigns');
     } finally {
@@ -30,6 +89,59 @@ const CampaignList = ({ refreshTrigger }) => {
     }
   };
 
+  const handleSearch = (e) => {
+    e.preventDefault();
+    setSearchQuery(searchInput.trim());
+  };
+
+  const handleLoadMore = async () => {
+    try {
+      const data = await campaignAPI.search(searchQuery, nextCursor);
+      setCampaigns((prev) => [...prev, ...(data.campaigns || [])]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      setError(err.response?.data?.error || 'Failed to fetch campaigns');
+    }
+  };
+
+  const handleRefreshStatus = async () => {
+    setStatusRefreshing(true);
+    try {
+      const data = await campaignAPI.refreshStatus(searchQuery ? campaigns.map((c) => c.id) : null);
+      const statuses = Object.fromEntries(data.campaigns.map((status) => [status.id, status]));
+      setCampaigns((prev) =>
+        prev.map((campaign) => (statuses[campaign.id] ? { ...campaign, ...statuses[campaign.id] } : campaign))
+      );
+      if (data.failed_accounts.length > 0) {
+        setError(`Could not read status for accounts: ${data.failed_accounts.join(', ')}`);
+      }
+    } catch (err) {
+      setError(err.response?.data?.error || 'Failed to refresh campaign status');
+    } finally {
+      setStatusRefreshing(false);
+    }
+  };
+
+  const handleValidate = async () => {
+    setValidating(true);
+    try {
+      const data = await campaignAPI.validate(searchQuery ? campaigns.map((c) => c.id) : null);
+      const messages = {};
+      data.campaigns.forEach((result) => {
+        if (result.valid === false || result.valid === null) {
+          messages[result.id] = { type: 'error', text: result.errors.join(' · ') || 'Not checked with Google Ads' };
+        } else {
+          messages[result.id] = { type: 'success', text: 'Ready to publish' };
+        }
+      });
+      setActionMessages((prev) => ({ ...prev, ...messages }));
+    } catch (err) {
+      setError(err.response?.data?.error || 'Failed to validate campaigns');
+    } finally {
+      setValidating(false);
+    }
+  };
+
   const handlePublish = async (campaignId) => {
     setActionLoading((prev) => ({ ...prev, [campaignId]: 'publishing' }));
     setActionMessages((prev) => ({ ...prev, [campaignId]: null }));
@@ -45,7 +157,7 @@ const CampaignList = ({ refreshTrigger }) => {
       }));
       
       // Refresh the list
-      await fetchCampaigns();
+      await refreshAfterAction();
     } catch (err) {
       setActionMessages((prev) => ({
         ...prev,
@@ -78,7 +190,7 @@ const CampaignList = ({ refreshTrigger }) => {
       }));
       
       // Refresh the list
-      await fetchCampaigns();
+      await refreshAfterAction();
     } catch (err) {
       setActionMessages((prev) => ({
         ...prev,
@@ -92,6 +204,40 @@ const CampaignList = ({ refreshTrigger }) => {
     }
   };
 
+  const handleClone = async (campaignId) => {
+    const input = prompt('Headline variants, separated by | (leave empty for a single copy)');
+    if (input === null) {
+      return;
+    }
+    const headlines = input.split('|').map((headline) => headline.trim()).filter(Boolean);
+
+    setActionLoading((prev) => ({ ...prev, [campaignId]: 'cloning' }));
+    setActionMessages((prev) => ({ ...prev, [campaignId]: null }));
+
+    try {
+      const result = await campaignAPI.clone(
+        campaignId,
+        headlines.length > 0 ? { matrix: { ad_headline: headlines } } : { variants: [{}] }
+      );
+      setActionMessages((prev) => ({
+        ...prev,
+        [campaignId]: { type: 'success', text: result.message },
+      }));
+      await refreshAfterAction();
+    } catch (err) {
+      const details = err.response?.data?.details;
+      setActionMessages((prev) => ({
+        ...prev,
+        [campaignId]: {
+          type: 'error',
+          text: details ? details.join(' · ') : err.response?.data?.error || 'Failed to clone campaign',
+        },
+      }));
+    } finally {
+      setActionLoading((prev) => ({ ...prev, [campaignId]: null }));
+    }
+  };
+
   const handleDelete = async (campaignId, campaignName) => {
     if (!confirm(`Are you sure you want to delete "${campaignName}"?`)) {
       return;
@@ -101,7 +247,7 @@ const CampaignList = ({ refreshTrigger }) => {
 
     try {
       await campaignAPI.delete(campaignId);
-      await fetchCampaigns();
+      await refreshAfterAction();
     } catch (err) {
       setActionMessages((prev) => ({
         ...prev,
@@ -134,6 +280,16 @@ const CampaignList = ({ refreshTrigger }) => {
     );
   };
 
+  const getRemoteStatus = (campaign) => {
+    if (!campaign.remote_status) return null;
+    const serving = campaign.serving_status ? ` · ${campaign.serving_status}` : '';
+    return (
+      <div style={styles.remoteStatus} title={`Checked ${new Date(campaign.status_checked_at).toLocaleString()}`}>
+        Google: {campaign.remote_status}{serving}
+      </div>
+    );
+  };
+
   const formatDate = (dateString) => {
     if (!dateString) return 'N/A';
     return new Date(dateString).toLocaleDateString();
@@ -165,7 +321,7 @@ const CampaignList = ({ refreshTrigger }) => {
     );
   }
 
-  if (campaigns.length === 0) {
+  if (campaigns.length === 0 && !searchQuery) {
     return (
       <div style={styles.container}>
         <h2 style={styles.heading}>All Campaigns</h2>
@@ -180,11 +336,42 @@ const CampaignList = ({ refreshTrigger }) => {
     <div style={styles.container}>
       <div style={styles.header}>
         <h2 style={styles.heading}>All Campaigns</h2>
-        <button onClick={fetchCampaigns} style={styles.refreshButton}>
-          🔄 Refresh
-        </button>
+        <form onSubmit={handleSearch} style={styles.searchForm}>
+          <input
+            type="search"
+            value={searchInput}
+            onChange={(e) => setSearchInput(e.target.value)}
+            placeholder="Search campaigns..."
+            style={styles.searchInput}
+          />
+          <button type="button" onClick={fetchCampaigns} style={styles.refreshButton}>
+            🔄 Refresh
+          </button>
+          <button
+            type="button"
+            onClick={handleRefreshStatus}
+            disabled={statusRefreshing}
+            style={styles.refreshButton}
+          >
+            {statusRefreshing ? 'Checking...' : '📡 Check serving'}
+          </button>
+          <button
+            type="button"
+            onClick={handleValidate}
+            disabled={validating}
+            style={styles.refreshButton}
+          >
+            {validating ? 'Validating...' : '✅ Validate drafts'}
+          </button>
+        </form>
       </div>
 
+      {searchQuery && campaigns.length === 0 && (
+        <div style={styles.emptyState}>
+          <p>No campaigns match "{searchQuery}".</p>
+        </div>
+      )}
+
       <div style={styles.tableContainer}>
         <table style={styles.table}>
           <thead>
@@ -215,7 +402,10 @@ const CampaignList = ({ refreshTrigger }) => {
                       <div>End: {formatDate(campaign.end_date)}</div>
                     </div>
                   </td>
-                  <td style={styles.td}>{getStatusBadge(campaign.status)}</td>
+                  <td style={styles.td}>
+                    {getStatusBadge(campaign.status)}
+                    {getRemoteStatus(campaign)}
+                  </td>
                   <td style={styles.td}>
                     {campaign.google_campaign_id || (
                       <span style={styles.mutedText}>Not published</span>
@@ -253,6 +443,19 @@ const CampaignList = ({ refreshTrigger }) => {
                         </button>
                       )}
 
+                      <button
+                        onClick={() => handleClone(campaign.id)}
+                        disabled={actionLoading[campaign.id]}
+                        style={{
+                          ...styles.actionButton,
+                          ...styles.cloneButton,
+                        }}
+                      >
+                        {actionLoading[campaign.id] === 'cloning'
+                          ? 'Cloning...'
+                          : '📄 Clone'}
+                      </button>
+
                       <button
                         onClick={() => handleDelete(campaign.id, campaign.name)}
                         disabled={actionLoading[campaign.id]}
@@ -290,6 +493,12 @@ const CampaignList = ({ refreshTrigger }) => {
           </tbody>
         </table>
       </div>
+
+      {nextCursor && (
+        <button onClick={handleLoadMore} style={styles.loadMoreButton}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
@@ -320,6 +529,26 @@ const styles = {
     cursor: 'pointer',
     fontSize: '0.875rem',
   },
+  searchForm: {
+    display: 'flex',
+    gap: '0.5rem',
+  },
+  searchInput: {
+    padding: '0.5rem',
+    border: '1px solid #ddd',
+    borderRadius: '4px',
+    fontSize: '0.875rem',
+  },
+  loadMoreButton: {
+    display: 'block',
+    margin: '1rem auto 0',
+    padding: '0.5rem 1.5rem',
+    border: '1px solid #ddd',
+    borderRadius: '4px',
+    backgroundColor: 'white',
+    cursor: 'pointer',
+    fontSize: '0.875rem',
+  },
   loading: {
     textAlign: 'center',
     padding: '2rem',
@@ -383,6 +612,12 @@ const styles = {
     fontWeight: '600',
     display: 'inline-block',
   },
+  remoteStatus: {
+    marginTop: '0.25rem',
+    fontSize: '0.7rem',
+    color: '#666',
+    whiteSpace: 'nowrap',
+  },
   mutedText: {
     color: '#999',
     fontStyle: 'italic',
@@ -409,6 +644,10 @@ const styles = {
     backgroundColor: '#ffa726',
     color: 'white',
   },
+  cloneButton: {
+    backgroundColor: '#78909c',
+    color: 'white',
+  },
   deleteButton: {
     backgroundColor: '#ef5350',
     color: 'white',
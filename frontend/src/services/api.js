@@ -49,6 +49,32 @@ export const campaignAPI = {
     return response.data;
   },
 
+  /**
+   * Full-text search over campaigns (pass nextCursor to get the next page)
+   */
+  search: async (query, cursor = null) => {
+    const params = { q: query };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    const response = await api.get('/campaigns/search', { params });
+    return response.data;
+  },
+
+  /**
+   * Subscribe to campaign change deltas (Server-Sent Events) after a cursor.
+   * Returns a function that closes the stream.
+   */
+  subscribeToChanges: (since, { onChange, onReset }) => {
+    const source = new EventSource(`${API_BASE_URL}/api/campaigns/changes?since=${since}`);
+    source.addEventListener('change', (event) => onChange(JSON.parse(event.data)));
+    source.addEventListener('reset', () => {
+      source.close();
+      onReset();
+    });
+    return () => source.close();
+  },
+
   /**
    * Get a single campaign by ID
    */
@@ -96,6 +122,47 @@ export const campaignAPI = {
     const response = await api.post(`/campaigns/${id}/disable`);
     return response.data;
   },
+
+  /**
+   * Archive a campaign (hidden from the list, moved to the archive table later)
+   */
+  archive: async (id) => {
+    const response = await api.post(`/campaigns/${id}/archive`);
+    return response.data;
+  },
+
+  /**
+   * Restore an archived campaign
+   */
+  restore: async (id) => {
+    const response = await api.post(`/campaigns/${id}/restore`);
+    return response.data;
+  },
+
+  /**
+   * Create draft variants of a campaign: variants is a list of field overrides,
+   * matrix maps fields to values and produces every combination
+   */
+  clone: async (id, { variants = null, matrix = null, publish = false } = {}) => {
+    const response = await api.post(`/campaigns/${id}/clone`, { variants, matrix, publish });
+    return response.data;
+  },
+
+  /**
+   * Dry-run publishing: check drafts locally and with Google Ads (all drafts when ids is null)
+   */
+  validate: async (ids = null) => {
+    const response = await api.post('/campaigns/validate', { ids });
+    return response.data;
+  },
+
+  /**
+   * Read serving status back from Google Ads (all published campaigns when ids is null)
+   */
+  refreshStatus: async (ids = null, force = false) => {
+    const response = await api.post('/campaigns/refresh-status', { ids, force });
+    return response.data;
+  },
 };
 
 /**